@@ -0,0 +1,200 @@
+from __future__ import annotations
+"""
+Background connectivity monitor.
+
+- Probes with non-blocking sockets (no `ping` processes): every configured target
+  is tried at once and the first answer wins.
+    tcp:<ip>:<port>   TCP connect completes
+    dns:<ip>[:<port>] a resolver answers a tiny UDP query (root NS)
+- Keeps the last result with a timestamp; is_online() is an O(1) read of that cache.
+- Emits NET_STATUS {"online": bool} on the bus only when the state changes.
+- One probe at a time: check() is serialized (the background loop, wait_online()
+  and inline callers queue up), so a slow probe can never overwrite a newer result
+  and NET_STATUS events go out in the order the state changed.
+
+Targets are IP addresses on purpose: resolving a hostname would block on the very
+DNS we are trying to test.
+"""
+
+import logging, os, selectors, socket, struct, threading, time
+from typing import Any, List, Optional, Tuple
+
+from core import events as E
+from core.config import NET_PROBE_INTERVAL_S, NET_PROBE_TARGETS, NET_PROBE_TIMEOUT_S, NET_STATUS_TTL_S
+
+logger = logging.getLogger(__name__)
+
+Target = Tuple[str, str, int]  # (kind, ip, port)
+
+def parse_targets(specs) -> List[Target]:
+    out: List[Target] = []
+    for spec in specs:
+        kind, _, rest = spec.partition(":")
+        ip, _, port = rest.partition(":")
+        if kind not in ("tcp", "dns") or not ip:
+            logger.warning("net_probe_bad_target %s", spec); continue
+        out.append((kind, ip, int(port or 53)))
+    return out
+
+def _dns_query() -> Tuple[int, bytes]:
+    qid = struct.unpack("!H", os.urandom(2))[0]
+    # header: id, RD, 1 question; question: root name, type NS, class IN
+    return qid, struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0) + b"\x00" + struct.pack("!HH", 2, 1)
+
+def probe(targets: List[Target], timeout_s: float = NET_PROBE_TIMEOUT_S) -> bool:
+    """True as soon as any target answers within timeout_s."""
+    sel = selectors.DefaultSelector()
+    socks: List[socket.socket] = []
+    try:
+        for kind, ip, port in targets:
+            try:
+                if kind == "tcp":
+                    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    s.setblocking(False)
+                    socks.append(s)
+                    if s.connect_ex((ip, port)) == 0:
+                        return True
+                    sel.register(s, selectors.EVENT_WRITE, (kind, None))
+                else:
+                    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    s.setblocking(False)
+                    socks.append(s)
+                    qid, query = _dns_query()
+                    s.sendto(query, (ip, port))
+                    sel.register(s, selectors.EVENT_READ, (kind, qid))
+            except OSError as e:  # no route / network unreachable: this target is out
+                logger.debug("net_probe_skip %s:%s %s", ip, port, e)
+        deadline = time.monotonic() + timeout_s
+        while sel.get_map():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            for key, _ev in sel.select(left):
+                kind, qid = key.data
+                s = key.fileobj
+                try:
+                    if kind == "tcp":
+                        ok = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                    else:
+                        reply = s.recv(512)
+                        ok = len(reply) >= 2 and struct.unpack("!H", reply[:2])[0] == qid
+                except OSError:
+                    ok = False
+                if ok:
+                    return True
+                sel.unregister(s)
+        return False
+    finally:
+        sel.close()
+        for s in socks:
+            s.close()
+
+class ConnectivityMonitor:
+    """
+    Periodic prober with a cached answer. start()/stop() run it on a background
+    thread (Supervisor service); without the thread, is_online() probes inline
+    when the cached answer is older than ttl_s.
+    """
+
+    def __init__(self, bus: Any = None, targets=NET_PROBE_TARGETS, *, interval_s: float = NET_PROBE_INTERVAL_S,
+                 timeout_s: float = NET_PROBE_TIMEOUT_S, ttl_s: float = NET_STATUS_TTL_S):
+        self.bus = bus
+        self.targets = parse_targets(targets)
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.ttl_s = ttl_s
+        self._online: Optional[bool] = None   # None = not probed yet
+        self._checked_at = 0.0
+        self._lock = threading.Lock()         # the cached answer (O(1) readers)
+        self._probe_lock = threading.RLock()  # one check() in flight; RLock: a sync-bus handler may check()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.probes = self.transitions = 0
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="net-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set(); self._wake.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout_s + 1.0)
+            self._thread = None
+
+    # ---------- queries ----------
+    def is_online(self) -> bool:
+        with self._lock:
+            online, age = self._online, time.monotonic() - self._checked_at
+        if online is not None and age <= self.ttl_s:
+            return online
+        if self._thread is not None:
+            self.poke()
+            return bool(online)
+        return self.check()
+
+    def check(self) -> bool:
+        """
+        Probe now (blocks up to timeout_s, plus any probe already running), update the
+        cache and emit on change.
+        """
+        with self._probe_lock:
+            ok = probe(self.targets, self.timeout_s)
+            with self._lock:
+                self.probes += 1
+                changed = ok != self._online
+                self._online, self._checked_at = ok, time.monotonic()
+                if changed:
+                    self.transitions += 1
+            if changed:  # still under _probe_lock: emitted in state order
+                logger.info("net_status online=%s", ok)
+                if self.bus is not None:
+                    self.bus.emit(E.NET_STATUS, {"online": ok})
+            return ok
+
+    def poke(self) -> None:
+        """Ask the background thread for a probe now (e.g. after joining a network)."""
+        self._wake.set()
+
+    def wait_online(self, timeout_s: float, every_s: float = 0.5) -> bool:
+        """Probe every `every_s` until online or timeout (used right after nmcli connect)."""
+        deadline = time.monotonic() + timeout_s
+        while True:
+            if self.check():
+                return True
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            time.sleep(min(every_s, left))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"online": self._online, "age_s": round(time.monotonic() - self._checked_at, 1),
+                    "probes": self.probes, "transitions": self.transitions}
+
+    # ---------- internals ----------
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:  # never let the monitor die on a probe bug
+                logger.warning("net_probe_error %r", e)
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+
+_shared: Optional[ConnectivityMonitor] = None
+_shared_lock = threading.Lock()
+
+def shared_monitor(bus: Any = None) -> ConnectivityMonitor:
+    """Process-wide monitor. The first call with a bus attaches it (NET_STATUS)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ConnectivityMonitor(bus)
+        elif bus is not None and _shared.bus is None:
+            _shared.bus = bus
+        return _shared
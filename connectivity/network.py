@@ -1,191 +1,278 @@
-from __future__ import annotations
-"""
-Network orchestrator (camera-agnostic for button frames; optional camera watcher).
-
-- Online check via ping.
-- Accepts single captured frames (RGB np.ndarray) and routes them through qr_checker.
-- For WIFI: QR -> nmcli connect -> verify internet.
-- Optional: ensure_online() (blocking) and start_qr_online_task() (background watcher) for hands-free QR provisioning.
-
-Passwords are never logged.
-"""
-
-import logging, subprocess, threading, time
-from dataclasses import dataclass
-from typing import Any, Callable, Optional
-
-from service import qr_checker
-from service.logging_setup import setup_logging
-
-try:
-    from service.audio import beep as _beep
-except Exception:
-    def _beep(_: str, **__: Any) -> None: pass
-
-logger = logging.getLogger(__name__)
-
-@dataclass(frozen=True)
-class NmcliResult:
-    ok: bool; rc: int; out: str; err: str
-
-def _run(cmd: list[str], *, timeout: Optional[float] = None) -> NmcliResult:
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
-    return NmcliResult(ok=(p.returncode == 0), rc=p.returncode, out=p.stdout.strip(), err=p.stderr.strip())
-
-def is_online(host: str = "8.8.8.8", count: int = 1, timeout_s: float = 1.0) -> bool:
-    try:
-        r = _run(["ping","-c",str(count),"-W",str(int(timeout_s)),host], timeout=timeout_s+0.5)
-        logger.debug("ping rc=%s out='%s' err='%s'", r.rc, r.out, r.err)
-        return r.ok
-    except Exception as e:
-        logger.warning("ping failed: %s", repr(e)); return False
-
-def get_active_ssid() -> Optional[str]:
-    r = _run(["nmcli","-t","-f","ACTIVE,SSID","dev","wifi"])
-    if not r.ok: return None
-    for line in r.out.splitlines():
-        parts = line.split(":")
-        if len(parts) >= 2 and parts[0] == "yes":
-            return parts[1] or None
-    return None
-
-def scan() -> list[str]:
-    r = _run(["nmcli","-t","-f","SSID","dev","wifi","list"])
-    if not r.ok: return []
-    out: list[str] = []
-    for line in r.out.splitlines():
-        s = (line or "").strip()
-        if s and s not in out: out.append(s)
-    return out
-
-def _nmcli_connect(ssid: str | None, password: Optional[str], *, hidden: bool = False) -> NmcliResult:
-    args = ["nmcli","dev","wifi","connect", ssid or ""]
-    if password: args += ["password", password]
-    if hidden: args += ["hidden","yes"]
-    return _run(args, timeout=20)
-
-# ------- Camera-agnostic, single-frame entrypoint (use this from your button) --------
-
-def handle_frame(image_rgb: "Any", *, connect_wait_s: float = 8.0, ping_timeout_s: float = 1.0) -> qr_checker.QRDecision:
-    """
-    Route a captured RGB frame:
-      - No QR -> emits 'ocr_route' and returns decision (placeholder for OCR).
-      - Other QR -> emits 'other_qr'.
-      - WIFI QR -> nmcli connect and confirm internet, emits 'nmcli_connect_ok' and 'online_after_qr'.
-    """
-    setup_logging()
-    d = qr_checker.classify_frame(image_rgb)
-
-    if d.kind == "ocr":
-        logger.info("ocr_route")
-        _beep("qr_invalid_payload")
-        return d
-
-    if d.kind == "other_qr":
-        note = d.error or (d.payload or "<unknown_qr>")
-        logger.info("other_qr %s", note)
-        _beep("qr_invalid_payload")
-        return d
-
-    # WIFI QR path
-    creds = d.creds
-    ssid = getattr(creds, "ssid", None)
-    hidden = bool(getattr(creds, "hidden", False))
-    password = getattr(creds, "password", None)
-
-    logger.info("qr_valid_payload ssid=%s hidden=%s", ssid, hidden)
-    _beep("qr_valid_payload")
-
-    active = get_active_ssid()
-    if ssid and active and ssid != active:
-        logger.info("switching_ssid frm=%s to=%s", active, ssid)
-        _beep("switching_ssid")
-
-    r = _nmcli_connect(ssid, password, hidden=hidden)
-    if not r.ok:
-        logger.info("nmcli_connect_failed ssid=%s rc=%d", ssid, r.rc)
-        _beep("nmcli_connect_failed")
-        return d
-
-    logger.info("nmcli_connect_ok ssid=%s", ssid)
-    _beep("nmcli_connect_ok")
-
-    deadline = time.time() + max(1.0, connect_wait_s)
-    while time.time() < deadline:
-        if is_online(timeout_s=ping_timeout_s):
-            logger.info("online_after_qr ssid=%s", ssid)
-            _beep("online_after_qr")
-            return d
-        time.sleep(0.6)
-
-    logger.info("still_offline_after_connect ssid=%s", ssid)
-    return d
-
-# ------- OPTIONAL: camera-backed helpers if you also want hands-free provisioning ----
-# These keep qr_checker image-only; they capture frames here and pass them in.
-
-def ensure_online(*, autoconnect_window_s: float = 6.0, camera_warmup_s: float = 1.2) -> bool:
-    """Blocking: allow autoconnect window; if offline, wait for a WIFI: QR via camera and connect."""
-    setup_logging()
-    end = time.time() + autoconnect_window_s
-    while time.time() < end:
-        if is_online():
-            logger.info("already_online"); _beep("online_after_qr"); return True
-        time.sleep(0.5)
-
-    try:
-        from picamera2 import Picamera2
-    except Exception:
-        logger.error("picamera2 not available"); return False
-
-    cam = Picamera2()
-    cam.configure(cam.create_preview_configuration(main={"format":"RGB888"}))
-    cam.start(); time.sleep(camera_warmup_s)
-    try:
-        while True:
-            frame = cam.capture_array()
-            d = handle_frame(frame)
-            if d.kind == "wifi_qr" and is_online(): return True
-            time.sleep(0.3)
-    finally:
-        try: cam.close()
-        except Exception: pass
-
-def start_qr_online_task(*, debounce_s: float = 6.0, camera_warmup_s: float = 1.2) -> threading.Thread:
-    """Background watcher: scans via camera; connects/switches when a WIFI: QR appears."""
-    setup_logging()
-    try:
-        from picamera2 import Picamera2
-    except Exception:
-        raise RuntimeError("picamera2 not available")
-
-    stop = threading.Event()
-
-    def loop() -> None:
-        cam = Picamera2()
-        cam.configure(cam.create_preview_configuration(main={"format":"RGB888"}))
-        cam.start(); time.sleep(camera_warmup_s)
-        last_ssid: Optional[str] = None
-        last_ts = 0.0
-        try:
-            while not stop.is_set():
-                frame = cam.capture_array()
-                d = qr_checker.classify_frame(frame)
-                if d.kind != "wifi_qr":
-                    time.sleep(0.4); continue
-                ssid = getattr(d.creds, "ssid", None)
-                now = time.time()
-                if ssid and ssid == last_ssid and (now - last_ts) < debounce_s:
-                    time.sleep(0.4); continue
-                last_ssid, last_ts = ssid, now
-                handle_frame(frame)  # emits events + connects
-                time.sleep(0.4)
-        finally:
-            try: cam.close()
-            except Exception: pass
-
-    th = threading.Thread(target=loop, name="qr-online-task", daemon=True)
-    th.stop_event = stop  # type: ignore[attr-defined]
-    th.start()
-    return th
-
+from __future__ import annotations
+"""
+Network orchestrator (camera-agnostic for button frames; optional camera watcher).
+
+- Online check via the shared ConnectivityMonitor (socket probes, cached; no ping).
+- Accepts single captured frames (RGB np.ndarray) and routes them through qr_checker.
+- For WIFI: QR -> already on that SSID? done : SSID not in range? fail fast (spoken) :
+  known profile? `nmcli con up` : nmcli connect -> verify internet.
+- Visible/active SSIDs come from the background WifiScanner cache (connectivity.wifi_scan).
+- Optional: ensure_online() (blocking) and start_qr_online_task() (background watcher) for hands-free QR provisioning,
+  both reading from the shared camera service.
+
+Passwords are never logged.
+"""
+
+import logging, subprocess, threading, time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from core import tracing
+from connectivity.monitor import shared_monitor
+from connectivity.wifi_scan import shared_scanner, split_terse
+
+if TYPE_CHECKING:  # both pull in cv2/numpy: imported on first use, not at boot
+    from services.camera.camera import Camera
+    from services.vision import qr_detector as qr_checker
+
+# earcons from the pre-rendered tone bank, mixed over speech (numpy is loaded on the first beep)
+from services.audio.tones import beep as _beep
+
+logger = logging.getLogger(__name__)
+
+# spoken when provisioning cannot start (passed to handle_frame's `say`)
+MSG_SSID_NOT_FOUND = "لم أجد الشبكة {ssid} بالقرب"
+
+@dataclass(frozen=True)
+class NmcliResult:
+    ok: bool; rc: int; out: str; err: str
+
+def _run(cmd: list[str], *, timeout: Optional[float] = None) -> NmcliResult:
+    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
+    return NmcliResult(ok=(p.returncode == 0), rc=p.returncode, out=p.stdout.strip(), err=p.stderr.strip())
+
+def is_online() -> bool:
+    """Cached answer of the shared connectivity monitor (O(1) while it runs)."""
+    return shared_monitor().is_online()
+
+def get_active_ssid() -> Optional[str]:
+    # --rescan no: read the current list instead of waiting for a fresh scan
+    r = _run(["nmcli","-t","-f","ACTIVE,SSID","dev","wifi","list","--rescan","no"], timeout=5)
+    if not r.ok: return None
+    for line in r.out.splitlines():
+        parts = split_terse(line)
+        if len(parts) >= 2 and parts[0] == "yes":
+            return parts[1] or None
+    return None
+
+class KnownProfiles:
+    """
+    SSID -> saved NetworkManager connection (UUID). Built once from `nmcli con show`
+    and refreshed only after a connect created/changed a profile, so a known
+    network costs one `nmcli con up` instead of a full `dev wifi connect`.
+    """
+
+    def __init__(self) -> None:
+        self._by_ssid: Optional[dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    def lookup(self, ssid: str) -> Optional[str]:
+        with self._lock:
+            if self._by_ssid is None:
+                self._by_ssid = self._load()
+            return self._by_ssid.get(ssid)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._by_ssid = None
+
+    @staticmethod
+    def _load() -> dict[str, str]:
+        r = _run(["nmcli","-t","-f","NAME,UUID,TYPE","con","show"], timeout=5)
+        if not r.ok: return {}
+        out: dict[str, str] = {}
+        for line in r.out.splitlines():
+            parts = split_terse(line)
+            if len(parts) < 3 or parts[2] not in ("802-11-wireless", "wifi"): continue
+            name, uuid = parts[0], parts[1]
+            s = _run(["nmcli","-g","802-11-wireless.ssid","con","show","uuid",uuid], timeout=5)
+            out.setdefault((s.out if s.ok and s.out else name), uuid)
+        logger.info("known_profiles n=%d", len(out))
+        return out
+
+known_profiles = KnownProfiles()
+
+def scan() -> list[str]:
+    """Visible SSIDs, strongest first (from the scan cache; scans now only if it is stale)."""
+    scanner = shared_scanner()
+    if not scanner.fresh:
+        scanner.refresh()
+    return scanner.ssids()
+
+def _nmcli_connect(ssid: str | None, password: Optional[str], *, hidden: bool = False) -> NmcliResult:
+    args = ["nmcli","dev","wifi","connect", ssid or ""]
+    if password: args += ["password", password]
+    if hidden: args += ["hidden","yes"]
+    return _run(args, timeout=20)
+
+def _nmcli_up(uuid: str) -> NmcliResult:
+    return _run(["nmcli","con","up","uuid",uuid], timeout=15)
+
+# ------- Camera-agnostic, single-frame entrypoint (use this from your button) --------
+
+@tracing.traced("net.handle_frame")
+def handle_frame(image_rgb: "Any", *, connect_wait_s: float = 8.0,
+                 decision: Optional[qr_checker.QRDecision] = None,
+                 say: Optional[Callable[[str], None]] = None) -> qr_checker.QRDecision:
+    """
+    Route a captured RGB frame:
+      - No QR -> emits 'ocr_route' and returns decision (placeholder for OCR).
+      - Other QR -> emits 'other_qr'.
+      - WIFI QR -> nmcli connect and confirm internet, emits 'nmcli_connect_ok' and 'online_after_qr'.
+    Pass `decision` when the frame was already classified (e.g. by classify_burst)
+    and `say` to speak errors to the user (e.g. tts.speak).
+    """
+    if decision is None:
+        from services.vision import qr_detector as qr_checker
+        decision = qr_checker.classify_frame(image_rgb)
+    d = decision
+
+    if d.kind == "ocr":
+        logger.info("ocr_route")
+        _beep("qr_invalid_payload")
+        return d
+
+    if d.kind == "other_qr":
+        note = d.error or (d.payload or "<unknown_qr>")
+        logger.info("other_qr %s", note)
+        _beep("qr_invalid_payload")
+        return d
+
+    # WIFI QR path
+    creds = d.creds
+    ssid = getattr(creds, "ssid", None)
+    hidden = bool(getattr(creds, "hidden", False))
+    password = getattr(creds, "password", None)
+
+    logger.info("qr_valid_payload ssid=%s hidden=%s", ssid, hidden)
+    _beep("qr_valid_payload")
+
+    scanner = shared_scanner()
+    if ssid and not hidden and scanner.is_visible(ssid) is False:
+        # not in the last scan; it may be older than the AP (just powered up / moved closer),
+        # so look once more before giving up. A failed rescan proves nothing: try to connect.
+        logger.info("ssid_not_in_scan ssid=%s rescanning", ssid)
+        if scanner.refresh(rescan="yes") and scanner.is_visible(ssid) is False:
+            # not in a fresh scan either: nmcli would only fail after its 20 s timeout
+            logger.info("ssid_not_visible ssid=%s", ssid)
+            _beep("nmcli_connect_failed")
+            if say is not None:
+                say(MSG_SSID_NOT_FOUND.format(ssid=ssid))
+            return d
+
+    active = scanner.active_ssid() if scanner.fresh else get_active_ssid()
+    if ssid and ssid == active and shared_monitor().is_online():
+        logger.info("already_on_ssid ssid=%s", ssid)
+        _beep("online_after_qr")
+        return d
+    if ssid and active and ssid != active:
+        logger.info("switching_ssid frm=%s to=%s", active, ssid)
+        _beep("switching_ssid")
+
+    uuid = known_profiles.lookup(ssid) if ssid else None
+    r = _nmcli_up(uuid) if uuid else None
+    if r is not None and not r.ok:
+        # saved profile is stale (e.g. password changed): fall back to a full connect
+        logger.info("nmcli_up_failed ssid=%s rc=%d", ssid, r.rc)
+    if r is None or not r.ok:
+        r = _nmcli_connect(ssid, password, hidden=hidden)
+        known_profiles.invalidate()
+    if not r.ok:
+        logger.info("nmcli_connect_failed ssid=%s rc=%d", ssid, r.rc)
+        _beep("nmcli_connect_failed")
+        return d
+
+    logger.info("nmcli_connect_ok ssid=%s", ssid)
+    _beep("nmcli_connect_ok")
+    scanner.poke()  # active network changed
+
+    if shared_monitor().wait_online(max(1.0, connect_wait_s)):
+        logger.info("online_after_qr ssid=%s", ssid)
+        _beep("online_after_qr")
+        return d
+
+    logger.info("still_offline_after_connect ssid=%s", ssid)
+    return d
+
+# ------- OPTIONAL: camera-backed helpers if you also want hands-free provisioning ----
+# These keep qr_checker image-only; frames are borrowed from the shared camera service
+# (already streaming: no per-call Picamera2 setup or warmup) and passed in.
+
+def _camera(camera: Optional[Camera]) -> Camera:
+    from services.camera.camera import shared_camera
+    cam = camera or shared_camera()
+    if cam.backend is None:
+        raise RuntimeError("no camera backend (picamera2 missing and NABD_CAMERA_REPLAY unset)")
+    cam.start()
+    return cam
+
+def _next_decision(cam: Camera, seq: int, timeout_s: float = 2.0) -> tuple[int, qr_checker.QRDecision]:
+    """
+    QR presence on the camera's low-res gray stream; the full-res frame is only
+    pulled (and decoded around the low-res hit) when a QR was found.
+    """
+    from services.vision import qr_detector as qr_checker
+    with cam.borrow(newer_than=seq, timeout_s=timeout_s) as f:
+        seq = f.seq
+        found, pts = qr_checker.locate(f.lores)
+        lores_shape = f.lores.shape
+    if not found:
+        return seq, qr_checker.QRDecision(kind="ocr")
+    with cam.borrow(newer_than=seq - 1, timeout_s=timeout_s, full=True) as f:
+        return f.seq, qr_checker.classify_hinted(f.image, pts, lores_shape)
+
+def ensure_online(*, autoconnect_window_s: float = 6.0, camera: Optional[Camera] = None,
+                  deadline_s: Optional[float] = None) -> bool:
+    """
+    Blocking: allow autoconnect window; if offline, wait for a WIFI: QR via camera and connect.
+    A stalled camera is logged and waited out; returns False once `deadline_s` (if given) has passed.
+    """
+    if shared_monitor().wait_online(autoconnect_window_s):
+        logger.info("already_online"); _beep("online_after_qr"); return True
+
+    try:
+        cam = _camera(camera)
+    except Exception as e:
+        logger.error("camera not available: %s", e); return False
+
+    seq = 0
+    give_up = time.monotonic() + deadline_s if deadline_s is not None else None
+    while True:
+        if give_up is not None and time.monotonic() >= give_up:
+            logger.info("ensure_online_deadline"); return False
+        try:
+            seq, d = _next_decision(cam, seq, timeout_s=5.0)
+        except TimeoutError:
+            logger.warning("ensure_online_no_frame"); continue
+        d = handle_frame(None, decision=d)
+        if d.kind == "wifi_qr" and is_online(): return True
+        time.sleep(0.3)
+
+def start_qr_online_task(*, debounce_s: float = 6.0, camera: Optional[Camera] = None) -> threading.Thread:
+    """Background watcher: scans via camera; connects/switches when a WIFI: QR appears."""
+    cam = _camera(camera)
+    stop = threading.Event()
+
+    def loop() -> None:
+        last_ssid: Optional[str] = None
+        last_ts = 0.0
+        seq = 0
+        while not stop.is_set():
+            try:
+                seq, d = _next_decision(cam, seq)
+            except TimeoutError:
+                logger.warning("qr_task_no_frame"); continue
+            if d.kind != "wifi_qr":
+                time.sleep(0.4); continue
+            ssid = getattr(d.creds, "ssid", None)
+            now = time.time()
+            if ssid and ssid == last_ssid and (now - last_ts) < debounce_s:
+                time.sleep(0.4); continue
+            last_ssid, last_ts = ssid, now
+            handle_frame(None, decision=d)  # emits events + connects
+            time.sleep(0.4)
+
+    th = threading.Thread(target=loop, name="qr-online-task", daemon=True)
+    th.stop_event = stop  # type: ignore[attr-defined]
+    th.start()
+    return th
@@ -0,0 +1,153 @@
+from __future__ import annotations
+"""
+Background Wi-Fi scan cache.
+
+A thread runs `nmcli dev wifi list` every interval and keeps the visible SSIDs
+(best signal per SSID, active flag, security) in a dict, so presence/active
+lookups are O(1) and never fork nmcli on the caller's path.
+
+Answers are only trusted while the snapshot is younger than ttl_s: is_visible()
+returns None when there is no fresh data, so callers fall back to trying instead
+of failing on stale information.
+"""
+
+import logging, re, subprocess, threading, time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.config import WIFI_SCAN_INTERVAL_S, WIFI_SCAN_TTL_S
+
+logger = logging.getLogger(__name__)
+
+def split_terse(line: str) -> List[str]:
+    """Split one `nmcli -t` line (':' separated, '\\:' escaped)."""
+    return [f.replace("\\:", ":").replace("\\\\", "\\") for f in re.split(r"(?<!\\):", line)]
+
+@dataclass(frozen=True)
+class AccessPoint:
+    ssid: str
+    signal: int      # 0..100, best BSSID for this SSID
+    active: bool
+    security: str
+
+def parse_wifi_list(out: str) -> Dict[str, AccessPoint]:
+    aps: Dict[str, AccessPoint] = {}
+    for line in out.splitlines():
+        parts = split_terse(line)
+        if len(parts) < 4 or not parts[1]:
+            continue  # hidden networks have no SSID in scans
+        active, ssid, signal, security = parts[0] == "yes", parts[1], parts[2], parts[3]
+        try: sig = int(signal)
+        except ValueError: sig = 0
+        prev = aps.get(ssid)
+        if prev is not None:
+            active, sig = active or prev.active, max(sig, prev.signal)
+        aps[ssid] = AccessPoint(ssid, sig, active, security)
+    return aps
+
+class WifiScanner:
+    def __init__(self, *, interval_s: float = WIFI_SCAN_INTERVAL_S, ttl_s: float = WIFI_SCAN_TTL_S,
+                 scan_timeout_s: float = 15.0):
+        self.interval_s = interval_s
+        self.ttl_s = ttl_s
+        self.scan_timeout_s = scan_timeout_s
+        self._aps: Dict[str, AccessPoint] = {}
+        self._active: Optional[str] = None
+        self._scanned_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.scans = self.failures = 0
+
+    # ---------- lifecycle ----------
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="wifi-scan", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set(); self._wake.set()
+        if self._thread is not None:
+            self._thread.join(self.scan_timeout_s + 1.0)
+            self._thread = None
+
+    # ---------- lookups (O(1), no nmcli) ----------
+    @property
+    def fresh(self) -> bool:
+        with self._lock:
+            return self._scanned_at is not None and time.monotonic() - self._scanned_at <= self.ttl_s
+
+    def is_visible(self, ssid: str) -> Optional[bool]:
+        """True/False from a fresh scan; None when there is no fresh scan."""
+        with self._lock:
+            if self._scanned_at is None or time.monotonic() - self._scanned_at > self.ttl_s:
+                return None
+            return ssid in self._aps
+
+    def active_ssid(self) -> Optional[str]:
+        """Active SSID from a fresh scan (None if unknown or not connected)."""
+        with self._lock:
+            if self._scanned_at is None or time.monotonic() - self._scanned_at > self.ttl_s:
+                return None
+            return self._active
+
+    def get(self, ssid: str) -> Optional[AccessPoint]:
+        with self._lock:
+            return self._aps.get(ssid)
+
+    def ssids(self) -> List[str]:
+        """Visible SSIDs, strongest first."""
+        with self._lock:
+            return [ap.ssid for ap in sorted(self._aps.values(), key=lambda ap: -ap.signal)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            age = None if self._scanned_at is None else round(time.monotonic() - self._scanned_at, 1)
+            return {"visible": len(self._aps), "active": self._active, "age_s": age,
+                    "scans": self.scans, "failures": self.failures}
+
+    # ---------- scanning ----------
+    def refresh(self, rescan: str = "auto") -> bool:
+        """
+        Scan now (blocking, up to scan_timeout_s). Keeps the old snapshot on failure.
+        rescan="yes" makes NetworkManager scan the air even if its own list is recent.
+        """
+        cmd = ["nmcli","-t","-f","ACTIVE,SSID,SIGNAL,SECURITY","dev","wifi","list","--rescan",rescan]
+        try:
+            p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                               timeout=self.scan_timeout_s)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            p = None; logger.debug("wifi_scan_failed %r", e)
+        if p is None or p.returncode != 0:
+            with self._lock:
+                self.failures += 1
+            return False
+        aps = parse_wifi_list(p.stdout)
+        active = next((ap.ssid for ap in aps.values() if ap.active), None)
+        with self._lock:
+            self._aps, self._active, self._scanned_at = aps, active, time.monotonic()
+            self.scans += 1
+        return True
+
+    def poke(self) -> None:
+        """Rescan soon (e.g. after a connect changed the active network)."""
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+
+_shared: Optional[WifiScanner] = None
+_shared_lock = threading.Lock()
+
+def shared_scanner() -> WifiScanner:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = WifiScanner()
+        return _shared
@@ -1,14 +1,217 @@
-# core/bus.py
-from collections import defaultdict
-
-class EventBus:
-    def __init__(self):
-        self.subscribers = defaultdict(list)
-
-    def subscribe(self, event_type: str, callback):
-        self.subscribers[event_type].append(callback)
-
-    def emit(self, event_type: str, data=None):
-        print(f"[EventBus] Emitting event: {event_type} with data: {data}")
-        for callback in self.subscribers[event_type]:
-            callback(data)
+# core/bus.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from core import tracing
+from core.events import priority_of
+
+logger = logging.getLogger(__name__)
+
+# سياسات الضغط الخلفي (backpressure) عند امتلاء طابور المشترك
+DROP_OLDEST = "drop_oldest"   # أسقط أقدم حدث بأدنى أولوية
+DROP_NEWEST = "drop_newest"   # أسقط الحدث الجديد
+COALESCE = "coalesce"         # استبدل بيانات حدث من نفس النوع ينتظر بالطابور
+POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE)
+
+
+class _Subscriber:
+    """
+    طابور محدود بأولويات + خيط عامل لمشترك واحد.
+    كل دوال نفس الكائن (bound methods) تشترك بنفس الطابور، فتبقى مرتّبة فيما بينها.
+    """
+    def __init__(self, name: str, owner, maxsize: int, policy: str):
+        self.name = name
+        self.owner = owner
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self._heap = []  # [priority, seq, event_type, callback, data, t_emit, trace_cid]
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+
+        self.dispatched = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"bus-{name}", daemon=True)
+        self._thread.start()
+
+    # ---------- producer side ----------
+    def put(self, prio: int, seq: int, event_type: str, callback, data, cid=None) -> bool:
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._heap) >= self.maxsize and not self._make_room(prio, event_type, callback, data, cid):
+                return False
+            heapq.heappush(self._heap, [prio, seq, event_type, callback, data, time.monotonic(), cid])
+            self.max_depth = max(self.max_depth, len(self._heap))
+            self._cond.notify()
+            return True
+
+    def _make_room(self, prio, event_type, callback, data, cid=None) -> bool:
+        """يُستدعى والطابور ممتلئ. يرجع False إذا أُسقط الحدث الجديد."""
+        if self.policy == COALESCE:
+            same = [it for it in self._heap if it[2] == event_type and it[3] is callback]
+            if same:
+                last = max(same, key=lambda it: it[1])
+                last[4], last[6] = data, cid  # آخر نسخة بالطابور تأخذ أحدث بيانات
+                self.coalesced += 1
+                return False
+        if self.policy == DROP_NEWEST:
+            self.dropped += 1
+            return False
+        # DROP_OLDEST (و COALESCE بدون حدث مطابق): الضحية هي الأقدم بين الأدنى أولوية
+        victim = max(self._heap, key=lambda it: (it[0], -it[1]))
+        if victim[0] < prio:
+            self.dropped += 1  # الجديد أقل أهمية من كل ما بالطابور
+            return False
+        self._heap.remove(victim)
+        heapq.heapify(self._heap)
+        self.dropped += 1
+        return True
+
+    # ---------- worker side ----------
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _prio, _seq, event_type, callback, data, t_emit, cid = heapq.heappop(self._heap)
+                self._busy = True
+
+            lat = time.monotonic() - t_emit
+            token = tracing.attach(cid) if cid is not None else None
+            try:
+                with tracing.span(f"bus.{event_type}", sub=self.name, queued_ms=round(lat * 1000.0, 3)):
+                    callback(data)
+            except Exception:
+                self.errors += 1
+                logger.exception("subscriber %s failed on %s", self.name, event_type)
+            finally:
+                if token is not None:
+                    tracing.detach(token)
+                with self._cond:
+                    self._busy = False
+                    self.dispatched += 1
+                    self.latency_sum += lat
+                    self.latency_max = max(self.latency_max, lat)
+                    self._cond.notify_all()
+
+    def wait_idle(self, deadline: float) -> bool:
+        with self._cond:
+            while self._heap or self._busy:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cond.wait(left)
+            return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def join(self, timeout: float):
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            n = self.dispatched
+            return {
+                "depth": len(self._heap),
+                "max_depth": self.max_depth,
+                "dispatched": n,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "latency_avg_ms": (self.latency_sum / n * 1000.0) if n else 0.0,
+                "latency_max_ms": self.latency_max * 1000.0,
+            }
+
+
+class EventBus:
+    """
+    ناقل أحداث بسيط بنمطين:
+      - inline (الافتراضي): كل callback يُنفَّذ فوراً على خيط الـemit.
+      - threaded: لكل مشترك طابور محدود بأولويات (core.events.PRIORITY) وخيط عامل،
+        فلا يعطّل معالج بطيء بقية المشتركين ولا الـemitter.
+    """
+    def __init__(self, threaded: bool = False, queue_size: int = 32, policy: str = DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy: {policy}")
+        self.subscribers = defaultdict(list)
+        self.threaded = threaded
+        self.queue_size = queue_size
+        self.policy = policy
+        self._routes = defaultdict(list)  # event_type -> [(callback, _Subscriber)]
+        self._queues = {}                 # id(owner) -> _Subscriber
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._emitted = defaultdict(int)
+
+    def subscribe(self, event_type: str, callback, *, queue_size: int = None, policy: str = None):
+        self.subscribers[event_type].append(callback)
+        if not self.threaded:
+            return
+        if policy is not None and policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy: {policy}")
+        owner = getattr(callback, "__self__", None)
+        name = type(owner).__name__
+        if owner is None:
+            owner, name = callback, getattr(callback, "__name__", "callback")
+        with self._lock:
+            sub = self._queues.get(id(owner))
+            if sub is None:
+                sub = _Subscriber(name, owner, queue_size or self.queue_size, policy or self.policy)
+                self._queues[id(owner)] = sub
+            self._routes[event_type].append((callback, sub))
+
+    def emit(self, event_type: str, data=None):
+        logger.debug("emit %s data=%s", event_type, data)
+        self._emitted[event_type] += 1
+        if not self.threaded:
+            for callback in self.subscribers[event_type]:
+                with tracing.span(f"bus.{event_type}"):
+                    callback(data)
+            return
+        prio = priority_of(event_type)
+        seq = next(self._seq)
+        cid = tracing.current() if tracing.enabled else None  # يُكمل الـ cid على خيط المشترك
+        for callback, sub in self._routes.get(event_type, ()):
+            sub.put(prio, seq, event_type, callback, data, cid)
+
+    # ---------- introspection / lifecycle ----------
+    def stats(self) -> dict:
+        with self._lock:
+            subs = list(self._queues.values())
+        return {
+            "emitted": dict(self._emitted),
+            "subscribers": {f"{s.name}@{id(s.owner):x}": s.stats() for s in subs},
+        }
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """ينتظر حتى تفرغ كل الطوابير (مفيد للاختبار والإغلاق)."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            subs = list(self._queues.values())
+        return all(s.wait_idle(deadline) for s in subs)
+
+    def close(self, timeout: float = 2.0):
+        """يوقف الخيوط العاملة بعد تصريف ما تبقى بالطوابير."""
+        with self._lock:
+            subs = list(self._queues.values())
+        for s in subs:
+            s.close()
+        deadline = time.monotonic() + timeout
+        for s in subs:
+            s.join(max(0.0, deadline - time.monotonic()))
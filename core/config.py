@@ -1,43 +1,88 @@
-import os
-from pathlib import Path
-
-_env = lambda k, d="": (v := os.getenv(k)) if (v := os.getenv(k)) not in (None, "") else d
-def _env_bool(k, d=False):
-    v = os.getenv(k)
-    return d if v in (None, "") else v.lower() in ("1", "true", "yes", "on")
-def _env_int(k, d):
-    try: 
-        return int(_env(k, str(d)))
-    except: 
-        return d
-
-APP_NAME = "nabd"
-HOME = Path(_env("NABD_HOME", str(Path.home() / f".{APP_NAME}"))).resolve()
-DATA_DIR = HOME / "data"
-LOG_DIR  = HOME / "logs"
-for d in (DATA_DIR, LOG_DIR): 
-    d.mkdir(parents=True, exist_ok=True)
-
-LOG_LEVEL = _env("NABD_LOG", "INFO")
-LOG_FILE  = _env("NABD_LOG_FILE", str(LOG_DIR / "nabd.log"))
-
-SESSION_FILE = Path(_env("NABD_SESSION_FILE", str(DATA_DIR / "session.json")))
-SESSION_AUTO_SAVE_SEC = _env_int("NABD_SESSION_AUTO_SAVE_SEC", 0)
-
-DEFAULT_LANG = _env("NABD_LANG", "ar")
-
-PIPER_ENABLED   = _env_bool("NABD_PIPER_ENABLED", True)
-PIPER_MODEL     = _env("NABD_PIPER_MODEL", str(DATA_DIR / "tts" / "piper" / "ar.onnx"))
-PIPER_SPEAKER   = _env("NABD_PIPER_SPEAKER", "")
-PIPER_RATE      = float(_env("NABD_PIPER_RATE", "1.0"))
-PIPER_VOL       = float(_env("NABD_PIPER_VOL",  "1.0"))
-
-QR_WIFI_PREFIXES = tuple(_env("NABD_QR_WIFI_PREFIXES", "WIFI:").split(","))
-QR_IGNORE_NO_KEY = _env_bool("NABD_QR_IGNORE_NO_KEY", True)
-
-OFFLINE_AUTOREAD           = _env_bool("NABD_OFFLINE_AUTOREAD", True)
-OFFLINE_INTERLINE_DELAY_MS = _env_int("NABD_OFFLINE_INTERLINE_MS", 0)
-
-FEATURE_QR_FIRST           = _env_bool("NABD_FEATURE_QR_FIRST", True)
-FEATURE_AUTO_SWITCH_ONLINE = _env_bool("NABD_FEATURE_AUTO_ONLINE", True)
-
+import os
+from pathlib import Path
+
+_env = lambda k, d="": (v := os.getenv(k)) if (v := os.getenv(k)) not in (None, "") else d
+def _env_bool(k, d=False):
+    v = os.getenv(k)
+    return d if v in (None, "") else v.lower() in ("1", "true", "yes", "on")
+def _env_int(k, d):
+    try: 
+        return int(_env(k, str(d)))
+    except: 
+        return d
+
+APP_NAME = "nabd"
+HOME = Path(_env("NABD_HOME", str(Path.home() / f".{APP_NAME}"))).resolve()
+DATA_DIR = HOME / "data"
+LOG_DIR  = HOME / "logs"
+# no directories are created at import: writers (session, caches, log file) mkdir on first write
+
+LOG_LEVEL = _env("NABD_LOG", "INFO")
+LOG_FILE  = _env("NABD_LOG_FILE", str(LOG_DIR / "nabd.log"))
+
+SESSION_FILE = Path(_env("NABD_SESSION_FILE", str(DATA_DIR / "session.json")))
+SESSION_AUTO_SAVE_SEC = _env_int("NABD_SESSION_AUTO_SAVE_SEC", 0)
+
+DEFAULT_LANG = _env("NABD_LANG", "ar")
+READY_PROMPT = _env("NABD_READY_PROMPT", "الجهاز جاهز")  # spoken as soon as audio is up ("" = silent)
+
+PIPER_ENABLED   = _env_bool("NABD_PIPER_ENABLED", True)
+PIPER_MODEL     = _env("NABD_PIPER_MODEL", str(DATA_DIR / "tts" / "piper" / "ar.onnx"))
+PIPER_SPEAKER   = _env("NABD_PIPER_SPEAKER", "")
+PIPER_RATE      = float(_env("NABD_PIPER_RATE", "1.0"))
+PIPER_VOL       = float(_env("NABD_PIPER_VOL",  "1.0"))  # initial output gain
+
+AUDIO_SINK      = _env("NABD_AUDIO_SINK", "aplay")  # aplay | null | wav:/path/out.wav
+AUDIO_BUFFER_MS = _env_int("NABD_AUDIO_BUFFER_MS", 10)  # one output block; stop() / tone latency bound
+AUDIO_RING_MS   = _env_int("NABD_AUDIO_RING_MS", 500)
+TONE_LEVEL      = float(_env("NABD_TONE_LEVEL", "0.25"))  # earcon amplitude (fraction of full scale)
+TONE_CACHE_DIR  = Path(_env("NABD_TONE_CACHE_DIR", str(DATA_DIR / "tones")))
+
+TTS_WORKER         = _env_bool("NABD_TTS_WORKER", True)      # synthesize in a persistent warm process
+TTS_WORKER_THREADS = _env_int("NABD_TTS_WORKER_THREADS", 0)  # onnxruntime intra-op threads (0 = default)
+
+# one voice per language, "lang=model.onnx,..."; voices whose model is missing are skipped
+TTS_VOICES           = _env("NABD_TTS_VOICES", f"ar={PIPER_MODEL},en={DATA_DIR / 'tts' / 'piper' / 'en.onnx'}")
+TTS_VOICE_BUDGET_MB  = _env_int("NABD_TTS_VOICE_BUDGET_MB", 400)  # RAM for resident voices (LRU evicted beyond)
+TTS_VOICE_MEM_FACTOR = float(_env("NABD_TTS_VOICE_MEM_FACTOR", "1.6"))  # est. RAM per MB of .onnx before measuring
+
+TTS_CACHE_DIR    = Path(_env("NABD_TTS_CACHE_DIR", str(DATA_DIR / "tts_cache")))
+TTS_CACHE_MAX_MB = _env_int("NABD_TTS_CACHE_MAX_MB", 64)
+
+CAMERA_SIZE        = tuple(int(v) for v in _env("NABD_CAMERA_SIZE", "1640x1232").lower().split("x"))  # (width, height)
+CAMERA_LORES_SIZE  = tuple(int(v) for v in _env("NABD_CAMERA_LORES_SIZE", "640x480").lower().split("x"))  # gray detection stream
+CAMERA_FPS         = float(_env("NABD_CAMERA_FPS", "10"))
+CAMERA_MAIN_HOLD_S = float(_env("NABD_CAMERA_MAIN_HOLD_S", "1.0"))  # keep full-res on this long after a request
+CAMERA_RING_SLOTS  = _env_int("NABD_CAMERA_RING_SLOTS", 4)
+CAMERA_REPLAY      = _env("NABD_CAMERA_REPLAY", "")  # video file / image dir to replay instead of the sensor
+
+QR_WIFI_PREFIXES = tuple(_env("NABD_QR_WIFI_PREFIXES", "WIFI:").split(","))
+QR_IGNORE_NO_KEY = _env_bool("NABD_QR_IGNORE_NO_KEY", True)
+
+OFFLINE_AUTOREAD           = _env_bool("NABD_OFFLINE_AUTOREAD", True)
+OFFLINE_INTERLINE_DELAY_MS = _env_int("NABD_OFFLINE_INTERLINE_MS", 0)
+LOOKAHEAD_LINES            = _env_int("NABD_LOOKAHEAD_LINES", 2)
+LOOKAHEAD_MAX_MB           = _env_int("NABD_LOOKAHEAD_MAX_MB", 8)
+
+OCR_CACHE_DIR      = Path(_env("NABD_OCR_CACHE_DIR", str(DATA_DIR / "ocr_cache")))
+OCR_CACHE_MAX_MB   = _env_int("NABD_OCR_CACHE_MAX_MB", 16)
+# Hamming distance on the 256-bit pHash; a match must also pass the line-layout check.
+# bench_vision --cache-check (48 synthetic pages): re-captures p50 34 / p95 54 bits,
+# other pages >= 68; at 40 about 2/3 of re-captures hit and no other page does
+OCR_CACHE_MAX_DIST = _env_int("NABD_OCR_CACHE_MAX_DIST", 40)
+
+NET_PROBE_TARGETS    = tuple(t.strip() for t in _env("NABD_NET_PROBE_TARGETS", "tcp:1.1.1.1:443,tcp:8.8.8.8:53,dns:1.1.1.1").split(",") if t.strip())
+NET_PROBE_INTERVAL_S = float(_env("NABD_NET_PROBE_INTERVAL_S", "5.0"))
+NET_PROBE_TIMEOUT_S  = float(_env("NABD_NET_PROBE_TIMEOUT_S", "1.0"))
+NET_STATUS_TTL_S     = float(_env("NABD_NET_STATUS_TTL_S", "10.0"))
+WIFI_SCAN_INTERVAL_S = float(_env("NABD_WIFI_SCAN_INTERVAL_S", "20.0"))
+WIFI_SCAN_TTL_S      = float(_env("NABD_WIFI_SCAN_TTL_S", "60.0"))
+
+TRACE_ENABLED = _env_bool("NABD_TRACE", False)      # span timing + correlation ids (core.tracing)
+TRACE_BUFFER  = _env_int("NABD_TRACE_BUFFER", 2048)  # last N spans kept in memory
+TRACE_SOCKET  = _env("NABD_TRACE_SOCKET", "")        # UNIX socket for live queries ("" = off)
+TRACE_FILE    = _env("NABD_TRACE_FILE", "")          # JSON dump written on shutdown ("" = off)
+
+FEATURE_QR_FIRST           = _env_bool("NABD_FEATURE_QR_FIRST", True)
+FEATURE_AUTO_SWITCH_ONLINE = _env_bool("NABD_FEATURE_AUTO_ONLINE", True)
+
@@ -1,7 +1,42 @@
-OCR_DONE = "OCR_DONE"
-OCR_EMPTY = "OCR_EMPTY"
-BTN_CAPTURE_SHORT = "BTN_CAPTURE_SHORT"
-BTN_NEXT_SHORT = "BTN_NEXT_SHORT"
-BTN_PREV_SHORT = "BTN_PREV_SHORT"
-BTN_NEXT_LONG = "BTN_NEXT_LONG"
-BTN_PREV_LONG = "BTN_PREV_LONG
+OCR_DONE = "OCR_DONE"
+OCR_EMPTY = "OCR_EMPTY"
+OCR_LINE = "OCR_LINE"  # سطر جزئي أثناء التعرّف: {"page_id", "index", "line"}
+BTN_CAPTURE_SHORT = "BTN_CAPTURE_SHORT"
+BTN_NEXT_SHORT = "BTN_NEXT_SHORT"
+BTN_PREV_SHORT = "BTN_PREV_SHORT"
+BTN_NEXT_LONG = "BTN_NEXT_LONG"
+BTN_PREV_LONG = "BTN_PREV_LONG"
+BTN_CAPTURE_LONG = "BTN_CAPTURE_LONG"
+BTN_CAPTURE_DOUBLE = "BTN_CAPTURE_DOUBLE"
+CAMERA_SHOT_OK = "CAMERA_SHOT_OK"
+VOL_CHANGED = "VOL_CHANGED"
+NET_STATUS = "NET_STATUS"
+STOP = "STOP"
+TTS_DONE = "TTS_DONE"  # انتهى تشغيل جملة (ليس عند stop): {"text", "lang"}، و"error" إن فشل توليدها
+
+# أولويات التوزيع: الرقم الأصغر يُنفَّذ أولاً (الأزرار والإيقاف قبل نتائج الـOCR)
+PRIO_HIGH = 0
+PRIO_NORMAL = 5
+PRIO_LOW = 9
+
+PRIORITY = {
+    STOP: PRIO_HIGH,
+    BTN_CAPTURE_SHORT: PRIO_HIGH,
+    BTN_CAPTURE_LONG: PRIO_HIGH,
+    BTN_CAPTURE_DOUBLE: PRIO_HIGH,
+    BTN_NEXT_SHORT: PRIO_HIGH,
+    BTN_PREV_SHORT: PRIO_HIGH,
+    BTN_NEXT_LONG: PRIO_HIGH,
+    BTN_PREV_LONG: PRIO_HIGH,
+    VOL_CHANGED: PRIO_HIGH,
+    NET_STATUS: PRIO_NORMAL,
+    CAMERA_SHOT_OK: PRIO_NORMAL,
+    TTS_DONE: PRIO_NORMAL,
+    OCR_EMPTY: PRIO_LOW,
+    OCR_LINE: PRIO_LOW,
+    OCR_DONE: PRIO_LOW,
+}
+
+
+def priority_of(event_type: str) -> int:
+    return PRIORITY.get(event_type, PRIO_NORMAL)
@@ -1,7 +1,79 @@
-import logging
-
-def setup_logging(level="INFO"):
-    logging.basicConfig(
-        level=getattr(logging, level),
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
-    )
+import atexit
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+
+from core.config import LOG_FILE, LOG_LEVEL
+
+FORMAT = "%(asctime)s [%(levelname)s] %(threadName)s %(name)s: %(message)s"
+
+_listener = None
+_lock = threading.Lock()
+
+
+class _EnqueueHandler(QueueHandler):
+    """
+    على خيط المستدعي: دمج الرسالة مع args فقط ثم وضع السجل بالطابور.
+    التنسيق الكامل (الوقت، traceback) والكتابة يتمّان على خيط الـ listener.
+    """
+    def prepare(self, record):
+        record.msg = record.getMessage()  # تثبيت القيم الآن (قد تتغيّر الكائنات لاحقاً)
+        record.args = None
+        return record
+
+
+def setup_logging(level=LOG_LEVEL, log_file=LOG_FILE, *, console=True, max_bytes=1_000_000, backups=5):
+    """
+    يُستدعى مرة واحدة عند بدء التشغيل (الاستدعاءات التالية تعدّل المستوى فقط).
+    كل logger في البرنامج يكتب إلى طابور؛ خيط واحد ينسّق ويكتب للـ console والملف،
+    فلا ينتظر أي مسار حسّاس كتابة بطاقة SD.
+    """
+    global _listener
+    lvl = level if isinstance(level, int) else getattr(logging, str(level).upper(), logging.INFO)
+    root = logging.getLogger()
+    with _lock:
+        root.setLevel(lvl)
+        if _listener is not None:
+            return root
+
+        fmt = logging.Formatter(FORMAT)
+        handlers = []
+        if console:
+            sh = logging.StreamHandler(sys.stderr)
+            sh.setFormatter(fmt)
+            handlers.append(sh)
+        if log_file:
+            try:
+                Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+                fh = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+                fh.setFormatter(fmt)
+                handlers.append(fh)
+            except OSError as e:
+                print(f"logging: cannot open {log_file} ({e}); console only", file=sys.stderr)
+
+        q = queue.SimpleQueue()
+        for h in list(root.handlers):  # مثلاً basicConfig سابق
+            root.removeHandler(h)
+        root.addHandler(_EnqueueHandler(q))
+        _listener = QueueListener(q, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+        # مكتبات كثيرة الكلام
+        logging.getLogger("cv2").setLevel(logging.ERROR)
+        logging.getLogger("pyzbar").setLevel(logging.WARNING)
+    return root
+
+
+def shutdown_logging():
+    """يفرّغ الطابور ويغلق الملفات (عند الخروج)."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for h in listener.handlers:
+            h.close()
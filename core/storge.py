@@ -1,18 +1,256 @@
-# core/storage.py
-import json
-import os
-
-class SessionStore:
-    def __init__(self, file_path="data/session.json"):
-        self.file_path = file_path
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-    def save_state(self, state: dict):
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
-
-    def load_state(self, default=None) -> dict:
-        if not os.path.exists(self.file_path):
-            return default or {}
-        with open(self.file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+# core/storage.py
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from core.config import SESSION_AUTO_SAVE_SEC, SESSION_FILE
+
+logger = logging.getLogger("SessionStore")
+
+# المفاتيح المسموحة وأنواعها
+KEYS = {
+    "mode": str,
+    "lineIndex": int,
+    "pageKey": str,   # الصفحة التي يخصّها lineIndex (page_key من الـOCR)
+    "volume": int,
+    "language": str,
+}
+
+
+def atomic_write(path, data: bytes):
+    """
+    يكتب الملف بأمان: ملف مؤقت بنفس المجلد + fsync + rename (+ fsync للمجلد)،
+    فلا يبقى ملف نصف مكتوب لو انقطعت الكهرباء.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _check(key, value):
+    kind = KEYS.get(key)
+    if kind is None:
+        raise KeyError(f"unknown session key: {key!r}")
+    if (kind is int and isinstance(value, bool)) or not isinstance(value, kind):
+        raise TypeError(f"session key {key!r} expects {kind.__name__}, got {type(value).__name__}")
+    return value
+
+
+class SessionStore:
+    """
+    مخزن الحالة الوحيد للتطبيق (mode, lineIndex, pageKey, volume, language).
+
+    - الحالة بالذاكرة تتحدث فوراً (save_state / store[key] = value).
+    - خيط خلفي يدمج التحديثات المتتالية ويضيفها كسطر JSON صغير إلى ملف journal
+      (append + fsync) بدل إعادة كتابة الملف كاملاً؛ لا تتأخر الكتابة أكثر من
+      max_delay_sec (SESSION_AUTO_SAVE_SEC) أثناء تنقّل سريع.
+    - كل compact_every سطر (وعند الإغلاق) تُكتب لقطة كاملة بشكل ذري ويُفرّغ الـ journal.
+    - عند التشغيل: اللقطة + إعادة تشغيل الـ journal؛ السطر الأخير المقطوع (انقطاع كهرباء) يُتجاهل.
+      سجلات الـ journal قيم مطلقة، فإعادة تطبيقها بعد لقطة كُتبت ولم يُفرّغ الـ journal بعدها لا تضر.
+
+    المسار من core.config.SESSION_FILE، والـ journal بجانبه (session.json.journal).
+    write_behind=False يكتب كل تحديث فوراً (متزامن).
+    """
+    def __init__(self, file_path=None, *, write_behind=True, debounce_sec=0.5,
+                 max_delay_sec=None, compact_every=256):
+        self.file_path = Path(file_path or SESSION_FILE)
+        self.journal_path = self.file_path.with_name(self.file_path.name + ".journal")
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.write_behind = write_behind
+        self.debounce_sec = debounce_sec
+        self.max_delay_sec = max_delay_sec or SESSION_AUTO_SAVE_SEC or 5.0
+        self.compact_every = compact_every
+
+        self._state = {}
+        self._pending = {}          # مفاتيح تغيّرت ولم تُكتب بعد
+        self._dirty_since = None    # وقت أول تحديث لم يُكتب
+        self._last_update = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._journal = None
+        self._records = 0
+        self.appends = 0
+        self.compactions = 0
+
+        replayed = self._recover()
+        if replayed:
+            self._compact()  # يزيل أي سطر مقطوع ويبدأ journal نظيف
+
+        self._thread = None
+        if write_behind:
+            self._thread = threading.Thread(target=self._writer, name="session-writer", daemon=True)
+            self._thread.start()
+
+    # ---------- API ----------
+    def save_state(self, state: dict):
+        """يدمج المفاتيح المعطاة في الحالة (المفاتيح غير المذكورة تبقى كما هي)."""
+        changes = {k: _check(k, v) for k, v in state.items()}
+        with self._cond:
+            changes = {k: v for k, v in changes.items() if self._state.get(k) != v}
+            if not changes:
+                return
+            self._state.update(changes)
+            self._pending.update(changes)
+            now = time.monotonic()
+            self._last_update = now
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._cond.notify()
+        if not self.write_behind:
+            self.flush()
+
+    def load_state(self, default=None) -> dict:
+        with self._cond:
+            state = dict(default or {})
+            state.update(self._state)
+            return state
+
+    def get(self, key, default=None):
+        with self._cond:
+            return self._state.get(key, default)
+
+    def __getitem__(self, key):
+        with self._cond:
+            return self._state[key]
+
+    def __setitem__(self, key, value):
+        self.save_state({key: value})
+
+    def __contains__(self, key):
+        with self._cond:
+            return key in self._state
+
+    def flush(self):
+        with self._cond:
+            if not self._pending:
+                return
+            changes, self._pending, self._dirty_since = self._pending, {}, None
+        self._append(changes)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(2.0)
+        self.flush()
+        self._compact()
+        with self._io_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    stop = close  # Supervisor lifecycle
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"keys": len(self._state), "pending": len(self._pending), "journal_records": self._records,
+                    "appends": self.appends, "compactions": self.compactions}
+
+    # ---------- internals ----------
+    def _recover(self) -> int:
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            snapshot = {}
+        except (OSError, ValueError) as e:
+            logger.warning("session snapshot unreadable, starting from journal only: %s", e)
+            snapshot = {}
+        self._apply(snapshot)
+
+        replayed = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                for raw in f:
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        logger.warning("session journal: dropping torn record after %d entries", replayed)
+                        break
+                    self._apply(record)
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        return replayed
+
+    def _apply(self, record):
+        if not isinstance(record, dict):
+            return
+        for k, v in record.items():
+            try:
+                self._state[k] = _check(k, v)
+            except (KeyError, TypeError):
+                logger.warning("session: ignoring %s=%r", k, v)
+
+    def _append(self, changes: dict):
+        line = json.dumps(changes, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._io_lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, "ab")
+            self._journal.write(line)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._records += 1
+            self.appends += 1
+            compact = self._records >= self.compact_every
+        if compact:
+            self._compact()
+
+    def _compact(self):
+        with self._io_lock:
+            # اللقطة تؤخذ تحت _io_lock فتشمل كل ما أُضيف للـ journal قبل تفريغه
+            with self._cond:
+                snapshot = dict(self._state)
+            data = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            atomic_write(self.file_path, data)
+            # اللقطة صارت على القرص؛ الآن فقط يُفرّغ الـ journal
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            with open(self.journal_path, "wb") as f:
+                os.fsync(f.fileno())
+            self._records = 0
+            self.compactions += 1
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._dirty_since is None:
+                        self._cond.wait()
+                        continue
+                    now = time.monotonic()
+                    due = min(self._last_update + self.debounce_sec, self._dirty_since + self.max_delay_sec)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+                if self._closed:
+                    return
+                changes, self._pending, self._dirty_since = self._pending, {}, None
+            # الكتابة خارج القفل: save_state لا ينتظر القرص أبداً
+            try:
+                self._append(changes)
+            except OSError as e:
+                logger.warning("session write failed: %s", e)
+                with self._cond:
+                    self._pending = {**changes, **self._pending}
+                    if self._dirty_since is None:
+                        self._dirty_since = self._last_update = time.monotonic()
+                    self._cond.wait(self.max_delay_sec)
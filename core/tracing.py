@@ -0,0 +1,329 @@
+# core/tracing.py
+"""
+تتبّع زمن خط المعالجة: زر ← كاميرا ← QR ← OCR ← صوت.
+
+- span(name): يقيس مقطعاً ويضيفه إلى histogram باسمه وإلى ring buffer لآخر المقاطع.
+- correlation(): رقم تتبّع (cid) لكل التقاطة؛ يمر عبر contextvars، والـ EventBus ينقله
+  مع الحدث إلى خيط المشترك، و bind() ينقله إلى خيط جديد.
+- mark(name): الزمن من بداية الـ cid حتى الآن (مرة واحدة لكل cid)، مثلاً أول صوت مسموع.
+- snapshot()/dump(path) أو TraceServer على UNIX socket للاستعلام أثناء التشغيل:
+      python -m core.tracing /run/nabd-trace.sock stats|spans [n]|reset
+
+عند التعطيل (NABD_TRACE=0، الافتراضي) span() ترجع كائناً ثابتاً لا يفعل شيئاً،
+و traced/bind يستدعيان الدالة مباشرة: قراءة متغير واحد لكل نقطة قياس.
+"""
+import bisect
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functools import wraps
+
+from core.config import TRACE_BUFFER, TRACE_ENABLED, TRACE_FILE, TRACE_SOCKET
+
+logger = logging.getLogger(__name__)
+
+enabled = TRACE_ENABLED  # اقرأها دائماً كـ tracing.enabled (لا تنسخها بـ from-import)
+
+# حدود الـ buckets بالميلي ثانية
+BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+             1000, 2500, 5000, 10000, 30000)
+
+_cid = contextvars.ContextVar("trace_cid", default=None)
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_spans = deque(maxlen=TRACE_BUFFER)
+_hist = {}
+_starts = OrderedDict()  # cid -> [t0, marks]; محدود بحجم الـ buffer
+
+
+class Histogram:
+    __slots__ = ("counts", "n", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS_MS) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BOUNDS_MS, ms)] += 1
+        self.n += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q):
+        """الحد الأعلى للـ bucket الذي يقع فيه الـ quantile (تقدير محافظ)."""
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank and c:
+                return min(BOUNDS_MS[i], self.max) if i < len(BOUNDS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.n, "mean_ms": round(self.total / self.n, 3) if self.n else 0.0,
+                "p50_ms": round(self.quantile(0.5), 3), "p95_ms": round(self.quantile(0.95), 3),
+                "p99_ms": round(self.quantile(0.99), 3),
+                "max_ms": round(self.max, 3),
+                "buckets": {str(b): c for b, c in zip(BOUNDS_MS + ("inf",), self.counts) if c}}
+
+
+# ---------- spans ----------
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "t0")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _record(self.name, self.t0, time.perf_counter(), self.attrs, exc_type is not None)
+        return False
+
+
+def span(name, **attrs):
+    if not enabled:
+        return _NOOP
+    return _Span(name, attrs)
+
+
+def traced(name):
+    """Decorator: يقيس كل استدعاء كـ span باسم name."""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            failed = True
+            try:
+                out = fn(*args, **kwargs)
+                failed = False
+                return out
+            finally:
+                _record(name, t0, time.perf_counter(), None, failed)
+        return wrapper
+    return deco
+
+
+def _record(name, t0, t1, attrs, error=False):
+    ms = (t1 - t0) * 1000.0
+    rec = {"name": name, "cid": _cid.get(), "t": round(t0, 6), "ms": round(ms, 3),
+           "thread": threading.current_thread().name}
+    if attrs:
+        rec["attrs"] = attrs
+    if error:
+        rec["error"] = True
+    with _lock:
+        _spans.append(rec)
+        h = _hist.get(name)
+        if h is None:
+            h = _hist[name] = Histogram()
+        h.add(ms)
+
+
+# ---------- correlation ----------
+def current():
+    return _cid.get()
+
+
+@contextmanager
+def correlation(cid=None, prefix="cap"):
+    """يبدأ cid جديداً (أو يكمل cid معطى) لكل ما يجري داخل with وما يُرسل منه."""
+    if not enabled:
+        yield None
+        return
+    cid = cid or f"{prefix}-{next(_ids):06d}"
+    with _lock:
+        if cid not in _starts:
+            _starts[cid] = [time.perf_counter(), set()]
+            while len(_starts) > _spans.maxlen:
+                _starts.popitem(last=False)
+    token = _cid.set(cid)
+    try:
+        yield cid
+    finally:
+        _cid.reset(token)
+
+
+def attach(cid):
+    """للخيوط العاملة (EventBus): يضبط cid ويرجع token لـ detach."""
+    return _cid.set(cid)
+
+
+def detach(token):
+    _cid.reset(token)
+
+
+def bind(fn):
+    """يرجع fn تعمل بسياق التتبّع الحالي (لخيط جديد)."""
+    if not enabled:
+        return fn
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.run(fn, *args, **kwargs)
+    return run
+
+
+def mark(name):
+    """الزمن من بداية الـ cid الحالي حتى الآن، كـ span باسم e2e.<name> (أول مرة فقط لكل cid)."""
+    if not enabled:
+        return
+    cid = _cid.get()
+    if cid is None:
+        return
+    with _lock:
+        entry = _starts.get(cid)
+        if entry is None or name in entry[1]:
+            return
+        entry[1].add(name)
+        t0 = entry[0]
+    _record(f"e2e.{name}", t0, time.perf_counter(), None)
+
+
+# ---------- export ----------
+def snapshot(limit=None):
+    with _lock:
+        spans = list(_spans)
+        hist = {k: h.to_dict() for k, h in sorted(_hist.items())}
+    if limit is not None:
+        spans = spans[-limit:] if limit > 0 else []
+    return {"enabled": enabled, "histograms": hist, "spans": spans}
+
+
+def dump(path):
+    data = json.dumps(snapshot(), ensure_ascii=False, indent=1)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _hist.clear()
+        _starts.clear()
+
+
+def enable(on=True):
+    global enabled
+    enabled = bool(on)
+
+
+def _answer(cmd):
+    parts = cmd.split()
+    op = parts[0] if parts else "stats"
+    if op == "stats":
+        return {"enabled": enabled, "histograms": snapshot(0)["histograms"]}
+    if op == "spans":
+        return snapshot(int(parts[1]) if len(parts) > 1 else 100)
+    if op == "reset":
+        reset()
+        return {"ok": True}
+    return {"error": f"unknown command {op!r} (stats | spans [n] | reset)"}
+
+
+class TraceServer:
+    """
+    خدمة للـ Supervisor: تجيب على UNIX socket (سطر أمر ← JSON) وتكتب dump عند الإيقاف.
+    """
+    def __init__(self, socket_path=TRACE_SOCKET, dump_path=TRACE_FILE):
+        self.socket_path = socket_path
+        self.dump_path = dump_path
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        if not enabled or not self.socket_path:
+            return
+        import socket
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen(2)
+        self._thread = threading.Thread(target=self._serve, name="trace-server", daemon=True)
+        self._thread.start()
+        logger.info("trace server on %s", self.socket_path)
+
+    def stop(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        if enabled and self.dump_path:
+            try:
+                dump(self.dump_path)
+            except OSError as e:
+                logger.warning("trace dump failed: %s", e)
+
+    def _serve(self):
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.settimeout(1.0)
+                    cmd = conn.recv(256).decode("utf-8", "ignore").strip()
+                    conn.sendall(json.dumps(_answer(cmd), ensure_ascii=False).encode("utf-8") + b"\n")
+                except OSError:
+                    pass
+
+
+def query(socket_path, cmd="stats"):
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(socket_path)
+        s.sendall(cmd.encode("utf-8") + b"\n")
+        s.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            b = s.recv(65536)
+            if not b:
+                break
+            chunks.append(b)
+    return json.loads(b"".join(chunks))
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        raise SystemExit("usage: python -m core.tracing SOCKET [stats | spans N | reset]")
+    print(json.dumps(query(sys.argv[1], " ".join(sys.argv[2:]) or "stats"), ensure_ascii=False, indent=1))
@@ -1,72 +1,108 @@
-import logging
-from core.bus import EventBus
-from core.config import APP_NAME
-from core.events import BTN_CAPTURE_SHORT
-from core.storge import SessionStore
-from mode.mode_manger import ModeManager
-from services.beep_service import BeepService
-from services.camera import Camera
-from services.vision.qr_detector import classify_frame
-from connectivity.network import handle_frame
-from mode.online import Online
-from mode.offline import Offline
-  
-
-
-def main():
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(APP_NAME)
-    logger.info("Starting AI Reader System")
-
-    bus = EventBus()
-    session_store = SessionStore()
-    mode_manager = ModeManager()
-
-    camera = Camera(bus)
-    vision = VisionService(bus)
-    audio = BeepService(bus)
-
-    logger.info("Checking network mode via QR...")
-    first_frame = camera.capture()
-
-    if first_frame is not None:
-        qr_result = handle_frame(first_frame)
-        if qr_result and qr_result.get("network_ok"):
-            logger.info("Network detected → Switching to ONLINE mode")
-            mode_manager.set_mode(True)
-        else:
-            logger.info("No network detected → Switching to OFFLINE mode")
-            mode_manager.set_mode(False)
-    else:
-        logger.warning("No frame captured, defaulting to OFFLINE mode")
-        mode_manager.set_mode(False)
-
-    if mode_manager.get_mode():
-        orchestrator = OnlineOrchestrator(bus, session_store)
-    else:
-        orchestrator = OfflineOrchestrator(bus, session_store)
-
-    def on_capture(_):
-        logger.info("Capture button pressed - taking image")
-        frame = camera.capture()
-        if frame is not None:
-            result = handle_frame(frame)
-            logger.info(f"Frame processed, result: {result}")
-            orchestrator.on_frame_result(result)
-
-    bus.subscribe(BTN_CAPTURE_SHORT, on_capture)
-
-    logger.info("System ready - waiting for events")
-
-    try:
-        while True:
-            pass
-    except KeyboardInterrupt:
-        logger.info("Shutting down system...")
-
-if __name__ == "__main__":
-    main()
-
-
-
-
+import functools
+import logging
+from core.bus import EventBus
+from core.config import APP_NAME, DEFAULT_LANG, READY_PROMPT
+from core.logger import setup_logging, shutdown_logging
+from core.tracing import TraceServer
+from core.events import BTN_CAPTURE_SHORT, VOL_CHANGED
+from core.storge import SessionStore
+from mode.mode_manger import ModeManager
+from services.audio.tts_manager import create_tts
+from services.audio.output_service import OutputService
+from services.io.buttons import Buttons
+from connectivity.monitor import shared_monitor
+from connectivity.network import handle_frame
+from connectivity.wifi_scan import shared_scanner
+from mode.online import OnlineOrchestrator
+from mode.offline import OfflineOrchestrator
+from runners.preload import Preloader
+from runners.supervisor import Supervisor
+from runners.workers import vision_pool
+# vision (numpy/cv2/pyzbar) و الكاميرا تُحمَّل بعد رسالة الجاهزية: runners.preload
+
+
+
+def main():
+    setup_logging()  # مرة واحدة: LOG_LEVEL / LOG_FILE من core.config
+    logger = logging.getLogger(APP_NAME)
+    logger.info("Starting AI Reader System")
+
+    bus = EventBus(threaded=True)
+    supervisor = Supervisor(bus)
+    session_store = SessionStore()
+
+    tts = create_tts(bus)
+    audio = OutputService(tts)
+    buttons = Buttons(bus)
+    net_monitor = shared_monitor(bus)
+    wifi_scanner = shared_scanner()
+
+    offline = OfflineOrchestrator(bus, tts, session_store)
+    online = OnlineOrchestrator(bus)
+    mode_manager = ModeManager(bus, offline, online, is_online_provider=net_monitor.is_online)
+
+    def say(text):
+        tts.speak(text, DEFAULT_LANG)
+
+    def tone_service():
+        from services.audio.tones import shared_bank
+        return shared_bank()
+
+    def camera_service():
+        from services.camera.camera import shared_camera
+        return shared_camera(bus)
+
+    @functools.lru_cache(maxsize=None)
+    def ocr_service():
+        from services.vision.ocr import OCRService
+        from services.vision.ocr_cache import OCRCache
+        return OCRService(bus, cache=OCRCache())
+
+    def on_capture(_):
+        from services.vision.frame import Frame
+        from services.vision.qr_detector import classify_burst
+
+        logger.info("Capture button pressed - taking image")
+        camera = camera_service()
+        # Frame: the sharpest frame is classified in-process, so the views its QR pass
+        # built (gray at least) are reused by OCR; pool workers only handle the others
+        frames = [Frame(f) for f in camera.capture_burst()]
+        if frames:
+            best = classify_burst(frames, pool=vision_pool())
+            result = handle_frame(frames[best.index], decision=best.decision, say=say)
+            logger.info(f"Frame processed, result: {result.kind}")
+            if result.kind == "ocr":
+                ocr_service().recognize(frames[best.index])
+            return
+        frame = camera.capture()
+        # the stub camera returns placeholder dicts; only real frames go through QR routing
+        if frame is not None and hasattr(frame, "shape"):
+            result = handle_frame(frame, say=say)
+            logger.info(f"Frame processed, result: {result.kind}")
+
+    bus.subscribe(BTN_CAPTURE_SHORT, on_capture)
+    bus.subscribe(VOL_CHANGED, lambda data: audio.set_volume((data or {}).get("level", 1.0)))
+
+    supervisor.add_service("session", session_store)  # stopped last: flushes pending state
+    supervisor.add_service("audio", audio)
+    supervisor.add_service("preload", Preloader(  # ready prompt, then vision imports + camera in the background
+        on_ready=(lambda: say(READY_PROMPT)) if READY_PROMPT else None,
+        services=[("tones", tone_service), ("camera", camera_service), ("ocr", ocr_service)]))
+    supervisor.add_service("network", net_monitor)  # emits NET_STATUS -> ModeManager
+    supervisor.add_service("wifi_scan", wifi_scanner)
+    supervisor.add_service("mode", mode_manager)
+    supervisor.add_service("trace", TraceServer())  # no-op unless NABD_TRACE + NABD_TRACE_SOCKET/FILE
+    supervisor.add_task("buttons", buttons.console_loop)
+
+    logger.info("System ready - waiting for events")
+    code = supervisor.run_forever()
+    logger.info("Shutting down system...")
+    shutdown_logging()
+    return code
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
+
+
+
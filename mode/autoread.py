@@ -0,0 +1,81 @@
+from __future__ import annotations
+"""
+Auto-read: advance through a page one line per TTS_DONE, without blocking the bus.
+
+The orchestrator plays a line and returns. When TTS_DONE arrives for that line it
+calls line_done(); the scheduler then calls advance() after the inter-line delay,
+on a threading.Timer (delay 0: right away, on the caller's thread). Nothing sleeps
+or loops, so every button press is handled as soon as the bus delivers it.
+
+Every handler that touches the page calls interrupt() (skip: drop the pending step,
+keep reading from wherever the handler moves) or cancel() (pause / new mode: stop
+auto-reading). Both bump a token, so a timer that already fired but has not yet
+taken the lock finds itself stale and does nothing.
+
+The orchestrator's lock is shared: advance() always runs under it, like the bus
+handlers, so the page state has a single writer at a time.
+"""
+
+import logging, threading
+from typing import Callable, Optional
+
+from core.config import OFFLINE_AUTOREAD, OFFLINE_INTERLINE_DELAY_MS
+
+logger = logging.getLogger(__name__)
+
+class AutoReader:
+    def __init__(self, advance: Callable[[], None], *, lock=None, enabled: bool = OFFLINE_AUTOREAD,
+                 delay_ms: int = OFFLINE_INTERLINE_DELAY_MS):
+        self.advance = advance  # plays the next line (or ends the page) under self.lock
+        self.lock = lock if lock is not None else threading.RLock()
+        self.enabled = enabled
+        self.delay_s = max(0, delay_ms) / 1000.0
+        self.active = False
+        self._token = 0
+        self._timer: Optional[threading.Timer] = None
+
+    def start(self) -> None:
+        """Read on from the current line (new page / resume)."""
+        with self.lock:
+            self._cancel_timer()
+            self.active = self.enabled
+
+    def interrupt(self) -> None:
+        """A button moved the reader: forget the pending step, stay in auto mode."""
+        with self.lock:
+            self._cancel_timer()
+
+    def cancel(self) -> None:
+        with self.lock:
+            self._cancel_timer()
+            self.active = False
+
+    def line_done(self) -> None:
+        """The current line finished playing (TTS_DONE for it)."""
+        with self.lock:
+            if not self.active:
+                return
+            self._cancel_timer()
+            if not self.delay_s:
+                self._step(self._token)
+                return
+            t = self._timer = threading.Timer(self.delay_s, self._step, args=(self._token,))
+            t.name, t.daemon = "autoread", True
+            t.start()
+
+    # ---------- internals ----------
+    def _cancel_timer(self) -> None:
+        self._token += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _step(self, token: int) -> None:
+        with self.lock:
+            if token != self._token or not self.active:
+                return  # a button got here first
+            self._timer = None
+            try:
+                self.advance()
+            except Exception as e:
+                logger.error("auto-read advance failed: %s", e)
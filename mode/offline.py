@@ -1,123 +1,247 @@
-
-from typing import List, Optional
-from core import events as E
-
-class OfflineOrchestrator:
-    """
-    Offline بسيط: يلتقط → يستقبل OCR_DONE(lines) → يقرأ السطر الحالي
-    يفترض وجود:
-      - bus: EventBus بنمطك الحالي (subscribe/emit)
-      - tts: كائن يوفر speak(text) و stop()
-      - session_store: يوفر save_state(dict) و load_state(default)
-    """
-    def __init__(self, bus, tts, session_store):
-        self.bus = bus
-        self.tts = tts
-        self.session_store = session_store
-
-        self.lines: List[str] = []
-        self.line_index: int = 0
-        self.paused: bool = False
-        self._started: bool = False
-
-    def name(self) -> str:
-        return "offline"
-
-    # ---------- lifecycle ----------
-    def start(self):
-        if self._started:
-            return
-        self._started = True
-
-        # استرجاع آخر حالة
-        state = self.session_store.load_state(default={"lineIndex": 0})
-        self.line_index = int(state.get("lineIndex", 0))
-
-        # اشتراكات للأزرار/الـOCR
-        self.bus.subscribe(E.BTN_CAPTURE_SHORT, self._on_capture)
-        self.bus.subscribe(E.BTN_NEXT_SHORT, self._on_next)
-        self.bus.subscribe(E.BTN_PREV_SHORT, self._on_prev)
-        self.bus.subscribe(E.BTN_NEXT_LONG, self._on_resume)
-        self.bus.subscribe(E.BTN_PREV_LONG, self._on_pause)
-
-        self.bus.subscribe(E.OCR_DONE, self._on_ocr_done)
-        self.bus.subscribe(E.OCR_EMPTY, self._on_ocr_empty)
-
-        # ممكن تعلن الحالة بالعربي
-        # self._speak("الوضع أوفلاين جاهز")
-
-    def stop(self):
-        # تنظيف بسيط (اختياري)
-        self._started = False
-        try:
-            self.tts.stop()
-        except Exception:
-            pass
-
-    # ---------- events ----------
-    def _on_capture(self, _data=None):
-        if self.paused:
-            return
-        # هون بتعمل تريغر للالتقاط/الـOCR حسب نظامك
-        # ممكن ترسل حدث للكاميرا أو للسيرفر؛ حالياً بس إعلان:
-        # print("[Offline] capture requested")
-
-    def _on_ocr_done(self, data):
-        # توقع data: {"lines": List[str]}
-        lines = (data or {}).get("lines") or []
-        if not lines:
-            return
-        self.lines = lines
-        self.line_index = min(self.line_index, len(self.lines) - 1) if self.lines else 0
-        self._read_current_line()
-        self._save_state()
-
-    def _on_ocr_empty(self, _data=None):
-        # self._speak("ما في نص مقروء")
-        pass
-
-    def _on_next(self, _data=None):
-        if not self.lines or self.paused:
-            return
-        if self.line_index < len(self.lines) - 1:
-            self.line_index += 1
-            self._read_current_line()
-            self._save_state()
-
-    def _on_prev(self, _data=None):
-        if not self.lines or self.paused:
-            return
-        if self.line_index > 0:
-            self.line_index -= 1
-            self._read_current_line()
-            self._save_state()
-
-    def _on_pause(self, _data=None):
-        self.paused = True
-        try:
-            self.tts.stop()
-        except Exception:
-            pass
-        # self._speak("توقفت القراءة")
-
-    def _on_resume(self, _data=None):
-        self.paused = False
-        # self._speak("استئناف")
-        self._read_current_line()
-
-    # ---------- helpers ----------
-    def _read_current_line(self):
-        if not self.lines or self.paused:
-            return
-        line = self.lines[self.line_index]
-        try:
-            self.tts.speak(line)
-        except Exception as e:
-            print("[Offline] TTS error:", e)
-
-    def _save_state(self):
-        try:
-            self.session_store.save_state({"mode": "Offline", "lineIndex": self.line_index})
-        except Exception:
-            pass
-
+
+import logging
+import threading
+from typing import List, Optional
+from core import events as E
+from mode.autoread import AutoReader
+from services.audio.lookahead import LookaheadReader
+
+logger = logging.getLogger(__name__)
+
+class OfflineOrchestrator:
+    """
+    Offline بسيط: يلتقط → يستقبل OCR_LINE/OCR_DONE(lines) → يقرأ السطر الحالي
+    (يبدأ بالسطر الحالي فور وصوله عبر OCR_LINE دون انتظار الصفحة كاملة)
+    ثم يتقدّم سطراً سطراً مع كل TTS_DONE (AutoReader: مؤقّت بدل sleep/حلقة)،
+    وأي زر يلغي الخطوة المعلّقة فوراً.
+    يفترض وجود:
+      - bus: EventBus بنمطك الحالي (subscribe/emit)
+      - tts: كائن يوفر speak(text, lang) و stop()
+      - session_store: يوفر save_state(dict) و load_state(default)
+    """
+    def __init__(self, bus, tts, session_store):
+        self.bus = bus
+        self.tts = tts
+        self.session_store = session_store
+
+        self.lines: List[dict] = []
+        self.line_index: int = 0
+        self._page_id = None  # الصفحة التي تصل أسطرها تدريجياً (OCR_LINE)
+        self._page_key: Optional[str] = None  # بصمة الصفحة من الـOCR (ثابتة لنفس الصفحة بين الالتقاطات)
+        # يجهّز صوت الأسطر المجاورة مسبقاً (next/prev بدون انتظار التوليد)
+        self.reader = LookaheadReader(tts)
+        self.paused: bool = False
+        self._started: bool = False
+        self._streaming: bool = False  # وصلت أسطر بـOCR_LINE ولم يصل OCR_DONE بعد
+        self._awaiting: bool = False   # القراءة التلقائية سبقت آخر سطر وصل؛ تكمل عند وصول التالي
+        # المعالجات + مؤقّت القراءة التلقائية يكتبون الحالة تحت نفس القفل
+        self._lock = threading.RLock()
+        self.autoread = AutoReader(self._advance, lock=self._lock)
+
+        # اشتراكات للأزرار/الـOCR مرة واحدة: ModeManager يستدعي start()/stop() مع كل تبدّل للشبكة،
+        # والمعالجات تتجاهل الأحداث والوضع متوقف
+        self.bus.subscribe(E.BTN_CAPTURE_SHORT, self._on_capture)
+        self.bus.subscribe(E.BTN_NEXT_SHORT, self._on_next)
+        self.bus.subscribe(E.BTN_PREV_SHORT, self._on_prev)
+        self.bus.subscribe(E.BTN_NEXT_LONG, self._on_resume)
+        self.bus.subscribe(E.BTN_PREV_LONG, self._on_pause)
+
+        self.bus.subscribe(E.OCR_LINE, self._on_ocr_line)
+        self.bus.subscribe(E.OCR_DONE, self._on_ocr_done)
+        self.bus.subscribe(E.OCR_EMPTY, self._on_ocr_empty)
+        self.bus.subscribe(E.TTS_DONE, self._on_tts_done)
+
+    def name(self) -> str:
+        return "offline"
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+
+        # آخر حالة محفوظة (lineIndex + pageKey) تُستعمل فقط عند إعادة التقاط نفس الصفحة: _begin_page
+        # ممكن تعلن الحالة بالعربي
+        # self._speak("الوضع أوفلاين جاهز")
+
+    def stop(self):
+        # تنظيف بسيط (اختياري)
+        with self._lock:
+            self._started = False
+            self.autoread.cancel()
+        self.reader.pause()
+        try:
+            self.tts.stop()
+        except Exception:
+            pass
+
+    # ---------- events ----------
+    def _on_capture(self, _data=None):
+        if not self._started or self.paused:
+            return
+        self.autoread.cancel()  # صفحة جديدة قادمة؛ تبدأ قراءتها التلقائية مع أول سطر
+        # هون بتعمل تريغر للالتقاط/الـOCR حسب نظامك
+        # ممكن ترسل حدث للكاميرا أو للسيرفر؛ حالياً بس إعلان:
+        # print("[Offline] capture requested")
+
+    def _on_ocr_line(self, data):
+        # سطر جزئي: نبدأ القراءة فور وصول السطر الحالي بدون انتظار الصفحة كاملة
+        data = data or {}
+        page_id = data.get("page_id")
+        with self._lock:
+            if not self._started:
+                return
+            if page_id != self._page_id:
+                self._page_id = page_id
+                self.lines = []
+                self._streaming = True
+                self._begin_page(data.get("page_key"))
+            if data.get("index") != len(self.lines):
+                return  # سطر خارج الترتيب (أُسقط ما قبله)؛ OCR_DONE سيكمل القائمة
+            self.lines.append(data.get("line"))
+            self.reader.set_lines([self._line_text(l) for l in self.lines])
+            if len(self.lines) - 1 == self.line_index:
+                self._awaiting = False
+                self._read_current_line()
+                self._save_state()
+
+    def _on_ocr_done(self, data):
+        # توقع data: {"lines": List[dict|str], "page_id"?}
+        data = data or {}
+        lines = data.get("lines") or []
+        if not lines:
+            return
+        with self._lock:
+            if not self._started:
+                return
+            streamed = data.get("page_id") is not None and data.get("page_id") == self._page_id
+            already_read = streamed and self.line_index < len(self.lines)
+            ended = streamed and self._awaiting and self.line_index >= len(lines)
+            self._page_id = data.get("page_id")
+            self._streaming = self._awaiting = False
+            self.lines = lines
+            self.reader.set_lines([self._line_text(l) for l in self.lines])
+            self.line_index = min(self.line_index, len(self.lines) - 1) if self.lines else 0
+            if ended:
+                self.autoread.cancel()  # القراءة التلقائية أنهت آخر سطر في الصفحة
+                self._save_state()
+                return
+            if already_read:
+                return  # السطر الحالي قُرئ عند وصوله عبر OCR_LINE
+            if not streamed:
+                self._begin_page(data.get("page_key"))
+            self._read_current_line()
+            self._save_state()
+
+    def _on_ocr_empty(self, _data=None):
+        # self._speak("ما في نص مقروء")
+        pass
+
+    def _on_tts_done(self, data):
+        # نهاية تشغيل السطر الحالي (وليس رسالة أخرى كالجاهزية) -> الخطوة التالية بعد المهلة
+        text = (data or {}).get("text")
+        with self._lock:
+            if not self._started or self.paused or not 0 <= self.line_index < len(self.lines):
+                return
+            if text == self._line_text(self.lines[self.line_index])[0]:
+                self.autoread.line_done()
+
+    def _on_next(self, _data=None):
+        with self._lock:
+            if not self._started:
+                return
+            self.autoread.interrupt()
+            if not self.lines or self.paused:
+                return
+            if self.line_index < len(self.lines) - 1:
+                self.line_index += 1
+                self._awaiting = False
+                self._read_current_line()
+                self._save_state()
+
+    def _on_prev(self, _data=None):
+        with self._lock:
+            if not self._started:
+                return
+            self.autoread.interrupt()
+            if not self.lines or self.paused:
+                return
+            if self.line_index > 0:
+                self.line_index -= 1
+                self._awaiting = False
+                self._read_current_line()
+                self._save_state()
+
+    def _on_pause(self, _data=None):
+        with self._lock:
+            if not self._started:
+                return
+            self.paused = True
+            self.autoread.cancel()
+            self.reader.pause()
+            try:
+                self.tts.stop()
+            except Exception:
+                pass
+        # self._speak("توقفت القراءة")
+
+    def _on_resume(self, _data=None):
+        with self._lock:
+            if not self._started:
+                return
+            self.paused = False
+            # self._speak("استئناف")
+            self.autoread.start()
+            self._read_current_line()
+
+    def _advance(self):
+        # يستدعيه AutoReader تحت القفل بعد TTS_DONE + OFFLINE_INTERLINE_DELAY_MS
+        if self.line_index < len(self.lines) - 1:
+            self.line_index += 1
+            self._read_current_line()
+            self._save_state()
+        elif self._streaming:
+            # السطر التالي لم يصل بعد: _on_ocr_line يقرؤه فور وصوله
+            self.line_index = len(self.lines)
+            self._awaiting = True
+        else:
+            self.autoread.cancel()  # نهاية الصفحة
+
+    # ---------- helpers ----------
+    def _begin_page(self, page_key: Optional[str] = None):
+        # صفحة جديدة: من أول سطر (المؤشر من الصفحة السابقة لا يخصّها)، إلا إذا كانت
+        # نفس الصفحة المحفوظة بالجلسة فنكمل من حيث توقّفنا؛ ثم القراءة التلقائية
+        self._page_key = page_key
+        self.line_index = 0
+        if page_key:
+            state = self.session_store.load_state(default={})
+            if state.get("pageKey") == page_key:
+                self.line_index = max(0, int(state.get("lineIndex", 0)))
+                if self.lines:  # OCR_DONE بدون بث: القائمة كاملة
+                    self.line_index = min(self.line_index, len(self.lines) - 1)
+        self._awaiting = False
+        if not self.paused:
+            self.autoread.start()
+
+    def _read_current_line(self):
+        if not self.lines or self.paused:
+            return
+        try:
+            self.reader.play(self.line_index)
+        except Exception as e:
+            logger.error("TTS error: %s", e)
+
+    @staticmethod
+    def _line_text(line):
+        # الأسطر من الـOCR: {"id", "text", "lang"}؛ ونقبل نصاً خاماً أيضاً
+        if isinstance(line, dict):
+            return line.get("text", ""), line.get("lang") or "ar"
+        return str(line), "ar"
+
+    def _save_state(self):
+        try:
+            self.session_store.save_state({"mode": "Offline", "lineIndex": self.line_index,
+                                           "pageKey": self._page_key or ""})
+        except Exception:
+            pass
+
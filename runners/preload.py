@@ -0,0 +1,89 @@
+from __future__ import annotations
+"""
+Boot in two phases: speak first, then load the heavy modules in the background.
+
+main.py only imports what the bus, session, audio and network need. The vision
+stack (numpy, cv2, pyzbar, the camera ring) costs most of the import time on a Pi,
+so a Preloader service placed right after audio:
+  1. says the ready prompt (callback, returns immediately: TTS plays on its own thread),
+  2. imports MODULES on a daemon thread, timing each one,
+  3. then builds and starts the services that need them (e.g. the camera).
+
+A button press during preloading is still handled: the handler's own lazy
+imports wait on the import lock for the module being loaded.
+"""
+
+import importlib, logging, threading, time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODULES = (
+    "numpy", "cv2",
+    "services.vision.qr_detector", "services.vision.ocr", "services.vision.ocr_cache",
+    "services.camera.camera", "concurrent.futures.process",
+)
+
+class Preloader:
+    def __init__(self, *, on_ready: Optional[Callable[[], None]] = None, modules: Sequence[str] = MODULES,
+                 services: Sequence[Tuple[str, Callable[[], Any]]] = ()):
+        self.on_ready = on_ready
+        self.modules = tuple(modules)
+        self.services = list(services)  # (name, factory) built and started after the imports
+        self.timings_ms: Dict[str, float] = {}
+        self._started: List[Tuple[str, Any]] = []
+        self._done = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.on_ready is not None:
+            try:
+                self.on_ready()
+            except Exception:
+                logger.exception("ready prompt failed")
+        self._stop.clear(); self._done.clear()
+        self._thread = threading.Thread(target=self._run, name="preload", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        for name, svc in reversed(self._started):
+            stop = getattr(svc, "stop", None)
+            if callable(stop):
+                try: stop()
+                except Exception: logger.exception("service_stop_failed %s", name)
+        self._started.clear()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """True once every module is imported and the deferred services are started."""
+        return self._done.wait(timeout)
+
+    def _run(self) -> None:
+        t0 = time.perf_counter()
+        for mod in self.modules:
+            if self._stop.is_set():
+                return
+            t = time.perf_counter()
+            try:
+                importlib.import_module(mod)
+            except Exception as e:  # optional pieces (e.g. pyzbar without libzbar) fail later, where used
+                logger.warning("preload %s failed: %s", mod, e)
+            self.timings_ms[mod] = round((time.perf_counter() - t) * 1000.0, 1)
+        for name, factory in self.services:
+            if self._stop.is_set():
+                return
+            try:
+                svc = factory()
+                start = getattr(svc, "start", None)
+                if callable(start):
+                    logger.info("service_start %s (deferred)", name)
+                    start()
+                self._started.append((name, svc))
+            except Exception:
+                logger.exception("deferred service %s failed to start", name)
+        logger.info("preload_done in %.0f ms %s", (time.perf_counter() - t0) * 1000.0, self.timings_ms)
+        self._done.set()
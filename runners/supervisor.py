@@ -0,0 +1,152 @@
+from __future__ import annotations
+"""
+Process runtime: one asyncio loop that owns the services' lifecycle.
+
+- Services with start()/stop() are started in order and stopped in reverse.
+- Managed tasks are either coroutines `async def fn(stop: asyncio.Event)` or
+  blocking callables `def fn(stop: threading.Event)` run on a worker thread.
+  A task that raises is restarted with exponential backoff.
+- SIGINT/SIGTERM trigger a clean shutdown; while waiting the loop sleeps in
+  the selector, so the process idles at ~0% CPU instead of spinning.
+"""
+
+import asyncio, logging, signal, threading, time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TaskTarget = Union[Callable[[asyncio.Event], Awaitable[Any]], Callable[[threading.Event], Any]]
+
+@dataclass
+class _Managed:
+    name: str
+    target: TaskTarget
+    restart: bool = True
+    restarts: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+class Supervisor:
+    def __init__(self, bus: Any = None, *, restart_delay_s: float = 1.0,
+                 max_restart_delay_s: float = 30.0, stop_timeout_s: float = 3.0):
+        self.bus = bus
+        self.restart_delay_s = restart_delay_s
+        self.max_restart_delay_s = max_restart_delay_s
+        self.stop_timeout_s = stop_timeout_s
+        self._services: List[tuple[str, Any]] = []
+        self._tasks: List[_Managed] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._thread_stop = threading.Event()  # mirrors _stop for thread-run tasks
+
+    # ---------- registration ----------
+    def add_service(self, name: str, service: Any) -> Any:
+        """Register an object with optional start()/stop() methods."""
+        self._services.append((name, service))
+        return service
+
+    def add_task(self, name: str, target: TaskTarget, *, restart: bool = True) -> None:
+        self._tasks.append(_Managed(name, target, restart))
+
+    # ---------- thread-safe entry points ----------
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    def call_soon(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Schedule fn(*args) on the runtime loop from any thread."""
+        if self._loop is None or self._loop.is_closed():
+            raise RuntimeError("supervisor loop is not running")
+        self._loop.call_soon_threadsafe(fn, *args)
+
+    def request_stop(self) -> None:
+        self._thread_stop.set()
+        if self._loop is not None and self._stop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    # ---------- run ----------
+    def run_forever(self) -> int:
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:  # signal handlers unavailable (e.g. non-main thread)
+            pass
+        return 0
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._thread_stop.clear()
+        self._install_signals()
+
+        started: List[tuple[str, Any]] = []
+        try:
+            for name, svc in self._services:
+                start = getattr(svc, "start", None)
+                if callable(start):
+                    logger.info("service_start %s", name)
+                    start()
+                started.append((name, svc))
+
+            for m in self._tasks:
+                m.task = asyncio.create_task(self._supervise(m), name=m.name)
+
+            logger.info("runtime_ready services=%d tasks=%d", len(started), len(self._tasks))
+            await self._stop.wait()
+        finally:
+            logger.info("runtime_stopping")
+            self._thread_stop.set()
+            await self._cancel_tasks()
+            for name, svc in reversed(started):
+                stop = getattr(svc, "stop", None)
+                if not callable(stop):
+                    continue
+                try:
+                    stop()
+                except Exception:
+                    logger.exception("service_stop_failed %s", name)
+            close = getattr(self.bus, "close", None)
+            if callable(close):
+                close(timeout=self.stop_timeout_s)
+            logger.info("runtime_stopped")
+
+    def _install_signals(self) -> None:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self.request_stop)  # type: ignore[union-attr]
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # not on the main thread / platform without signal support
+
+    async def _supervise(self, m: _Managed) -> None:
+        delay = self.restart_delay_s
+        while not self._stop.is_set():  # type: ignore[union-attr]
+            t0 = time.monotonic()
+            try:
+                if asyncio.iscoroutinefunction(m.target):
+                    await m.target(self._stop)
+                else:
+                    await asyncio.to_thread(m.target, self._thread_stop)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("task_failed %s", m.name)
+                if not m.restart:
+                    return
+            # a task that ran for a while gets a fresh backoff
+            if time.monotonic() - t0 > self.max_restart_delay_s:
+                delay = self.restart_delay_s
+            m.restarts += 1
+            logger.info("task_restart %s in %.1fs (n=%d)", m.name, delay, m.restarts)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)  # type: ignore[union-attr]
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, self.max_restart_delay_s)
+
+    async def _cancel_tasks(self) -> None:
+        pending = [m.task for m in self._tasks if m.task is not None and not m.task.done()]
+        for t in pending:
+            t.cancel()
+        if pending:
+            # thread-run tasks only see _thread_stop; give them stop_timeout_s to return
+            await asyncio.wait(pending, timeout=self.stop_timeout_s)
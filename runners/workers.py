@@ -0,0 +1,57 @@
+from __future__ import annotations
+"""
+Shared worker pools.
+
+CPU-bound vision work (QR decode, OCR) runs in a process pool so it does not
+fight the bus/audio threads for the GIL. The pool is created lazily, reused by
+every caller and shut down once at exit.
+
+Workers are started from a forkserver (spawn where there is none), never forked
+from the app itself: a fork would copy the bus/audio/camera threads' locks in
+whatever state they were in and could deadlock the child. The server preloads
+the vision stack, so each worker still starts with cv2/numpy already imported.
+"""
+
+import atexit, logging, multiprocessing, os, threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_vision_pool: Optional[ProcessPoolExecutor] = None
+
+_PRELOAD = ["services.vision.qr_detector"]  # imported once in the forkserver, inherited by workers
+
+def default_workers() -> int:
+    # leave one core for the bus/audio threads
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def _mp_context():
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(_PRELOAD)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+def vision_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    global _vision_pool
+    with _lock:
+        if _vision_pool is None:
+            from concurrent.futures import ProcessPoolExecutor  # ~10 ms of imports, paid on first use
+            n = max_workers or default_workers()
+            ctx = _mp_context()
+            logger.info("vision_pool_start workers=%d start=%s", n, ctx.get_start_method())
+            _vision_pool = ProcessPoolExecutor(max_workers=n, mp_context=ctx)
+        return _vision_pool
+
+def shutdown_pools(wait: bool = True) -> None:
+    global _vision_pool
+    with _lock:
+        pool, _vision_pool = _vision_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+atexit.register(shutdown_pools, False)
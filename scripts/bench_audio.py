@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Audio output latency: speak() to the first sample at the sink, and stop() to silence.
+
+  PYTHONPATH=. python3 scripts/bench_audio.py --buffer-ms 10 20 40 --runs 20
+  PYTHONPATH=. python3 scripts/bench_audio.py --sink wav:/tmp/out.wav --volume 0.5
+  PYTHONPATH=. python3 scripts/bench_audio.py --model data/tts/piper/ar.onnx
+
+PiperTTS plays through AudioOutput with a synthetic voice (a sine "phrase",
+synthesized in microseconds), so the numbers are the output path alone:
+thread handoff + ring + gain + sink write. The sink is paced in real time.
+
+  speak_ms      speak() returns -> first block written to the sink
+  stop_ms       stop() -> the last block of the cut phrase has been written
+  tone_idle_ms  mix() of a tone-bank earcon -> first block written, nothing playing
+  tone_over_ms  same while speech is playing (the tone is mixed, not queued)
+  gain_us       per-block in-stream gain (ramped volume change)
+
+With --model, the same speak() path also runs against a real Piper voice (no
+phrase cache), streaming sentences into the output as they are synthesized:
+
+  voice_first_ms  speak() returns -> first sample of the first sentence at the sink
+  voice_synth_ms  the whole text synthesized up front (what the first sample used to wait for)
+"""
+from __future__ import annotations
+
+import argparse, json, statistics, threading, time
+
+import numpy as np
+
+from services.audio.audio_output import AudioOutput, NullSink, WavSink
+from services.audio.piper_tts import PiperTTS, PiperVoiceBackend
+from services.audio.tones import ToneBank
+from services.audio.tts_cache import Audio
+
+RATE = 22050
+TEXT = "هذا سطر أول للقراءة. وهذا سطر ثانٍ بعده. والسطر الثالث ينهي الفقرة."
+
+class SineVoice:
+    name = "sine"
+    sample_rate = RATE
+
+    def stream(self, text: str, rate: float = 1.0):
+        t = np.arange(int(RATE * 0.05 * max(1, len(text))), dtype=np.float32) / RATE
+        yield (np.sin(2 * np.pi * 440 * t) * 12000).astype(np.int16).tobytes()
+
+    def synthesize(self, text: str, rate: float = 1.0) -> Audio:
+        return Audio(b"".join(self.stream(text, rate)), RATE)
+
+class NoCache:
+    def get(self, *_a): return None
+    def put(self, *_a): pass
+
+class Timed:
+    """Wraps a sink: when the first write started and the last one returned, since arm()."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.first = self.last = None
+        self.event = threading.Event()
+        self.probe = None
+
+    def arm(self, probe=None):
+        self.first = self.last = None
+        self.probe = probe  # only count blocks it accepts
+        self.event.clear()
+
+    def open(self, sample_rate): self.sink.open(sample_rate)
+    def close(self): self.sink.close()
+
+    def write(self, block):
+        if self.first is None and (self.probe is None or self.probe(block)):
+            self.first = time.perf_counter()  # handed to the device
+            self.event.set()
+        self.sink.write(block)
+        self.last = time.perf_counter()  # the device has taken it
+
+def _ms(v: list[float]) -> dict:
+    v = sorted(x * 1000 for x in v)
+    return {"p50": round(statistics.median(v), 2), "p95": round(v[int(0.95 * (len(v) - 1))], 2), "max": round(v[-1], 2)}
+
+def run(sink_spec: str, buffer_ms: int, runs: int, volume: float) -> dict:
+    base = WavSink(sink_spec[4:], realtime=True) if sink_spec.startswith("wav:") else NullSink(realtime=True)
+    sink = Timed(base)
+    out = AudioOutput(sink, buffer_ms=buffer_ms, volume=volume, sample_rate=RATE)
+    tts = PiperTTS(None, backend=SineVoice(), cache=NoCache(), player=out)
+    tts.start()
+    speak, stop = [], []
+    try:
+        for i in range(runs):
+            sink.arm()
+            t = time.perf_counter()
+            tts.speak("x" * 20, "ar")  # ~1 s phrase
+            sink.event.wait(2.0)
+            speak.append(sink.first - t)
+            time.sleep(0.2)
+            t = time.perf_counter()
+            tts.stop()
+            time.sleep(buffer_ms / 1000.0 * 3)
+            stop.append(max(0.0, sink.last - t))
+            out.set_volume(volume if i % 2 else volume * 0.5)  # exercise the ramp
+        tone = ToneBank(cache_dir=None).get("capture_ok", RATE)
+        flat = np.full(RATE, 1000, dtype=np.int16).tobytes()  # speech the tone is easy to spot in
+        tone_idle, tone_over = [], []
+        out.set_volume(1.0)
+        for _ in range(runs):
+            sink.arm()
+            t = time.perf_counter()
+            out.mix(tone)
+            sink.event.wait(1.0)
+            tone_idle.append(sink.first - t)
+            time.sleep(0.1)
+            player = threading.Thread(target=out.play, args=(flat, RATE))
+            player.start()
+            time.sleep(0.1)
+            sink.arm(probe=lambda b: bool((b != 1000).any()))
+            t = time.perf_counter()
+            out.mix(tone)
+            sink.event.wait(1.0)
+            tone_over.append(sink.first - t)
+            out.stop()
+            player.join()
+            time.sleep(buffer_ms / 1000.0 * 3)  # let the last speech block finish: "idle" means idle
+        n = max(1, RATE * buffer_ms // 1000)
+        out._block[:n] = 1000
+        t = time.perf_counter()
+        for k in range(200):
+            out._scale(n, 1.0 if k % 2 else 0.5, 0.5 if k % 2 else 1.0)
+        gain = (time.perf_counter() - t) / 200
+    finally:
+        tts.close()
+    return {"buffer_ms": buffer_ms, "speak_ms": _ms(speak), "stop_ms": _ms(stop),
+            "tone_idle_ms": _ms(tone_idle), "tone_over_ms": _ms(tone_over),
+            "gain_us": round(gain * 1e6, 1), "blocks": out.blocks}
+
+def run_voice(model: str, runs: int) -> dict:
+    backend = PiperVoiceBackend(model)
+    try:
+        backend.start()
+        rate = backend.sample_rate
+        backend.synthesize("تهيئة")  # warm-up: the first inference is not representative
+    except Exception as e:  # no model file, no piper: report it instead of failing the bench
+        return {"model": model, "skipped": str(e)}
+    sink = Timed(NullSink(realtime=True))
+    out = AudioOutput(sink, sample_rate=rate)
+    tts = PiperTTS(None, backend=backend, cache=NoCache(), player=out)
+    tts.start()
+    first, synth = [], []
+    try:
+        for _ in range(runs):
+            t = time.perf_counter()
+            backend.synthesize(TEXT)
+            synth.append(time.perf_counter() - t)
+            sink.arm()
+            t = time.perf_counter()
+            tts.speak(TEXT, "ar")
+            sink.event.wait(30.0)
+            first.append(sink.first - t)
+            tts.stop()
+            time.sleep(0.05)
+    finally:
+        tts.close()
+    return {"model": model, "sample_rate": rate, "voice_first_ms": _ms(first), "voice_synth_ms": _ms(synth)}
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Audio output speak/stop latency.")
+    ap.add_argument("--sink", default="null", help="null | wav:/path/out.wav")
+    ap.add_argument("--buffer-ms", type=int, nargs="+", default=[10, 20, 40])
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--volume", type=float, default=0.8)
+    ap.add_argument("--model", help="also time a real Piper voice (.onnx)")
+    args = ap.parse_args()
+
+    results = [run(args.sink, b, args.runs, args.volume) for b in args.buffer_ms]
+    report = {"sink": args.sink, "sample_rate": RATE, "results": results}
+    if args.model:
+        report["voice"] = run_voice(args.model, args.runs)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Boot-time benchmark: import cost of main.py and time to the first spoken prompt.
+
+  python3 scripts/bench_boot.py --runs 5 --out boot.json
+  python3 scripts/bench_boot.py --compare boot.json
+  git worktree add /tmp/old <ref> && python3 scripts/bench_boot.py --root /tmp/old
+
+Two measurements, each in fresh interpreters (median of --runs):
+  import   `python -X importtime -c "import main"`: cumulative time of main and
+           of each module main imports directly, plus whether the heavy vision
+           modules (numpy, cv2, pyzbar) were loaded at all.
+  boot     `python main.py` with console TTS, no camera and a temporary NABD_HOME;
+           wall time from spawn to log markers on stderr:
+             ready_prompt    first "TTS speaking" line (the ready prompt)
+             runtime_ready   every service started (Supervisor)
+             preload_done    vision modules + camera loaded in the background
+           Markers a tree does not log (e.g. an older checkout) are left out.
+
+--compare exits 1 when a metric regressed by more than --tolerance.
+"""
+from __future__ import annotations
+
+import argparse, json, os, queue, re, signal, statistics, subprocess, sys, tempfile, threading, time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+HEAVY = ("numpy", "cv2", "pyzbar")
+MARKERS = {
+    "ready_prompt": re.compile(r"TTS speaking"),
+    "runtime_ready": re.compile(r"runtime_ready"),
+    "preload_done": re.compile(r"preload_done"),
+}
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+def _env(home: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("NABD_CAMERA_REPLAY", None)
+    env.update({"NABD_HOME": home, "NABD_PIPER_ENABLED": "0", "PYTHONDONTWRITEBYTECODE": "1"})
+    return env
+
+def import_profile(root: Path, runs: int) -> dict:
+    cumulative: Dict[str, List[float]] = defaultdict(list)
+    heavy = set()
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as home:
+            p = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=root,
+                               env=_env(home), stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True)
+        if p.returncode != 0:
+            raise SystemExit(f"import main failed:\n{p.stderr[-2000:]}")
+        for m in _LINE.finditer(p.stderr):
+            cum, depth, name = int(m.group(2)), len(m.group(3)), m.group(4)
+            if name.split(".")[0] in HEAVY:
+                heavy.add(name.split(".")[0])
+            if name == "main" or depth == 3:  # main and its direct imports
+                cumulative[name].append(cum / 1000.0)
+    main_ms = statistics.median(cumulative.pop("main"))
+    top = sorted(((n, statistics.median(v)) for n, v in cumulative.items()), key=lambda kv: -kv[1])[:12]
+    return {"main_ms": round(main_ms, 1), "heavy_loaded": sorted(heavy),
+            "top_imports_ms": {n: round(v, 1) for n, v in top}}
+
+def _boot_once(root: Path, timeout_s: float) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as home:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "main.py"], cwd=root, env=_env(home), stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        lines: "queue.Queue[tuple[float, str]]" = queue.Queue()
+        threading.Thread(target=lambda: [lines.put((time.perf_counter(), l)) for l in proc.stderr],
+                         daemon=True).start()
+        seen: Dict[str, float] = {}
+        deadline = t0 + timeout_s
+        try:
+            while len(seen) < len(MARKERS):
+                wait = deadline - time.perf_counter()
+                if "runtime_ready" in seen:  # an older tree never logs the other markers
+                    wait = min(wait, t0 + seen["runtime_ready"] / 1000.0 + 3.0 - time.perf_counter())
+                try:
+                    t, line = lines.get(timeout=max(0.0, wait))
+                except queue.Empty:
+                    break
+                for key, rx in MARKERS.items():
+                    if key not in seen and rx.search(line):
+                        seen[key] = round((t - t0) * 1000.0, 1)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            try: proc.wait(5)
+            except subprocess.TimeoutExpired: proc.kill()
+        return seen
+
+def boot_profile(root: Path, runs: int, timeout_s: float) -> dict:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        for k, v in _boot_once(root, timeout_s).items():
+            samples[k].append(v)
+    return {f"{k}_ms": round(statistics.median(v), 1) for k, v in samples.items()}
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    problems = []
+    pairs = [("import.main_ms", current["import"]["main_ms"], baseline.get("import", {}).get("main_ms"))]
+    pairs += [(f"boot.{k}", v, baseline.get("boot", {}).get(k)) for k, v in current["boot"].items()]
+    for name, cur, base in pairs:
+        if base and cur / base > 1.0 + tolerance:
+            problems.append(f"{name}: {base} -> {cur} ms (x{cur / base:.2f})")
+    return problems
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Import-time and time-to-first-prompt benchmark.")
+    ap.add_argument("--root", type=Path, default=Path(__file__).resolve().parents[1], help="tree to measure")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--timeout", type=float, default=30.0, help="per boot run (s)")
+    ap.add_argument("--no-boot", action="store_true", help="only the -X importtime profile")
+    ap.add_argument("--out", type=Path, help="write the JSON report here")
+    ap.add_argument("--compare", type=Path, metavar="BASELINE", help="fail on regressions")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown (fraction)")
+    args = ap.parse_args()
+
+    report = {"meta": {"root": str(args.root), "runs": args.runs, "python": sys.version.split()[0]},
+              "import": import_profile(args.root, args.runs),
+              "boot": {} if args.no_boot else boot_profile(args.root, args.runs, args.timeout)}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(text + "\n")
+    print(text)
+
+    if args.compare:
+        problems = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
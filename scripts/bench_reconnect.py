@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+QR-to-online latency of the Wi-Fi provisioning path, against a fake `nmcli`.
+
+  PYTHONPATH=. python3 scripts/bench_reconnect.py --runs 5 --connect-s 2.5 --up-s 0.6
+
+A stand-in nmcli is put first on PATH; it keeps its state (saved profiles, active
+SSID) in a JSON file and sleeps like the real one (`dev wifi connect` is the slow
+path, `con up` of a saved profile is faster, queries are cheap). Connectivity is a
+local TCP listener, so the numbers are the nmcli path only.
+
+scenarios:
+  new     no profile for the SSID        -> dev wifi connect
+  known   saved profile, other network   -> con up
+  active  already on the SSID and online -> nothing
+  missing SSID not in the scan results    -> fail fast, spoken error
+The profile index is rebuilt before every run, so "known" includes that one-off cost.
+"""
+from __future__ import annotations
+
+import argparse, json, logging, os, socket, statistics, sys, tempfile, textwrap, time
+from pathlib import Path
+
+FAKE_NMCLI = textwrap.dedent('''\
+    #!{python}
+    import json, os, sys, time, uuid
+    path = os.environ["FAKE_NMCLI_STATE"]
+    st = json.load(open(path))
+    a = sys.argv[1:]
+    def save(): json.dump(st, open(path, "w"))
+    def esc(s): return s.replace("\\\\", "\\\\\\\\").replace(":", "\\\\:")
+    time.sleep(float(os.environ.get("FAKE_NMCLI_QUERY_S", "0.02")))
+    if a[:2] == ["-t", "-f"] and a[2].startswith("ACTIVE,SSID"):
+        for s in st["visible"]:
+            row = {{"ACTIVE": "yes" if s == st["active"] else "no", "SSID": esc(s), "SIGNAL": "70", "SECURITY": "WPA2"}}
+            print(":".join(row[f] for f in a[2].split(",")))
+    elif a[:1] == ["-g"] and a[2:4] == ["con", "show"]:
+        print(next(p["ssid"] for p in st["profiles"] if p["uuid"] == a[-1]))
+    elif a[-2:] == ["con", "show"]:
+        for p in st["profiles"]:
+            print(esc(p["name"]) + ":" + p["uuid"] + ":802-11-wireless")
+    elif a[:2] == ["con", "up"]:
+        time.sleep(float(os.environ.get("FAKE_NMCLI_UP_S", "0.6")))
+        p = next(p for p in st["profiles"] if p["uuid"] == a[-1])
+        st["active"] = p["ssid"]; save()
+    elif a[:3] == ["dev", "wifi", "connect"]:
+        time.sleep(float(os.environ.get("FAKE_NMCLI_CONNECT_S", "2.5")))
+        ssid = a[3]
+        st["profiles"] = [p for p in st["profiles"] if p["ssid"] != ssid]
+        st["profiles"].append({{"name": ssid, "uuid": str(uuid.uuid4()), "ssid": ssid}})
+        st["active"] = ssid; save()
+    else:
+        sys.exit(2)
+''')
+
+SSID = "Home:5G"  # ':' exercises nmcli's terse escaping
+
+def _state(scenario: str) -> dict:
+    profiles = [{"name": "Office", "uuid": "11111111-0000-0000-0000-000000000001", "ssid": "Office"}]
+    if scenario in ("known", "active"):
+        profiles.append({"name": "home", "uuid": "11111111-0000-0000-0000-000000000002", "ssid": SSID})
+    return {"visible": ["Office"] if scenario == "missing" else [SSID, "Office"], "profiles": profiles,
+            "active": SSID if scenario == "active" else "Office"}
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Wi-Fi QR provisioning latency with a fake nmcli.")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--connect-s", type=float, default=2.5, help="fake `dev wifi connect` duration")
+    ap.add_argument("--up-s", type=float, default=0.6, help="fake `con up` duration")
+    ap.add_argument("--query-s", type=float, default=0.02, help="fake nmcli query duration")
+    ap.add_argument("--scenarios", nargs="+", default=["new", "known", "active", "missing"])
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("connectivity").setLevel(logging.WARNING)
+    tmp = Path(tempfile.mkdtemp(prefix="bench_nmcli_"))
+    exe = tmp / "nmcli"
+    exe.write_text(FAKE_NMCLI.format(python=sys.executable))
+    exe.chmod(0o755)
+    state = tmp / "state.json"
+    os.environ.update(PATH=f"{tmp}{os.pathsep}{os.environ.get('PATH', '')}", FAKE_NMCLI_STATE=str(state),
+                      FAKE_NMCLI_CONNECT_S=str(args.connect_s), FAKE_NMCLI_UP_S=str(args.up_s),
+                      FAKE_NMCLI_QUERY_S=str(args.query_s))
+
+    from connectivity import network
+    from connectivity.monitor import parse_targets, shared_monitor
+    from connectivity.qr_provisionong import WiFiCredentials
+    from connectivity.wifi_scan import shared_scanner
+    from services.vision.qr_detector import QRDecision
+
+    srv = socket.socket(); srv.bind(("127.0.0.1", 0)); srv.listen()
+    monitor = shared_monitor()
+    monitor.targets = parse_targets([f"tcp:127.0.0.1:{srv.getsockname()[1]}"])
+    creds = WiFiCredentials(ssid=SSID, security="WPA", password="secret123", hidden=False)
+    decision = QRDecision(kind="wifi_qr", payload="WIFI:<masked>", creds=creds)
+
+    results = []
+    spoken: list[str] = []
+    for scenario in args.scenarios:
+        times = []
+        for _ in range(args.runs):
+            state.write_text(json.dumps(_state(scenario)))
+            network.known_profiles.invalidate()
+            monitor.check()
+            shared_scanner().refresh()  # what the background scanner keeps fresh
+            spoken.clear()
+            t = time.perf_counter()
+            network.handle_frame(None, decision=decision, say=spoken.append)
+            times.append(time.perf_counter() - t)
+        final = json.loads(state.read_text())
+        results.append({"scenario": scenario, "runs": args.runs,
+                        "qr_to_online_ms_p50": round(statistics.median(times) * 1000, 1),
+                        "qr_to_online_ms_max": round(max(times) * 1000, 1),
+                        "active_after": final["active"], "profiles_after": len(final["profiles"]),
+                        "spoken": spoken[:1]})
+    srv.close()
+    print(json.dumps({"fake_nmcli": {"connect_s": args.connect_s, "up_s": args.up_s, "query_s": args.query_s},
+                      "results": results}, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Cold vs warm synthesis latency for the Piper voice.
+
+  PYTHONPATH=. python3 scripts/bench_tts.py --runs 5 --threads 1 2 4
+
+cold = fresh TTSWorker process (spawn + model load) + first phrase
+warm = same phrase again on the already-running worker
+"""
+from __future__ import annotations
+
+import argparse, json, statistics, time
+
+from core.config import PIPER_MODEL
+from services.audio.tts_worker import TTSWorker
+
+def bench(model: str, text: str, runs: int, threads: int) -> dict:
+    t0 = time.perf_counter()
+    w = TTSWorker(model, intra_op_threads=threads)
+    try:
+        audio = w.synthesize(text)
+        cold = time.perf_counter() - t0
+        warm: list[float] = []
+        first_chunk: list[float] = []
+        for _ in range(runs):
+            t = time.perf_counter()
+            first = None
+            for _chunk in w.stream(text):
+                if first is None:
+                    first = time.perf_counter() - t
+            warm.append(time.perf_counter() - t)
+            first_chunk.append(first or 0.0)
+    finally:
+        w.close()
+    return {
+        "threads": threads,
+        "audio_s": round(audio.duration_s, 3),
+        "cold_ms": round(cold * 1000, 1),
+        "warm_ms_p50": round(statistics.median(warm) * 1000, 1),
+        "warm_ms_min": round(min(warm) * 1000, 1),
+        "warm_first_chunk_ms_p50": round(statistics.median(first_chunk) * 1000, 1),
+        "warm_rtf": round(statistics.median(warm) / max(audio.duration_s, 1e-6), 3),
+    }
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Piper TTS cold vs warm latency.")
+    ap.add_argument("--model", default=str(PIPER_MODEL))
+    ap.add_argument("--text", default="مرحبا بك في الجهاز. This is a test.")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--threads", type=int, nargs="+", default=[0], help="intra-op thread counts (0 = default)")
+    args = ap.parse_args()
+
+    results = [bench(args.model, args.text, args.runs, n) for n in args.threads]
+    print(json.dumps({"model": args.model, "results": results}, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Vision micro-benchmarks over a directory of sample frames.
+
+  PYTHONPATH=. python3 scripts/bench_vision.py --make-corpus data/bench_corpus
+  PYTHONPATH=. python3 scripts/bench_vision.py data/bench_corpus --repeat 5 --out bench.json
+  PYTHONPATH=. python3 scripts/bench_vision.py data/bench_corpus --compare bench.json
+  PYTHONPATH=. python3 scripts/bench_vision.py data/bench_corpus --cache-check
+
+Corpus files are named <condition>_<kind>_<n>.png, where condition is one of clean,
+blur, rotated, lowlight and kind is one of wifi, qr, page. --make-corpus writes a
+synthetic one; real captures named the same way can be dropped in next to it.
+
+Ops timed per image:
+  contains_qr, decode, classify_frame   services.vision.qr_detector
+  parse_wifi_qr                         connectivity.qr_provisionong (Wi-Fi payloads only)
+  ocr_segment                           gray + binarize + segment_lines
+  ocr_recognize                         OCRService.recognize with Tesseract (skipped if missing)
+
+The report is JSON: per-op throughput and p50/p95/p99 latency, peak RSS, and per
+category how often each step of the ZBar retry ladder decoded the QR. --compare
+exits 1 when an op's p95 regressed by more than --tolerance against a baseline.
+
+--cache-check measures the OCR cache's match rule instead. Every image is a page;
+each gets --recaptures simulated re-captures (small shift, zoom, tilt, exposure).
+It reports the pHash distance between captures of the same page and between
+different pages, and per distance threshold the true-hit rate (re-capture found)
+and the false-hit rate (another page found), with and without the layout check.
+"""
+from __future__ import annotations
+
+import argparse, json, platform, resource, statistics, sys, time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+CONDITIONS = ("clean", "blur", "rotated", "lowlight")
+KINDS = ("wifi", "qr", "page")
+
+# ---------- corpus ----------
+
+def _page(rng: np.random.Generator, size=(1232, 1640)) -> np.ndarray:
+    h, w = size
+    img = np.full((h, w, 3), 235, np.uint8)
+    y = 90
+    while y < h - 60:
+        words = " ".join("".join(chr(rng.integers(97, 123)) for _ in range(rng.integers(2, 9)))
+                         for _ in range(rng.integers(4, 10)))
+        cv2.putText(img, words, (80, y), cv2.FONT_HERSHEY_SIMPLEX, 1.4, (20, 20, 20), 3, cv2.LINE_AA)
+        y += int(rng.integers(70, 95))
+    return img
+
+def _with_qr(img: np.ndarray, payload: str, rng: np.random.Generator) -> np.ndarray:
+    qr = cv2.QRCodeEncoder_create().encode(payload)
+    side = int(rng.integers(360, 560))
+    qr = cv2.resize(qr, (side, side), interpolation=cv2.INTER_NEAREST)
+    h, w = img.shape[:2]
+    y, x = int(rng.integers(40, h - side - 40)), int(rng.integers(40, w - side - 40))
+    img[y:y + side, x:x + side] = qr[..., None]
+    return img
+
+def _degrade(img: np.ndarray, condition: str, rng: np.random.Generator) -> np.ndarray:
+    if condition == "blur":
+        k = int(rng.choice([7, 9, 11]))
+        return cv2.GaussianBlur(img, (k, k), 0)
+    if condition == "rotated":
+        h, w = img.shape[:2]
+        m = cv2.getRotationMatrix2D((w / 2, h / 2), float(rng.uniform(12, 35)), 1.0)
+        return cv2.warpAffine(img, m, (w, h), borderValue=(235, 235, 235))
+    if condition == "lowlight":
+        dark = img.astype(np.float32) * 0.22 + rng.normal(0, 6, img.shape)
+        return np.clip(dark, 0, 255).astype(np.uint8)
+    return img
+
+def make_corpus(out: Path, per_cell: int, seed: int) -> int:
+    rng = np.random.default_rng(seed)
+    out.mkdir(parents=True, exist_ok=True)
+    n = 0
+    for condition in CONDITIONS:
+        for kind in KINDS:
+            for i in range(per_cell):
+                img = _page(rng)
+                if kind == "wifi":
+                    img = _with_qr(img, f"WIFI:T:WPA;S:Bench-{i};P:pw{rng.integers(1e6, 1e7)};;", rng)
+                elif kind == "qr":
+                    img = _with_qr(img, f"https://example.org/doc/{rng.integers(1e6)}", rng)
+                img = _degrade(img, condition, rng)
+                cv2.imwrite(str(out / f"{condition}_{kind}_{i:02d}.png"), cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+                n += 1
+    return n
+
+# ---------- benchmark ----------
+
+def _pct(xs: List[float], q: float) -> float:
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(round(q / 100.0 * (len(s) - 1))))]
+
+def _summary(times: List[float]) -> dict:
+    total = sum(times)
+    return {
+        "n": len(times),
+        "throughput_per_s": round(len(times) / total, 2) if total else None,
+        "p50_ms": round(_pct(times, 50) * 1000, 3),
+        "p95_ms": round(_pct(times, 95) * 1000, 3),
+        "p99_ms": round(_pct(times, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(times) * 1000, 3),
+    }
+
+def _timed(fn: Callable[[], object], repeat: int, into: List[float]) -> object:
+    out = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        into.append(time.perf_counter() - t)
+    return out
+
+def run(corpus: Path, repeat: int, with_ocr: bool) -> dict:
+    from connectivity.qr_provisionong import parse_wifi_qr
+    from services.vision import qr_detector as qr
+    from services.vision.ocr import OCRService, binarize, segment_lines
+
+    ocr = None
+    if with_ocr:
+        try:
+            import pytesseract  # noqa: F401
+            ocr = OCRService()
+        except ImportError:
+            print("pytesseract not installed: skipping ocr_recognize", file=sys.stderr)
+
+    files = sorted(p for p in corpus.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
+    if not files:
+        raise SystemExit(f"no images in {corpus}")
+
+    times: Dict[str, List[float]] = defaultdict(list)
+    stages: Dict[str, Counter] = defaultdict(Counter)
+    routes: Dict[str, Counter] = defaultdict(Counter)
+    for path in files:
+        bgr = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if bgr is None:
+            continue
+        img = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        category = "_".join(path.stem.split("_")[:2])
+
+        _timed(lambda: qr.contains_qr(img), repeat, times["contains_qr"])
+        payload = _timed(lambda: qr.decode(img), repeat, times["decode"])
+        d = _timed(lambda: qr.classify_frame(img), repeat, times["classify_frame"])
+        routes[category][d.kind] += 1
+
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        found, pts = qr._default.locate(gray)
+        stage = qr._default.decode_gray(gray, pts)[1] if found else None
+        stages[category][stage or ("not_found" if not found else "failed")] += 1
+
+        if payload and payload.upper().startswith("WIFI:"):
+            _timed(lambda: parse_wifi_qr(payload), repeat, times["parse_wifi_qr"])
+
+        _timed(lambda: segment_lines(binarize(cv2.cvtColor(img, cv2.COLOR_RGB2GRAY))), repeat, times["ocr_segment"])
+        if ocr is not None and d.kind == "ocr":
+            _timed(lambda: ocr.recognize(img), 1, times["ocr_recognize"])
+
+    return {
+        "meta": {"corpus": str(corpus), "images": len(files), "repeat": repeat,
+                 "python": platform.python_version(), "opencv": cv2.__version__,
+                 "machine": platform.machine()},
+        "ops": {op: _summary(ts) for op, ts in sorted(times.items())},
+        "routes": {c: dict(v) for c, v in sorted(routes.items())},
+        "zbar_stages": {c: dict(v) for c, v in sorted(stages.items())},
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+    }
+
+def _recapture(img: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    h, w = img.shape[:2]
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), float(rng.uniform(-1.5, 1.5)), float(rng.uniform(0.97, 1.03)))
+    m[:, 2] += (rng.uniform(-0.02, 0.02) * w, rng.uniform(-0.02, 0.02) * h)
+    out = cv2.warpAffine(img, m, (w, h), borderMode=cv2.BORDER_REPLICATE).astype(np.float32)
+    out = out * rng.uniform(0.85, 1.15) + rng.normal(0, 3, out.shape)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+def cache_check(corpus: Path, recaptures: int, seed: int) -> dict:
+    from core.config import OCR_CACHE_MAX_DIST
+    from services.vision.frame import Frame
+    from services.vision.ocr import segment_lines
+    from services.vision.ocr_cache import hamming, layout_signature, phash, same_layout
+
+    def sig(img: np.ndarray):
+        f = Frame(img)
+        return phash(f.ink), layout_signature(segment_lines(f.deskewed_ink))
+
+    rng = np.random.default_rng(seed)
+    pages, same = [], []  # pages: (hash, layout); same: (distance, layout agrees) per re-capture
+    for path in sorted(p for p in corpus.iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg")):
+        bgr = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if bgr is None:
+            continue
+        img = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        h, layout = sig(img)
+        pages.append((h, layout))
+        for _ in range(recaptures):
+            h2, layout2 = sig(_recapture(img, rng))
+            same.append((hamming(h, h2), same_layout(layout, layout2)))
+    other = [(hamming(a[0], b[0]), same_layout(a[1], b[1]))
+             for i, a in enumerate(pages) for b in pages[i + 1:]]
+    if not same or not other:
+        raise SystemExit(f"need at least two images in {corpus}")
+
+    def rate(pairs, t: int, verified: bool) -> float:
+        return round(sum(d <= t and (ok or not verified) for d, ok in pairs) / len(pairs), 4)
+
+    thresholds = sorted({8, 16, 24, 32, 40, 48, OCR_CACHE_MAX_DIST})
+    same_d, other_d = [d for d, _ in same], [d for d, _ in other]
+    return {
+        "pages": len(pages), "recaptures": len(same), "other_pairs": len(other),
+        "max_dist": OCR_CACHE_MAX_DIST,
+        "same_page_dist": {"p50": _pct(same_d, 50), "p95": _pct(same_d, 95), "max": max(same_d)},
+        "other_page_dist": {"min": min(other_d), "p5": _pct(other_d, 5), "p50": _pct(other_d, 50)},
+        "layout_agrees_same_page": round(sum(ok for _, ok in same) / len(same), 4),
+        "layout_agrees_other_page": round(sum(ok for _, ok in other) / len(other), 4),
+        "by_threshold": {t: {"true_hit": rate(same, t, False), "false_hit": rate(other, t, False),
+                             "true_hit_verified": rate(same, t, True), "false_hit_verified": rate(other, t, True)}
+                         for t in thresholds},
+    }
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    problems = []
+    for op, cur in current["ops"].items():
+        base = baseline.get("ops", {}).get(op)
+        if not base or not base.get("p95_ms"):
+            continue
+        ratio = cur["p95_ms"] / base["p95_ms"]
+        if ratio > 1.0 + tolerance:
+            problems.append(f"{op}: p95 {base['p95_ms']} -> {cur['p95_ms']} ms (x{ratio:.2f})")
+    def decoded(counts: dict) -> int:
+        return sum(v for k, v in counts.items() if k not in ("not_found", "failed"))
+
+    for cat, base in baseline.get("zbar_stages", {}).items():
+        lost = decoded(base) - decoded(current.get("zbar_stages", {}).get(cat, {}))
+        if lost > 0:
+            problems.append(f"{cat}: {lost} fewer QR decodes than baseline")
+    return problems
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="QR/OCR micro-benchmarks over a sample corpus.")
+    ap.add_argument("corpus", nargs="?", type=Path)
+    ap.add_argument("--make-corpus", type=Path, metavar="DIR", help="write a synthetic corpus and exit")
+    ap.add_argument("--per-cell", type=int, default=3, help="images per condition x kind (--make-corpus)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per image and op")
+    ap.add_argument("--no-ocr", action="store_true", help="skip Tesseract recognition")
+    ap.add_argument("--out", type=Path, help="write the JSON report here")
+    ap.add_argument("--compare", type=Path, metavar="BASELINE", help="fail on p95 / decode regressions")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="allowed p95 slowdown (fraction)")
+    ap.add_argument("--cache-check", action="store_true", help="measure the OCR cache match rule and exit")
+    ap.add_argument("--recaptures", type=int, default=4, help="simulated re-captures per page (--cache-check)")
+    args = ap.parse_args()
+
+    if args.make_corpus:
+        n = make_corpus(args.make_corpus, args.per_cell, args.seed)
+        print(f"wrote {n} images to {args.make_corpus}")
+        return 0
+    if args.corpus is None:
+        ap.error("corpus directory required (or --make-corpus DIR)")
+    if args.cache_check:
+        print(json.dumps(cache_check(args.corpus, args.recaptures, args.seed), indent=2))
+        return 0
+
+    report = run(args.corpus, args.repeat, not args.no_ocr)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        args.out.write_text(text + "\n")
+    print(text)
+
+    if args.compare:
+        problems = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Voice pool sizing: replay a mixed-language reading sequence under several RAM budgets.
+
+  PYTHONPATH=. python3 scripts/bench_voices.py --budgets 150 250 400
+  PYTHONPATH=. python3 scripts/bench_voices.py --voices ar=ar.onnx,en=en.onnx --pattern ar,en,en,ar --repeat 20
+
+Every budget starts from an empty pool and speaks the same lines (synthesis only, no
+playback, no phrase cache). The report has per-budget loads/evictions/hits, the peak
+resident estimate, and the time spent synthesizing vs. loading voices, which shows
+the smallest budget at which language switches stop reloading models.
+"""
+from __future__ import annotations
+
+import argparse, json, statistics, time
+
+from core.config import TTS_VOICES
+from services.audio.voice_pool import VoicePool, parse_voices
+
+LINES = {"ar": "مرحبا بك في الجهاز", "en": "This is a test", "fr": "Ceci est un test"}
+
+def run(voices: dict, budget: float, sequence: list[str]) -> dict:
+    pool = VoicePool(voices, budget_mb=budget)
+    per_line: list[float] = []
+    peak = 0.0
+    t0 = time.perf_counter()
+    try:
+        for lang in sequence:
+            t = time.perf_counter()
+            pool.synthesize(LINES.get(lang, LINES["en"]), lang=lang)
+            per_line.append(time.perf_counter() - t)
+            peak = max(peak, pool.stats()["used_mb"])
+        stats = pool.stats()
+    finally:
+        pool.close()
+    return {
+        "budget_mb": budget, "peak_used_mb": peak,
+        "loads": stats["loads"], "evictions": stats["evictions"], "hits": stats["hits"],
+        "per_lang": stats["per_lang"],
+        "total_s": round(time.perf_counter() - t0, 2),
+        "line_ms_p50": round(statistics.median(per_line) * 1000, 1),
+        "line_ms_max": round(max(per_line) * 1000, 1),
+    }
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Voice pool loads/evictions per RAM budget.")
+    ap.add_argument("--voices", default=TTS_VOICES, help="lang=model.onnx,...")
+    ap.add_argument("--budgets", type=float, nargs="+", default=[150, 250, 400])
+    ap.add_argument("--pattern", default="ar,ar,en,ar,en,en,ar", help="languages of consecutive lines")
+    ap.add_argument("--repeat", type=int, default=5, help="times the pattern is read")
+    args = ap.parse_args()
+
+    voices = parse_voices(args.voices)
+    sequence = [p.strip() for p in args.pattern.split(",") if p.strip()] * args.repeat
+    results = [run(voices, b, sequence) for b in args.budgets]
+    print(json.dumps({"voices": voices, "lines": len(sequence), "results": results}, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,391 @@
+import fcntl
+import logging
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from typing import Callable, Iterable, Optional, Union
+
+import numpy as np
+
+from core.config import AUDIO_BUFFER_MS, AUDIO_RING_MS, AUDIO_SINK, PIPER_VOL
+from services.audio.tts_cache import Audio
+
+MAX_GAIN = 2.0
+
+
+class NullSink:
+    """Discards audio (counts frames). realtime=True paces writes like a sound card would."""
+
+    def __init__(self, realtime: bool = False):
+        self.realtime = realtime
+        self.sample_rate = 0
+        self.frames = 0
+
+    def open(self, sample_rate: int):
+        self.sample_rate = sample_rate
+
+    def write(self, block: np.ndarray):
+        self.frames += len(block)
+        if self.realtime:
+            time.sleep(len(block) / self.sample_rate)
+
+    def close(self):
+        pass
+
+
+class WavSink(NullSink):
+    """Writes everything played to a 16-bit mono WAV file (reopened if the sample rate changes)."""
+
+    def __init__(self, path: str, realtime: bool = False):
+        super().__init__(realtime)
+        self.path = str(path)
+        self._wav = None
+
+    def open(self, sample_rate: int):
+        self.close()
+        super().open(sample_rate)
+        self._wav = wave.open(self.path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, block: np.ndarray):
+        self._wav.writeframesraw(block.tobytes())
+        super().write(block)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()  # patches the header sizes
+            self._wav = None
+
+
+class AplaySink:
+    """
+    One long-lived `aplay` reading raw S16_LE from a pipe.
+
+    A pipe holds ~90 ms even at its minimum size, so writes are paced against the
+    wall clock: at most `lead` buffers are ever queued between the ring and the
+    speaker. That bounds how late stop() and mixed tones are heard.
+    """
+
+    def __init__(self, buffer_ms: int = AUDIO_BUFFER_MS, lead: int = 2):
+        self.buffer_ms = buffer_ms
+        self.lead_s = lead * buffer_ms / 1000.0
+        self.sample_rate = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._t0 = 0.0      # wall time at which the queued audio started playing
+        self._queued = 0.0  # seconds written since _t0
+        self.logger = logging.getLogger("AplaySink")
+
+    def open(self, sample_rate: int):
+        self.close()
+        self.sample_rate = sample_rate
+        self._t0, self._queued = 0.0, 0.0
+        us = self.buffer_ms * 1000
+        cmd = ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-c", "1", "-r", str(sample_rate),
+               f"--period-time={us}", f"--buffer-time={4 * us}"]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL)
+        try:
+            fcntl.fcntl(self._proc.stdin, getattr(fcntl, "F_SETPIPE_SZ", 1031), 4096)
+        except OSError:
+            pass
+
+    def write(self, block: np.ndarray):
+        proc = self._proc
+        if proc is None:
+            return
+        now = time.monotonic()
+        ahead = self._t0 + self._queued - now
+        if ahead <= 0:  # drained (idle or underrun): restart the clock
+            self._t0, self._queued = now, 0.0
+        elif ahead > self.lead_s:
+            time.sleep(ahead - self.lead_s)
+        self._queued += len(block) / self.sample_rate
+        try:
+            proc.stdin.write(block.tobytes())
+            proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.logger.error(f"aplay exited ({e}); reopening")
+            self.open(self.sample_rate)
+
+    def close(self):
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+            try:
+                proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+class AudioOutput:
+    """
+    Streams 16-bit mono PCM to a sink from a preallocated ring on one thread.
+
+    play() copies samples into the ring (blocking while it is full) and returns
+    when they have been written to the sink: True if played to the end, False if
+    stop() cut it. Concurrent play() calls queue up. The output thread takes at most one buffer
+    (buffer_ms) at a time, so stop() is heard within one buffer period: it only
+    empties the ring, the block being written is the last one.
+
+    Volume is a gain applied to each block in place (float32 scratch, clip, int16),
+    ramped across one block when it changes; nothing is re-synthesized.
+    mix() overlays short PCM (earcons) on the same blocks, so a tone starts with the
+    next block instead of waiting for the speech in the ring.
+    All buffers are allocated up front and again only when the sample rate changes.
+    """
+
+    def __init__(self, sink=None, *, buffer_ms: int = AUDIO_BUFFER_MS, ring_ms: int = AUDIO_RING_MS,
+                 volume: float = PIPER_VOL, sample_rate: int = 22050):
+        self.sink = sink if sink is not None else make_sink(AUDIO_SINK, buffer_ms)
+        self.buffer_ms = buffer_ms
+        self.ring_ms = max(ring_ms, 2 * buffer_ms)
+        self.logger = logging.getLogger("AudioOutput")
+        self._cond = threading.Condition()
+        self._play_lock = threading.Lock()  # one producer at a time
+        self._gen = 0
+        self._closed = False
+        self._gain = self._applied = min(MAX_GAIN, max(0.0, volume))
+        self._w = self._r = self._played = 0  # absolute frame counters (written / taken / at the sink)
+        self._tones: list = []  # [pcm, pos] being mixed in
+        self._alloc(sample_rate)
+        self._sink_rate = 0
+        self._block = self._f32 = self._tmp = self._out = self._ramp = None
+        self.blocks = 0
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- control ----------
+    def start(self):
+        with self._cond:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="audio-out", daemon=True)
+                self._thread.start()
+
+    def play(self, audio: Union[Audio, bytes], sample_rate: int = None, *,
+             still_current: Callable[[], bool] = None) -> bool:
+        """
+        Blocks until the clip is at the sink. False if it was stopped.
+
+        still_current is the caller's own generation check (e.g. PiperTTS: no newer
+        speak()/stop()). It is evaluated under the output lock when play() takes the
+        output's generation, so a stop() that the caller issued before that point
+        cannot be missed: either the check fails or the stop cuts this clip.
+        """
+        if isinstance(audio, Audio):
+            audio, sample_rate = audio.pcm, audio.sample_rate
+        return self.play_stream((audio,), sample_rate or self.sample_rate, still_current=still_current)
+
+    def play_stream(self, chunks: Iterable[bytes], sample_rate: int, *,
+                    still_current: Callable[[], bool] = None) -> bool:
+        """Like play() for PCM produced incrementally (e.g. Piper's per-sentence chunks)."""
+        self.start()
+        with self._play_lock:
+            with self._cond:
+                if still_current is not None and not still_current():
+                    return False
+                gen = self._gen
+                if sample_rate != self.sample_rate:
+                    # the sink is reopened at the new rate once everything queued has played
+                    while self._played < self._w and gen == self._gen and not self._closed:
+                        self._cond.wait()
+                    if gen != self._gen or self._closed:
+                        return False
+                    self._alloc(sample_rate)
+            for chunk in chunks:
+                if not self._put(np.frombuffer(chunk, dtype=np.int16), gen):
+                    return False
+            with self._cond:
+                end = self._w
+                while self._played < end and gen == self._gen and not self._closed:
+                    self._cond.wait()
+                return gen == self._gen and not self._closed
+
+    def mix(self, pcm):
+        """
+        Overlay int16 PCM (at the output's rate) on the stream from the next block on,
+        without waiting for speech to end. stop() does not cut it. Returns at once.
+        """
+        self.start()
+        with self._cond:
+            if len(self._tones) < 4:  # a burst of button presses should not pile up
+                self._tones.append([pcm, 0])
+                self._cond.notify_all()
+
+    def stop(self):
+        """Drop the queued speech (not mixed tones); whatever play() is waiting returns False."""
+        with self._cond:
+            self._gen += 1
+            self._r = self._played = self._w
+            self._cond.notify_all()
+
+    def set_volume(self, level: float):
+        with self._cond:
+            self._gain = min(MAX_GAIN, max(0.0, float(level)))
+
+    @property
+    def volume(self) -> float:
+        return self._gain
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._gen += 1
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=1.0)
+        self.sink.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"sample_rate": self.sample_rate, "buffer_ms": self.buffer_ms, "ring_frames": len(self._ring),
+                    "queued_frames": self._w - self._r, "blocks": self.blocks, "volume": self._gain}
+
+    # ---------- producer ----------
+    def _alloc(self, sample_rate: int):
+        self.sample_rate = int(sample_rate)
+        self._ring = np.zeros(max(1, self.sample_rate * self.ring_ms // 1000), dtype=np.int16)
+        self._w = self._r = self._played = 0
+
+    def _put(self, samples: np.ndarray, gen: int) -> bool:
+        ring, size = self._ring, len(self._ring)
+        pos = 0
+        while pos < len(samples):
+            with self._cond:
+                while self._w - self._r >= size and gen == self._gen and not self._closed:
+                    self._cond.wait()
+                if gen != self._gen or self._closed:
+                    return False
+                n = min(len(samples) - pos, size - (self._w - self._r))
+                i = self._w % size
+                first = min(n, size - i)
+                ring[i:i + first] = samples[pos:pos + first]
+                ring[:n - first] = samples[pos + first:pos + n]
+                self._w += n
+                pos += n
+                self._cond.notify_all()
+        return True
+
+    # ---------- output thread ----------
+    def _run(self):
+        self._open_sink(self.sample_rate)  # spawning aplay is not on the first phrase's path
+        while True:
+            with self._cond:
+                while self._w == self._r and not self._tones and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                rate = self.sample_rate
+                if rate == self._sink_rate:
+                    gen = self._gen
+                    n = self._take()
+                    end = self._r
+                    tones = self._take_tones(n)
+                    n = max([n] + [len(t) for t in tones])
+                    g0, g1 = self._applied, self._gain
+                    self._applied = g1
+                    self._cond.notify_all()  # room in the ring for play()
+            if rate != self._sink_rate:
+                self._open_sink(rate)
+                continue
+            block = self._scale(n, g0, g1, tones)
+            try:
+                self.sink.write(block)
+            except Exception as e:
+                self.logger.error(f"audio sink write failed: {e}")
+            with self._cond:
+                self.blocks += 1
+                if gen == self._gen:
+                    self._played = max(self._played, end)
+                self._cond.notify_all()
+
+    def _open_sink(self, rate: int):
+        frames = max(1, rate * self.buffer_ms // 1000)
+        self._block = np.empty(frames, dtype=np.int16)
+        self._out = np.empty(frames, dtype=np.int16)
+        self._f32 = np.empty(frames, dtype=np.float32)
+        self._tmp = np.empty(frames, dtype=np.float32)
+        self._ramp = np.linspace(0.0, 1.0, frames, dtype=np.float32)
+        try:
+            self.sink.open(rate)
+        except Exception as e:
+            self.logger.error(f"audio sink open failed: {e}")
+        self._sink_rate = rate
+
+    def _take(self) -> int:
+        """Caller holds _cond. Copies up to one buffer out of the ring."""
+        ring, size = self._ring, len(self._ring)
+        n = min(self._w - self._r, len(self._block))
+        i = self._r % size
+        first = min(n, size - i)
+        self._block[:first] = ring[i:i + first]
+        self._block[first:n] = ring[:n - first]
+        self._r += n
+        return n
+
+    def _take_tones(self, n: int) -> list:
+        """Caller holds _cond. The next slice of each mixed tone (a whole block when there is no speech)."""
+        if not self._tones:
+            return []
+        frames = n or len(self._block)
+        if n < frames:
+            self._block[n:frames] = 0  # speech ran out inside this block: silence under the tone
+        out = []
+        for t in self._tones:
+            pcm, pos = t
+            out.append(pcm[pos:pos + frames])
+            t[1] = pos + frames
+        self._tones = [t for t in self._tones if t[1] < len(t[0])]
+        return out
+
+    def _scale(self, n: int, g0: float, g1: float, tones=()) -> np.ndarray:
+        src = self._block[:n]
+        if g0 == g1 == 1.0 and not tones:
+            return src
+        f = self._f32[:n]
+        if g0 == g1:
+            np.multiply(src, g1, out=f)
+        else:  # ramp the change over this block (no zipper noise)
+            np.multiply(self._ramp[:n], g1 - g0, out=f)
+            f += g0
+            f *= src
+        for t in tones:  # tones follow the volume too
+            tmp = self._tmp[:len(t)]
+            np.multiply(t, g1, out=tmp)
+            f[:len(t)] += tmp
+        np.clip(f, -32768.0, 32767.0, out=f)
+        out = self._out[:n]
+        np.copyto(out, f, casting="unsafe")
+        return out
+
+
+def make_sink(spec: str, buffer_ms: int = AUDIO_BUFFER_MS):
+    """NABD_AUDIO_SINK: "aplay" (default), "null", or "wav:/path/out.wav"."""
+    kind, _sep, arg = spec.partition(":")
+    if kind == "wav":
+        return WavSink(arg or "out.wav", realtime=True)
+    if kind == "null":
+        return NullSink(realtime=True)
+    if shutil.which("aplay") is None:
+        logging.getLogger("AudioOutput").warning("aplay not found; audio goes to a null sink")
+        return NullSink(realtime=True)
+    return AplaySink(buffer_ms)
+
+
+_shared: Optional[AudioOutput] = None
+_shared_lock = threading.Lock()
+
+
+def shared_output() -> AudioOutput:
+    """The process-wide output (speech and tones share one device and one volume)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AudioOutput()
+        return _shared
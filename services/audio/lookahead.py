@@ -0,0 +1,160 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from core.config import LOOKAHEAD_LINES, LOOKAHEAD_MAX_MB
+
+
+class LookaheadReader:
+    """
+    Reads lines through a TTS engine while pre-rendering the neighbours.
+
+    While line i plays, a background thread synthesizes i+1 .. i+ahead and
+    i-1 (next first), so next/prev can start playing without synthesis latency.
+    Moving to another line drops rendered audio outside the new window and
+    cancels pending work for the old one; pause() drops everything. Rendered
+    audio is bounded by `max_bytes`.
+
+    The engine needs synthesize(text, lang) -> Audio and speak_audio(audio, text, lang)
+    (PiperTTS); other engines are used through plain speak() without lookahead.
+    """
+
+    def __init__(self, tts, *, ahead: int = LOOKAHEAD_LINES, behind: int = 1,
+                 max_bytes: int = LOOKAHEAD_MAX_MB * 1024 * 1024):
+        self.tts = tts
+        self.ahead = ahead
+        self.behind = behind
+        self.max_bytes = max_bytes
+        self.enabled = hasattr(tts, "synthesize") and hasattr(tts, "speak_audio")
+        self.logger = logging.getLogger("LookaheadReader")
+
+        self._lines: List[Tuple[str, str]] = []
+        self._ready: "OrderedDict[int, object]" = OrderedDict()  # index -> Audio
+        self._bytes = 0
+        self._current: Optional[int] = None
+        self._inflight: Optional[int] = None
+        self._play_when_ready: Optional[int] = None
+        self._failed = set()
+        self._closed = False
+        self._cond = threading.Condition()
+        self.hits = self.misses = 0
+        if self.enabled:
+            threading.Thread(target=self._worker, name="tts-lookahead", daemon=True).start()
+
+    # ---------- control (called from the orchestrator) ----------
+    def set_lines(self, lines: Sequence[Tuple[str, str]]):
+        """Replace the page. Audio already rendered is kept only for unchanged lines."""
+        lines = list(lines)
+        with self._cond:
+            for i in list(self._ready):
+                if i >= len(lines) or i >= len(self._lines) or lines[i] != self._lines[i]:
+                    self._drop(i)
+            self._lines = lines
+            self._failed.clear()
+            self._cond.notify_all()
+
+    def play(self, index: int):
+        if not 0 <= index < len(self._lines):
+            return
+        text, lang = self._lines[index]
+        if not self.enabled:
+            self.tts.speak(text, lang)
+            return
+        with self._cond:
+            self._current = index
+            self._play_when_ready = None
+            audio = self._ready.get(index)
+            wait = audio is None and self._inflight == index
+            if wait:
+                self._play_when_ready = index  # the worker is already rendering it
+            keep = set(self._window(index))
+            for i in list(self._ready):
+                if i not in keep and i != index:
+                    self._drop(i)
+            self._cond.notify_all()
+        if audio is not None:
+            self.hits += 1
+            self.tts.speak_audio(audio, text, lang)
+        elif not wait:
+            self.misses += 1
+            self.tts.speak(text, lang)
+        else:
+            self.misses += 1
+            self.tts.stop()  # silence the previous line while this one finishes rendering
+
+    def pause(self):
+        with self._cond:
+            self._current = None
+            self._play_when_ready = None
+            self._failed.clear()
+            for i in list(self._ready):
+                self._drop(i)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"ready": sorted(self._ready), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+    # ---------- worker ----------
+    def _window(self, index: int) -> List[int]:
+        nxt = [index + k for k in range(1, self.ahead + 1)]
+        prv = [index - k for k in range(1, self.behind + 1)]
+        return [i for i in nxt[:1] + prv + nxt[1:] if 0 <= i < len(self._lines)]
+
+    def _next_job(self) -> Optional[Tuple[int, str, str]]:
+        if self._current is None:
+            return None
+        for i in self._window(self._current):
+            if i not in self._ready and i not in self._failed:
+                if self._bytes >= self.max_bytes:
+                    return None
+                text, lang = self._lines[i]
+                return i, text, lang
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None and not self._closed:
+                    self._cond.wait()
+                    job = self._next_job()
+                if self._closed:
+                    return
+                index, text, lang = job
+                self._inflight = index
+            try:
+                audio = self.tts.synthesize(text, lang)
+            except Exception as e:
+                self.logger.warning(f"lookahead synthesis failed for line {index}: {e}")
+                audio = None
+            with self._cond:
+                self._inflight = None
+                if audio is None:
+                    self._failed.add(index)  # no retry loop; play() falls back to speak()
+                    if self._play_when_ready == index:
+                        self._play_when_ready = None
+                        self.tts.speak(text, lang)
+                    continue
+                if self._play_when_ready == index:
+                    self._play_when_ready = None
+                    play_now = True
+                else:
+                    play_now = False
+                    valid = (index < len(self._lines) and self._lines[index] == (text, lang)
+                             and self._current is not None and index in self._window(self._current))
+                    if valid:
+                        self._ready[index] = audio
+                        self._bytes += len(audio.pcm)
+            if play_now:
+                self.tts.speak_audio(audio, text, lang)
+
+    def _drop(self, index: int):
+        audio = self._ready.pop(index, None)
+        if audio is not None:
+            self._bytes -= len(audio.pcm)
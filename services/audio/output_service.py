@@ -1,31 +1,48 @@
-import logging
-
-
-class OutputService:
-    def __init__(self, tts_engine):
-        self.tts = tts_engine
-        self.feedback_lang = "AR"
-        self.logger = logging.getLogger("OutputService")
-
-    def play_tts(self, text: str, lang: str):
-        self.logger.info(f"Play TTS in {lang}: {text}")
-        self.tts.speak(text, lang)
-
-    def play_tone(self, tone_type: str):
-        tones = {
-            "capture_ok": "Beep ",
-            "mode_switch": "Beep ",
-            "volume_step": "Beep ",
-            "language_changed": "Beep ",
-        }
-        tone = tones.get(tone_type, "Beep ")
-        self.logger.info(f"Playing tone: {tone_type}")
-        print(f"[Tone] {tone}")
-
-    def toggle_feedback_language(self):
-        self.feedback_lang = "EN" if self.feedback_lang == "AR" else "AR"
-        msg = f"Language changed to {self.feedback_lang}"
-        self.logger.info(msg)
-        self.play_tone("language_changed")
-        self.tts.speak(msg, self.feedback_lang)
-
+import logging
+
+
+class OutputService:
+    def __init__(self, tts_engine):
+        self.tts = tts_engine
+        self.feedback_lang = "AR"
+        self.logger = logging.getLogger("OutputService")
+
+    def start(self):
+        # warm up the TTS engine (e.g. the TTSWorker process) before the first phrase
+        if hasattr(self.tts, "start"):
+            self.tts.start()
+
+    def stop(self):
+        if hasattr(self.tts, "close"):
+            self.tts.close()
+
+    def set_volume(self, level: float):
+        # in-stream gain (0..1) on the shared audio output: speech and mixed tones follow it
+        # whichever TTS engine is in use (the console TTS has no player of its own)
+        from services.audio.audio_output import shared_output
+
+        out = shared_output()
+        out.set_volume(level)
+        player = getattr(self.tts, "player", None)
+        if player is not out and hasattr(player, "set_volume"):
+            player.set_volume(level)  # an engine with its own output
+        self.logger.debug("Volume %.2f", level)
+
+    def play_tts(self, text: str, lang: str):
+        self.logger.debug("Play TTS in %s: %s", lang, text)
+        self.tts.speak(text, lang)
+
+    def play_tone(self, tone_type: str):
+        # pre-rendered earcon mixed over any speech (services.audio.tones)
+        from services.audio.tones import beep
+
+        self.logger.debug("Playing tone %s", tone_type)
+        beep(tone_type)
+
+    def toggle_feedback_language(self):
+        self.feedback_lang = "EN" if self.feedback_lang == "AR" else "AR"
+        msg = f"Language changed to {self.feedback_lang}"
+        self.logger.info(msg)
+        self.play_tone("language_changed")
+        self.tts.speak(msg, self.feedback_lang)
+
@@ -0,0 +1,232 @@
+import json
+import logging
+import shutil
+import subprocess
+import threading
+from contextlib import closing, nullcontext
+from pathlib import Path
+from typing import Iterator
+
+from core import events as E, tracing
+from core.config import PIPER_MODEL, PIPER_RATE, PIPER_SPEAKER
+from services.audio.tts_cache import Audio, PhraseCache
+from services.audio.tts_manager import ITTS
+
+
+class PiperVoiceBackend:
+    """
+    Piper synthesis for one voice model. Uses the `piper` Python package when it is
+    installed (model loaded once, on first use) and the `piper` CLI otherwise.
+    """
+
+    def __init__(self, model: str = PIPER_MODEL, speaker: str = PIPER_SPEAKER, intra_op_threads: int = 0):
+        self.model = str(model)
+        self.speaker = int(speaker) if str(speaker).strip().isdigit() else None
+        self.intra_op_threads = intra_op_threads  # 0 = onnxruntime default
+        self._voice = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger("PiperVoiceBackend")
+
+    def start(self):
+        """Load the voice now instead of on the first phrase."""
+        self._load()
+
+    def close(self):
+        with self._lock:
+            self._voice = None  # the ONNX session is freed with the last reference
+
+    @property
+    def name(self) -> str:
+        return Path(self.model).stem + (f"#{self.speaker}" if self.speaker is not None else "")
+
+    @property
+    def sample_rate(self) -> int:
+        voice = self._load()
+        if voice is not None:
+            return int(voice.config.sample_rate)
+        try:
+            cfg = json.loads(Path(self.model + ".json").read_text(encoding="utf-8"))
+            return int(cfg["audio"]["sample_rate"])
+        except (OSError, ValueError, KeyError):
+            return 22050
+
+    def _load(self):
+        if self._voice is None:
+            with self._lock:
+                if self._voice is None:
+                    try:
+                        from piper import PiperVoice  # optional dependency
+                    except ImportError:
+                        return None
+                    self.logger.info(f"Loading Piper voice {self.model}")
+                    self._voice = PiperVoice.load(self.model)
+                    if self.intra_op_threads > 0:
+                        self._voice.session = self._session()
+        return self._voice
+
+    def _session(self):
+        import onnxruntime
+
+        opts = onnxruntime.SessionOptions()
+        opts.intra_op_num_threads = self.intra_op_threads
+        opts.inter_op_num_threads = 1
+        opts.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        opts.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return onnxruntime.InferenceSession(self.model, sess_options=opts, providers=["CPUExecutionProvider"])
+
+    def stream(self, text: str, rate: float = PIPER_RATE) -> Iterator[bytes]:
+        """Yield 16-bit mono PCM chunks (one per sentence with the Python API)."""
+        length_scale = 1.0 / rate if rate > 0 else 1.0
+        voice = self._load()
+        if voice is None:
+            yield self._synthesize_cli(text, length_scale)
+            return
+        if hasattr(voice, "synthesize_stream_raw"):  # piper-tts <= 1.2
+            yield from voice.synthesize_stream_raw(text, speaker_id=self.speaker, length_scale=length_scale)
+            return
+        from piper import SynthesisConfig  # piper-tts >= 1.3
+        cfg = SynthesisConfig(speaker_id=self.speaker, length_scale=length_scale)
+        for chunk in voice.synthesize(text, syn_config=cfg):
+            yield chunk.audio_int16_bytes
+
+    def synthesize(self, text: str, rate: float = PIPER_RATE) -> Audio:
+        return Audio(b"".join(self.stream(text, rate)), self.sample_rate)
+
+    def _synthesize_cli(self, text: str, length_scale: float) -> bytes:
+        exe = shutil.which("piper")
+        if exe is None:
+            raise RuntimeError("piper is not installed (neither the Python package nor the CLI)")
+        cmd = [exe, "--model", self.model, "--output-raw", "--length_scale", f"{length_scale:.3f}"]
+        if self.speaker is not None:
+            cmd += ["--speaker", str(self.speaker)]
+        p = subprocess.run(cmd, input=text.encode("utf-8"), stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE, timeout=60)
+        if p.returncode != 0:
+            raise RuntimeError(f"piper failed rc={p.returncode}: {p.stderr.decode(errors='ignore')[-200:]}")
+        return p.stdout
+
+
+class PiperTTS(ITTS):
+    """
+    ITTS on Piper with an on-disk phrase cache keyed by (text, voice, rate).
+    speak() returns immediately; synthesis + playback run on a background thread,
+    and TTS_DONE is emitted on the bus when a phrase finishes playing (not when stopped),
+    or with an "error" when it could not be synthesized.
+    On a cache miss the backend's chunks (one per sentence) are played as they are
+    synthesized, so the first sentence is heard while the rest is still rendering.
+    The backend is one voice, or a VoicePool that picks the voice by the phrase's lang.
+    """
+
+    def __init__(self, bus=None, backend: PiperVoiceBackend = None, cache: PhraseCache = None,
+                 player=None, rate: float = PIPER_RATE):
+        self.bus = bus
+        self.backend = backend or PiperVoiceBackend()
+        self.cache = cache if cache is not None else PhraseCache()
+        if player is None:
+            from services.audio.audio_output import shared_output  # numpy: only with a real voice
+            player = shared_output()
+        self.player = player
+        self.rate = rate
+        self.logger = logging.getLogger("PiperTTS")
+        self._gen = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        if hasattr(self.player, "start"):
+            self.player.start()  # output thread + sink open before the first phrase
+        # backends with their own lifecycle (TTSWorker) are warmed up here
+        if hasattr(self.backend, "start"):
+            try:
+                self.backend.start()
+            except Exception as e:
+                self.logger.error(f"TTS backend failed to start (will retry on first use): {e}")
+
+    def close(self):
+        self.stop()
+        if hasattr(self.backend, "close"):
+            self.backend.close()
+        if hasattr(self.player, "close"):
+            self.player.close()
+
+    def synthesize(self, text: str, lang: str = None) -> Audio:
+        audio = self._cached(text, lang)
+        if audio is None:
+            with self._voice(lang) as backend, tracing.span("tts.synthesize", chars=len(text)):
+                audio = backend.synthesize(text, self.rate)
+            if self.cache:
+                self.cache.put(text, self._voice_name(lang), self.rate, audio)
+        return audio
+
+    def _voice_name(self, lang: str) -> str:
+        return self.backend.name_for(lang) if hasattr(self.backend, "use") else self.backend.name
+
+    def _voice(self, lang: str):
+        # VoicePool: the voice stays pinned (not evicted) while it is in use
+        return self.backend.use(lang) if hasattr(self.backend, "use") else nullcontext(self.backend)
+
+    def _cached(self, text: str, lang: str):
+        return self.cache.get(text, self._voice_name(lang), self.rate) if self.cache else None
+
+    @tracing.traced("tts.speak")
+    def speak(self, text: str, lang: str = None):
+        self.logger.info(f"TTS speaking [{lang}]: {text}")
+        self._start(text, lang, None)
+
+    def speak_audio(self, audio: Audio, text: str, lang: str = None):
+        """Play already synthesized audio (e.g. from the lookahead reader) with speak() semantics."""
+        self.logger.info(f"TTS speaking [{lang}] (pre-rendered): {text}")
+        self._start(text, lang, audio)
+
+    def _start(self, text: str, lang: str, audio):
+        with self._lock:
+            self._gen += 1
+            gen = self._gen
+        self.player.stop()
+        threading.Thread(target=tracing.bind(self._run), args=(gen, text, lang, audio), name="piper-speak", daemon=True).start()
+
+    def stop(self):
+        self.logger.info("Stopping TTS")
+        with self._lock:
+            self._gen += 1
+        self.player.stop()
+
+    def _run(self, gen: int, text: str, lang: str, audio=None):
+        # the generation is re-checked inside the output, atomically with taking its own
+        # (speak()/stop() bump self._gen before player.stop(), so one of the two catches it)
+        current = lambda: gen == self._gen
+        try:
+            if audio is None:
+                audio = self._cached(text, lang)
+            if audio is not None:
+                tracing.mark("tts.first_audio")
+                finished = self.player.play(audio, still_current=current)
+            else:
+                finished = self._stream(text, lang, current)
+        except Exception as e:
+            self.logger.error(f"Piper synthesis failed: {e}")
+            # the phrase is over all the same: whoever waits for it (auto-read) moves on
+            if current() and self.bus is not None:
+                self.bus.emit(E.TTS_DONE, {"text": text, "lang": lang, "error": str(e)})
+            return
+        if finished and current() and self.bus is not None:
+            self.bus.emit(E.TTS_DONE, {"text": text, "lang": lang})
+
+    def _stream(self, text: str, lang: str, current) -> bool:
+        """Cache miss: play chunks while the rest of the phrase is synthesized; cache it if complete."""
+        chunks = []
+        with self._voice(lang) as backend:
+            rate = backend.sample_rate
+
+            def produce():
+                with closing(backend.stream(text, self.rate)) as stream:
+                    for chunk in stream:
+                        if not chunks:
+                            tracing.mark("tts.first_audio")
+                        chunks.append(chunk)
+                        yield chunk
+
+            with closing(produce()) as pcm:  # a stop() abandons it: release the backend now, not at GC
+                finished = self.player.play_stream(pcm, rate, still_current=current)
+        if finished and self.cache:
+            self.cache.put(text, self._voice_name(lang), self.rate, Audio(b"".join(chunks), rate))
+        return finished
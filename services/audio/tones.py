@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+from core.config import TONE_CACHE_DIR, TONE_LEVEL
+
+# earcon -> notes (Hz, ms); 0 Hz is a rest. Short and distinct: they play over speech.
+TONES: Dict[str, Sequence[Tuple[float, float]]] = {
+    "default": ((1000, 50),),
+    "capture_ok": ((880, 60),),
+    "mode_switch": ((660, 70), (0, 30), (990, 70)),
+    "volume_step": ((1200, 35),),
+    "language_changed": ((523, 60), (784, 60)),
+    "qr_valid_payload": ((1047, 50), (0, 20), (1319, 70)),
+    "qr_invalid_payload": ((330, 120),),
+    "switching_ssid": ((880, 40), (0, 40), (880, 40)),
+    "nmcli_connect_ok": ((784, 60), (0, 20), (1047, 60), (0, 20), (1319, 90)),
+    "nmcli_connect_failed": ((440, 90), (0, 30), (330, 140)),
+    "online_after_qr": ((1319, 50), (0, 20), (1568, 50), (0, 20), (2093, 80)),
+}
+
+_EDGE_MS = 5.0  # raised-cosine attack/release per note (no clicks)
+
+
+def render(notes: Sequence[Tuple[float, float]], sample_rate: int, level: float = TONE_LEVEL):
+    """Notes -> int16 PCM at sample_rate."""
+    import numpy as np
+
+    parts = []
+    for freq, ms in notes:
+        n = max(1, int(sample_rate * ms / 1000.0))
+        if not freq:
+            parts.append(np.zeros(n, dtype=np.float32))
+            continue
+        t = np.arange(n, dtype=np.float32) / sample_rate
+        note = np.sin(2.0 * np.pi * freq * t).astype(np.float32)
+        e = min(n // 2, int(sample_rate * _EDGE_MS / 1000.0))
+        if e:
+            ramp = 0.5 - 0.5 * np.cos(np.linspace(0.0, np.pi, e, dtype=np.float32))
+            note[:e] *= ramp
+            note[-e:] *= ramp[::-1]
+        parts.append(note)
+    pcm = np.concatenate(parts) * (level * 32767.0)
+    return pcm.astype(np.int16)
+
+
+class ToneBank:
+    """
+    Every earcon in TONES rendered to PCM once per sample rate. A rendered bank is
+    saved as one .npz under TONE_CACHE_DIR (keyed by the tone table, the level and
+    the rate), so later boots only load it. Arrays are read-only and shared with the
+    audio output, which mixes them without copying.
+    """
+
+    def __init__(self, tones: Dict[str, Sequence[Tuple[float, float]]] = None, *,
+                 cache_dir: Optional[Path] = TONE_CACHE_DIR, level: float = TONE_LEVEL):
+        self.tones = dict(tones or TONES)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.level = level
+        self.logger = logging.getLogger("ToneBank")
+        self._banks: Dict[int, dict] = {}  # sample_rate -> {name: int16 array}
+        self._lock = threading.Lock()
+
+    def start(self, sample_rate: int = None):
+        """Render (or load) the bank for the output's rate now rather than on the first tone."""
+        if sample_rate is None:
+            from services.audio.audio_output import shared_output
+            sample_rate = shared_output().sample_rate
+        self._bank(sample_rate)
+
+    def get(self, name: str, sample_rate: int):
+        bank = self._bank(sample_rate)
+        pcm = bank.get(name)
+        if pcm is None:
+            self.logger.warning(f"unknown tone {name!r}; using default")
+            pcm = bank["default"]
+        return pcm
+
+    def names(self):
+        return sorted(self.tones)
+
+    # ---------- internals ----------
+    def _key(self, sample_rate: int) -> str:
+        spec = repr((sorted(self.tones.items()), self.level, sample_rate, _EDGE_MS))
+        return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:12]
+
+    def _bank(self, sample_rate: int) -> dict:
+        bank = self._banks.get(sample_rate)
+        if bank is None:
+            with self._lock:
+                bank = self._banks.get(sample_rate)
+                if bank is None:
+                    bank = self._banks[sample_rate] = self._load_or_render(int(sample_rate))
+        return bank
+
+    def _load_or_render(self, sample_rate: int) -> dict:
+        import numpy as np
+
+        path = self.cache_dir / f"tones_{sample_rate}_{self._key(sample_rate)}.npz" if self.cache_dir else None
+        bank = None
+        if path is not None and path.is_file():
+            try:
+                with np.load(path) as z:
+                    bank = {name: z[name] for name in z.files}
+                if set(bank) != set(self.tones):
+                    bank = None
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"tone cache {path.name} unreadable ({e}); re-rendering")
+                bank = None
+        if bank is None:
+            bank = {name: render(notes, sample_rate, self.level) for name, notes in self.tones.items()}
+            if path is not None:
+                self._save(path, bank)
+        for pcm in bank.values():
+            pcm.flags.writeable = False
+        self.logger.info(f"tone bank ready: {len(bank)} tones at {sample_rate} Hz")
+        return bank
+
+    def _save(self, path: Path, bank: dict):
+        import numpy as np
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **bank)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.warning(f"tone cache not saved: {e}")
+
+
+_shared: Optional[ToneBank] = None
+_shared_lock = threading.Lock()
+
+
+def shared_bank() -> ToneBank:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ToneBank()
+        return _shared
+
+
+def beep(name: str, **_kw) -> None:
+    """Mix the named earcon over whatever is playing (returns at once)."""
+    try:
+        from services.audio.audio_output import shared_output
+
+        out = shared_output()
+        out.mix(shared_bank().get(name, out.sample_rate))
+    except Exception as e:  # an earcon must never break the caller (e.g. handle_frame)
+        logging.getLogger("ToneBank").error(f"tone {name} failed: {e}")
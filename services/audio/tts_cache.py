@@ -0,0 +1,118 @@
+from __future__ import annotations
+"""
+On-disk cache of synthesized speech.
+
+Key = (text, voice, rate); value = mono 16-bit PCM stored as a small WAV file
+under core.config.TTS_CACHE_DIR. The directory is a size-bounded LRU (file
+mtime keeps recency across restarts), so fixed prompts and re-read lines
+replay without running the synthesizer again.
+"""
+
+import hashlib, logging, os, threading, wave
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from core.config import TTS_CACHE_DIR, TTS_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Audio:
+    pcm: bytes          # signed 16-bit little-endian, mono
+    sample_rate: int
+
+    @property
+    def duration_s(self) -> float:
+        return len(self.pcm) / 2.0 / max(1, self.sample_rate)
+
+def cache_key(text: str, voice: str, rate: float) -> str:
+    raw = f"{voice}\0{rate:.3f}\0{text}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+class PhraseCache:
+    def __init__(self, root: Optional[Path] = None, *, max_bytes: int = TTS_CACHE_MAX_MB * 1024 * 1024):
+        self.root = Path(root or TTS_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, LRU order
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._load_index()
+
+    def get(self, text: str, voice: str, rate: float) -> Optional[Audio]:
+        key = cache_key(text, voice, rate)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with wave.open(str(path), "rb") as w:
+                audio = Audio(w.readframes(w.getnframes()), w.getframerate())
+            os.utime(path)
+        except (OSError, EOFError, wave.Error):
+            with self._lock:
+                self._bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, text: str, voice: str, rate: float, audio: Audio) -> None:
+        key = cache_key(text, voice, rate)
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with wave.open(str(tmp), "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(audio.sample_rate)
+                w.writeframes(audio.pcm)
+            os.replace(tmp, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning("tts_cache_write_failed %s", e)
+            return
+        with self._lock:
+            self._bytes += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._trim()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._index), "bytes": self._bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    # ---------- internals ----------
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.wav"
+
+    def _load_index(self) -> None:
+        if not self.root.is_dir():
+            return
+        entries = []
+        for p in self.root.glob("*.wav"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, p.stem, st.st_size))
+        for _mtime, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+        self._trim()
+
+    def _trim(self) -> None:
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
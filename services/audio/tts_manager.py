@@ -1,6 +1,9 @@
 import logging
+import threading
 from abc import ABC, abstractmethod
 
+from core import events as E, tracing
+
 
 class ITTS(ABC):
     @abstractmethod
@@ -13,13 +16,54 @@ class ITTS(ABC):
 
 
 class TTSManager(ITTS):
-    def __init__(self):
+    """
+    Console TTS: logs the phrase. It "finishes" at once, so TTS_DONE is emitted right
+    after speak() returns, from a short thread, as PiperTTS emits it from playback
+    (never from inside speak(): auto-read would recurse through the page on a sync bus).
+    """
+
+    def __init__(self, bus=None):
+        self.bus = bus
         self.logger = logging.getLogger("TTSManager")
+        self._gen = 0
+        self._lock = threading.Lock()
 
-    def speak(self, text: str, lang: str):
-        self.logger.info(f"TTS speaking [{lang}]: {text}")
-        print(f"[{lang}] {text}")
+    @tracing.traced("tts.speak")
+    def speak(self, text: str, lang: str = None):
+        tracing.mark("tts.first_audio")
+        self.logger.info("TTS speaking [%s]: %s", lang, text)
+        if self.bus is None:
+            return
+        with self._lock:
+            self._gen += 1
+            gen = self._gen
+        threading.Thread(target=self._done, args=(gen, text, lang), name="console-tts", daemon=True).start()
 
     def stop(self):
         self.logger.info("Stopping TTS")
-        print("TTS stopped")
+        with self._lock:
+            self._gen += 1
+
+    def _done(self, gen: int, text: str, lang: str):
+        with self._lock:
+            if gen != self._gen:
+                return  # stopped or superseded: no TTS_DONE, like PiperTTS
+        self.bus.emit(E.TTS_DONE, {"text": text, "lang": lang})
+
+
+def create_tts(bus=None) -> ITTS:
+    """
+    Piper when enabled and at least one voice model is installed: a VoicePool with one
+    voice per language (NABD_TTS_VOICES), each synthesizing in a warm TTSWorker process
+    unless NABD_TTS_WORKER=0. The console TTS otherwise.
+    """
+    from core.config import PIPER_ENABLED
+
+    if PIPER_ENABLED:
+        from services.audio.voice_pool import VoicePool, default_voices
+        voices = default_voices()
+        if voices:
+            from services.audio.piper_tts import PiperTTS
+            return PiperTTS(bus, backend=VoicePool(voices))
+    logging.getLogger("TTSManager").info("Piper disabled or model missing; using console TTS")
+    return TTSManager(bus)
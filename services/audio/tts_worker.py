@@ -0,0 +1,238 @@
+import logging
+import multiprocessing as mp
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterator, Optional
+
+from core.config import PIPER_MODEL, PIPER_RATE, PIPER_SPEAKER, TTS_WORKER_THREADS
+from services.audio.piper_tts import PiperVoiceBackend
+from services.audio.tts_cache import Audio
+
+
+def _worker_main(conn, model: str, speaker: str, intra_op_threads: int):
+    """
+    Child process: keeps one Piper voice (ONNX session) loaded and serves requests.
+
+    parent -> child: ("synth", req_id, text, rate) | ("cancel", req_id) | ("quit",)
+    child -> parent: ("ready", sample_rate) once, then per request
+                     ("chunk", req_id, pcm)* followed by ("done", req_id) or ("error", req_id, msg)
+
+    Requests run one at a time, in order. Messages that arrive while one is being
+    synthesized are kept for later, except a cancel: for the current request it stops
+    it between sentences, for a queued one it drops it before it starts.
+    """
+    backend = PiperVoiceBackend(model, speaker, intra_op_threads=intra_op_threads)
+    try:
+        backend._load()
+        conn.send(("ready", backend.sample_rate))
+    except Exception as e:
+        conn.send(("error", None, f"load failed: {e}"))
+        return
+    pending: Deque[tuple] = deque()
+    cancelled = set()
+    last = 0  # newest request started; cancels for older ones are stale
+    while True:
+        try:
+            msg = pending.popleft() if pending else conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if msg[0] == "quit":
+            return
+        if msg[0] == "cancel":
+            if msg[1] > last:
+                cancelled.add(msg[1])
+            continue
+        if msg[0] != "synth":
+            continue
+        _op, req_id, text, rate = msg
+        last = req_id
+        if req_id in cancelled:
+            cancelled.discard(req_id)
+            continue
+        try:
+            for chunk in backend.stream(text, rate):
+                stop = False
+                while conn.poll():  # between sentences
+                    m = conn.recv()
+                    if m[0] == "cancel" and m[1] == req_id:
+                        stop = True
+                    elif m[0] == "cancel":
+                        if m[1] > last:
+                            cancelled.add(m[1])
+                    else:
+                        pending.append(m)
+                if stop:
+                    break
+                conn.send(("chunk", req_id, chunk))
+            conn.send(("done", req_id))
+        except Exception as e:
+            conn.send(("error", req_id, str(e)))
+
+
+class TTSWorker:
+    """
+    Long-lived synthesis process with a warm inference session.
+
+    Same interface as PiperVoiceBackend (name, sample_rate, stream, synthesize), so
+    PiperTTS can use either. Requests are served one at a time; stream() yields PCM
+    chunks (one per sentence) as the worker produces them.
+
+    No lock is held while a stream() is suspended at a yield, so a slow (or
+    abandoned) consumer never blocks the next request. The pipe has one reader at a
+    time: whichever stream() needs a message reads it, outside the lock, and files
+    messages for other requests in their inboxes. Messages for a request whose
+    consumer has gone are dropped.
+    """
+
+    def __init__(self, model: str = PIPER_MODEL, speaker: str = PIPER_SPEAKER,
+                 intra_op_threads: int = TTS_WORKER_THREADS, start_timeout_s: float = 60.0):
+        self._info = PiperVoiceBackend(model, speaker)  # name / sample_rate without loading the model
+        self.model = str(model)
+        self.speaker = speaker
+        self.intra_op_threads = intra_op_threads
+        self.start_timeout_s = start_timeout_s
+        self.logger = logging.getLogger("TTSWorker")
+        self._proc: Optional[mp.Process] = None
+        self._conn = None
+        self._sample_rate: Optional[int] = None
+        self._lock = threading.Condition()  # process/pipe state, inboxes; held only for bookkeeping
+        self._req = 0
+        self._inbox: Dict[int, Deque[tuple]] = {}  # live request -> messages read on its behalf
+        self._reading = False  # a thread is blocked in conn.recv()
+
+    @property
+    def name(self) -> str:
+        return self._info.name
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate or self._info.sample_rate
+
+    @property
+    def pid(self) -> Optional[int]:
+        proc = self._proc
+        return proc.pid if proc is not None and proc.is_alive() else None
+
+    def start(self):
+        with self._lock:
+            self._ensure_started()
+
+    def close(self):
+        with self._lock:
+            proc, conn = self._proc, self._conn
+            self._proc = self._conn = None
+            self._lock.notify_all()
+        if conn is not None:
+            try:
+                conn.send(("quit",))
+            except (OSError, BrokenPipeError):
+                pass
+        if proc is not None:
+            proc.join(2.0)
+            if proc.is_alive():
+                proc.kill()
+
+    def stream(self, text: str, rate: float = PIPER_RATE) -> Iterator[bytes]:
+        with self._lock:
+            self._ensure_started()
+            self._req += 1
+            req_id = self._req
+            conn = self._conn
+            self._inbox[req_id] = deque()
+            try:
+                conn.send(("synth", req_id, text, rate))
+            except (EOFError, OSError) as e:
+                self._inbox.pop(req_id, None)
+                self._reset()
+                raise RuntimeError(f"TTS worker died: {e}")
+        finished = False
+        try:
+            while True:
+                msg = self._next(conn, req_id)
+                if msg[0] == "chunk":
+                    yield msg[2]  # no lock held here
+                elif msg[0] == "done":
+                    finished = True
+                    return
+                else:
+                    finished = True
+                    raise RuntimeError(f"TTS worker: {msg[2]}")
+        except (EOFError, OSError) as e:
+            finished = True
+            with self._lock:
+                if self._conn is conn:
+                    self._reset()
+            raise RuntimeError(f"TTS worker died: {e}")
+        finally:
+            with self._lock:
+                self._inbox.pop(req_id, None)  # later messages for it are dropped on arrival
+                if not finished and self._conn is conn:
+                    self._cancel(conn, req_id)
+
+    def synthesize(self, text: str, rate: float = PIPER_RATE) -> Audio:
+        return Audio(b"".join(self.stream(text, rate)), self.sample_rate)
+
+    # ---------- internals (caller holds _lock) ----------
+    def _ensure_started(self):
+        if self._proc is not None and self._proc.is_alive():
+            return
+        self._reset()
+        ctx = mp.get_context("spawn")  # no inherited threads/locks from the parent
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_worker_main, name="tts-worker", daemon=True,
+                           args=(child, self.model, self.speaker, self.intra_op_threads))
+        proc.start()
+        child.close()
+        try:
+            if not parent.poll(self.start_timeout_s):
+                raise EOFError("timeout")
+            msg = parent.recv()
+        except (EOFError, OSError) as e:
+            proc.kill()
+            raise RuntimeError(f"TTS worker did not start: {e or 'exited'}")
+        if msg[0] != "ready":
+            proc.join(1.0)
+            raise RuntimeError(f"TTS worker: {msg[-1]}")
+        self._proc, self._conn, self._sample_rate = proc, parent, int(msg[1])
+        self.logger.info(f"TTS worker ready pid={proc.pid} voice={self.name} threads={self.intra_op_threads}")
+
+    def _next(self, conn, req_id: int) -> tuple:
+        """The next message for req_id: from its inbox, or read from the pipe (one reader at a time)."""
+        while True:
+            with self._lock:
+                while True:
+                    box = self._inbox[req_id]
+                    if box:
+                        return box.popleft()
+                    if self._conn is not conn:
+                        raise EOFError("worker closed")
+                    if not self._reading:
+                        self._reading = True
+                        break
+                    self._lock.wait()  # another stream() is reading; it files our messages
+            msg = None
+            try:
+                msg = conn.recv()  # outside the lock: the other streams keep going
+            finally:
+                with self._lock:
+                    self._reading = False
+                    if msg is not None and msg[1] != req_id:
+                        box = self._inbox.get(msg[1])
+                        if box is not None:
+                            box.append(msg)
+                    self._lock.notify_all()
+            if msg[1] == req_id:
+                return msg
+
+    def _cancel(self, conn, req_id: int):
+        # consumer stopped early: the worker stops between sentences; leftovers are dropped
+        try:
+            conn.send(("cancel", req_id))
+        except (EOFError, OSError):
+            self._reset()
+
+    def _reset(self):
+        if self._proc is not None and self._proc.is_alive():
+            self._proc.kill()
+        self._proc = self._conn = None
+        self._lock.notify_all()
@@ -0,0 +1,259 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from core.config import DEFAULT_LANG, PIPER_RATE, TTS_VOICE_BUDGET_MB, TTS_VOICE_MEM_FACTOR, TTS_VOICES
+
+# a spawned TTSWorker costs an interpreter + onnxruntime on top of the model itself
+_WORKER_OVERHEAD_MB = 45.0
+# close() waits this long for the default voice's background load
+_WARM_JOIN_S = 30.0
+
+
+def parse_voices(spec: str) -> Dict[str, str]:
+    """"ar=/path/ar.onnx,en=/path/en.onnx" -> {"ar": ..., "en": ...}"""
+    voices = {}
+    for item in spec.split(","):
+        lang, sep, model = item.partition("=")
+        if sep and lang.strip() and model.strip():
+            voices[normalize_lang(lang)] = model.strip()
+    return voices
+
+
+def normalize_lang(lang: Optional[str]) -> str:
+    # "AR" (OutputService), "ar-SA", "en_US" -> "ar" / "en"
+    return (lang or "").strip().lower().replace("_", "-").split("-")[0]
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class _Slot:
+    __slots__ = ("lang", "model", "backend", "cost_mb", "users")
+
+    def __init__(self, lang, model, backend, cost_mb):
+        self.lang = lang
+        self.model = model
+        self.backend = backend
+        self.cost_mb = cost_mb
+        self.users = 0
+
+
+class VoicePool:
+    """
+    One Piper voice per language, kept loaded up to a RAM budget.
+
+    Voices are loaded on first use and kept in LRU order. When loading one would exceed
+    budget_mb, the least recently used idle voices are closed first (a voice that is
+    synthesizing is never evicted). A voice larger than the whole budget still loads,
+    alone, with a warning.
+
+    Memory per voice is estimated as model size x mem_factor (+ worker process overhead),
+    then replaced by the worker's measured RSS once it is running. stats() reports
+    loads/evictions/hits per language to size TTS_VOICE_BUDGET_MB for a given Pi.
+
+    Languages without a voice fall back to default_lang.
+    """
+
+    def __init__(self, voices: Dict[str, str] = None, *, budget_mb: float = TTS_VOICE_BUDGET_MB,
+                 default_lang: str = DEFAULT_LANG, factory: Callable[[str], object] = None,
+                 mem_factor: float = TTS_VOICE_MEM_FACTOR):
+        self.voices = {normalize_lang(k): str(v) for k, v in (voices or default_voices()).items()}
+        self.default_lang = normalize_lang(default_lang)
+        if self.default_lang not in self.voices and self.voices:
+            self.default_lang = next(iter(self.voices))
+        self.budget_mb = float(budget_mb)
+        self.mem_factor = mem_factor
+        self.factory = factory or default_factory
+        self.logger = logging.getLogger("VoicePool")
+        self._loaded: "OrderedDict[str, _Slot]" = OrderedDict()  # lang -> slot, LRU first
+        self._names: Dict[str, str] = {}
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._warm: Optional[threading.Thread] = None
+        self.loads = self.evictions = self.hits = 0
+        self.per_lang: Dict[str, Dict[str, int]] = {}
+
+    # ---------- lookups ----------
+    def resolve(self, lang: Optional[str]) -> str:
+        lang = normalize_lang(lang)
+        return lang if lang in self.voices else self.default_lang
+
+    def name_for(self, lang: Optional[str]) -> str:
+        """Voice name for the phrase cache, without loading the model."""
+        lang = self.resolve(lang)
+        name = self._names.get(lang)
+        if name is None:
+            from services.audio.piper_tts import PiperVoiceBackend
+            name = self._names[lang] = PiperVoiceBackend(self.voices[lang]).name
+        return name
+
+    @property
+    def name(self) -> str:
+        return self.name_for(self.default_lang)
+
+    # ---------- use ----------
+    @contextmanager
+    def use(self, lang: Optional[str]) -> Iterator[object]:
+        """with pool.use("en") as voice: voice.synthesize(...) — the voice is pinned meanwhile."""
+        slot = self._acquire(self.resolve(lang))
+        try:
+            yield slot.backend
+        finally:
+            with self._lock:
+                slot.users -= 1
+
+    def synthesize(self, text: str, rate: float = PIPER_RATE, lang: Optional[str] = None):
+        with self.use(lang) as voice:
+            return voice.synthesize(text, rate)
+
+    def start(self):
+        """
+        Warm the default voice on a background thread and return at once (the others
+        load on first use). A phrase spoken meanwhile waits for that load, not a second one.
+        """
+        if self._warm is not None and self._warm.is_alive():
+            return
+        self._warm = threading.Thread(target=self._warm_default, name="voice-warm", daemon=True)
+        self._warm.start()
+
+    def close(self):
+        warm = self._warm
+        if warm is not None:
+            warm.join(_WARM_JOIN_S)  # a load still in flight would outlive close()
+            if warm.is_alive():
+                self.logger.warning("voice warm-up still running at close")
+        with self._lock:
+            slots = list(self._loaded.values())
+            self._loaded.clear()
+        for s in slots:
+            self._close(s)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "budget_mb": self.budget_mb,
+                "used_mb": round(sum(s.cost_mb for s in self._loaded.values()), 1),
+                "resident": {s.lang: round(s.cost_mb, 1) for s in self._loaded.values()},
+                "loads": self.loads, "evictions": self.evictions, "hits": self.hits,
+                "per_lang": {k: dict(v) for k, v in self.per_lang.items()},
+            }
+
+    # ---------- internals ----------
+    def _warm_default(self):
+        try:
+            with self.use(self.default_lang):
+                pass
+        except Exception as e:  # speak() retries the load and reports it there
+            self.logger.error(f"warming voice {self.default_lang} failed: {e}")
+
+    def _count(self, lang: str, what: str):
+        c = self.per_lang.setdefault(lang, {"loads": 0, "evictions": 0, "hits": 0})
+        c[what] += 1
+
+    def _estimate_mb(self, model: str, backend) -> float:
+        try:
+            size = os.path.getsize(model) / (1024.0 * 1024.0)
+        except OSError:
+            size = 0.0
+        return size * self.mem_factor + (_WORKER_OVERHEAD_MB if hasattr(backend, "pid") else 0.0)
+
+    def _hit(self, lang: str) -> Optional[_Slot]:
+        with self._lock:
+            slot = self._loaded.get(lang)
+            if slot is not None:
+                self._loaded.move_to_end(lang)
+                slot.users += 1
+                self.hits += 1
+                self._count(lang, "hits")
+            return slot
+
+    def _acquire(self, lang: str) -> _Slot:
+        slot = self._hit(lang)
+        if slot is not None:
+            return slot
+        with self._lock:
+            loading = self._loading.setdefault(lang, threading.Lock())
+        with loading:  # one load per language at a time (two copies could blow the budget)
+            slot = self._hit(lang)
+            if slot is not None:
+                return slot
+            model = self.voices[lang]
+            backend = self.factory(model)  # cheap: nothing is loaded before start()
+            cost = self._estimate_mb(model, backend)
+            with self._lock:
+                victims = self._make_room(cost)
+            for v in victims:
+                self._close(v)
+            try:
+                backend.start()  # TTSWorker: spawn + load; in-process backend: load the ONNX session
+                pid = getattr(backend, "pid", None)
+                if pid:
+                    cost = _rss_mb(pid) or cost  # measured beats estimated
+            except Exception:
+                self._close(_Slot(lang, model, backend, cost))
+                raise
+            with self._lock:
+                slot = self._loaded[lang] = _Slot(lang, model, backend, cost)
+                slot.users = 1
+                self.loads += 1
+                self._count(lang, "loads")
+                used = sum(s.cost_mb for s in self._loaded.values())
+            self.logger.info("voice_load lang=%s model=%s mem=%.0fMB used=%.0f/%.0fMB",
+                             lang, Path(model).name, cost, used, self.budget_mb)
+            if used > self.budget_mb:
+                self.logger.warning("voice pool over budget: %.0f/%.0fMB", used, self.budget_mb)
+            return slot
+
+    def _make_room(self, cost: float) -> list:
+        """Caller holds _lock. Unlinks idle LRU voices until cost fits; returns them for closing."""
+        victims = []
+        used = sum(s.cost_mb for s in self._loaded.values())
+        for lang in list(self._loaded):
+            if used + cost <= self.budget_mb:
+                break
+            s = self._loaded[lang]
+            if s.users:
+                continue  # synthesizing right now
+            del self._loaded[lang]
+            used -= s.cost_mb
+            victims.append(s)
+            self.evictions += 1
+            self._count(lang, "evictions")
+            self.logger.info("voice_evict lang=%s freed=%.0fMB", lang, s.cost_mb)
+        return victims
+
+    def _close(self, slot: _Slot):
+        close = getattr(slot.backend, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                self.logger.error(f"closing voice {slot.lang} failed: {e}")
+
+
+def default_voices() -> Dict[str, str]:
+    """TTS_VOICES entries whose model file exists."""
+    return {lang: m for lang, m in parse_voices(TTS_VOICES).items() if Path(m).is_file()}
+
+
+def default_factory(model: str):
+    from core.config import TTS_WORKER, TTS_WORKER_THREADS
+    from services.audio.piper_tts import PiperVoiceBackend
+
+    if TTS_WORKER:
+        from services.audio.tts_worker import TTSWorker
+        return TTSWorker(model, intra_op_threads=TTS_WORKER_THREADS)
+    return PiperVoiceBackend(model)
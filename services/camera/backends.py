@@ -0,0 +1,153 @@
+from __future__ import annotations
+"""
+Frame sources for services.camera.Camera.
+
+A backend fills caller-owned buffers, so the camera's rings are allocated once:
+    open() -> ((h, w), (lh, lw))    start the source, report main and low-res sizes
+    read_into(main, lores) -> bool  block until the next frame; write the low-res gray
+                                    image into `lores` (lh, lw uint8) and, only when
+                                    `main` is not None, the full RGB frame (h, w, 3 uint8)
+    close()
+
+- Picamera2Backend: the Pi camera, started once and kept streaming (no per-capture warmup).
+  The ISP produces a second "lores" YUV420 stream; its Y plane is the gray image, and
+  the main RGB buffer is only copied out when asked for.
+- ReplayBackend: a video file, a directory of images or a list of arrays, paced to fps;
+  lets the camera service run without hardware.
+"""
+
+import logging, time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_IMAGE_EXT = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+
+class Picamera2Backend:
+    def __init__(self, size: Tuple[int, int] = (1640, 1232), fps: float = 10.0,
+                 lores_size: Tuple[int, int] = (640, 480)):
+        self.size = size              # (width, height)
+        self.lores_size = lores_size  # (width, height)
+        self.fps = fps
+        self._cam = None
+
+    def open(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        from picamera2 import Picamera2  # optional dependency (Pi only)
+
+        cam = Picamera2()
+        # picamera2 names formats by little-endian word order: "BGR888" is R,G,B in memory
+        cfg = cam.create_video_configuration(main={"size": self.size, "format": "BGR888"},
+                                             lores={"size": self.lores_size, "format": "YUV420"},
+                                             controls={"FrameRate": self.fps}, buffer_count=4)
+        cam.configure(cfg)
+        cam.start()
+        self._cam = cam
+        w, h = cfg["main"]["size"]
+        lw, lh = cfg["lores"]["size"]
+        return (h, w), (lh, lw)
+
+    def read_into(self, main: Optional[np.ndarray], lores: np.ndarray) -> bool:
+        req = self._cam.capture_request()
+        try:
+            y = req.make_array("lores")  # YUV420 planar: the first lh rows are Y
+            np.copyto(lores, y[:lores.shape[0], :lores.shape[1]])
+            if main is not None:
+                np.copyto(main, req.make_array("main")[:, :main.shape[1], :3])
+        finally:
+            req.release()
+        return True
+
+    def close(self) -> None:
+        cam, self._cam = self._cam, None
+        if cam is not None:
+            try: cam.close()
+            except Exception: pass
+
+def _fit(src: np.ndarray, dst: np.ndarray) -> None:
+    if src.shape[:2] != dst.shape[:2]:
+        cv2.resize(src, (dst.shape[1], dst.shape[0]), dst=dst, interpolation=cv2.INTER_AREA)
+    else:
+        np.copyto(dst, src)
+
+class ReplayBackend:
+    def __init__(self, source: Union[str, Path, Sequence[np.ndarray]], *, fps: float = 10.0, loop: bool = True,
+                 size: Optional[Tuple[int, int]] = None, lores_size: Tuple[int, int] = (640, 480)):
+        self.source = source
+        self.fps = fps
+        self.loop = loop
+        self.size = size  # (width, height); None = size of the first frame
+        self.lores_size = lores_size
+        self._video = None
+        self._frames: List[Union[np.ndarray, Path]] = []
+        self._i = 0
+        self._next_t = 0.0
+
+    def open(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        src = self.source
+        if isinstance(src, (str, Path)) and Path(src).is_file() and Path(src).suffix.lower() not in _IMAGE_EXT:
+            self._video = cv2.VideoCapture(str(src))
+            if not self._video.isOpened():
+                raise RuntimeError(f"cannot open video {src}")
+        elif isinstance(src, (str, Path)):
+            p = Path(src)
+            self._frames = sorted(f for f in p.iterdir() if f.suffix.lower() in _IMAGE_EXT) if p.is_dir() else [p]
+        else:
+            self._frames = list(src)
+        if not self._video and not self._frames:
+            raise RuntimeError(f"no frames in {src!r}")
+        first = self._read()
+        if first is None:
+            raise RuntimeError(f"cannot read frames from {src!r}")
+        self._rewind()
+        if self.size is None:
+            self.size = (first.shape[1], first.shape[0])
+        self._next_t = time.monotonic()
+        lw, lh = min(self.lores_size[0], self.size[0]), min(self.lores_size[1], self.size[1])
+        return (self.size[1], self.size[0]), (lh, lw)
+
+    def read_into(self, main: Optional[np.ndarray], lores: np.ndarray) -> bool:
+        delay = self._next_t - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_t = max(self._next_t, time.monotonic() - 1.0) + 1.0 / self.fps
+        img = self._read()
+        if img is None and self.loop:
+            self._rewind()
+            img = self._read()
+        if img is None:
+            return False
+        small = img if img.shape[:2] == lores.shape else cv2.resize(
+            img, (lores.shape[1], lores.shape[0]), interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small, cv2.COLOR_RGB2GRAY, dst=lores)
+        if main is not None:
+            _fit(img, main)
+        return True
+
+    def close(self) -> None:
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+    # ---------- internals ----------
+    def _rewind(self) -> None:
+        self._i = 0
+        if self._video is not None:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def _read(self) -> Optional[np.ndarray]:
+        if self._video is not None:
+            ok, bgr = self._video.read()
+            return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB) if ok else None
+        if self._i >= len(self._frames):
+            return None
+        item = self._frames[self._i]
+        self._i += 1
+        if isinstance(item, Path):
+            bgr = cv2.imread(str(item), cv2.IMREAD_COLOR)
+            return None if bgr is None else cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        img = np.asarray(item)
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2RGB) if img.ndim == 2 else img[..., :3]
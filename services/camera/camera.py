@@ -1,10 +1,220 @@
 # services/camera.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from core import tracing
+from core.config import CAMERA_FPS, CAMERA_LORES_SIZE, CAMERA_MAIN_HOLD_S, CAMERA_REPLAY, CAMERA_RING_SLOTS, CAMERA_SIZE
+
+
+@dataclass(frozen=True)
+class FrameRef:
+    seq: int                    # increasing frame number (1 = first frame)
+    t: float                    # time.monotonic() when the frame was written
+    lores: np.ndarray           # read-only low-res gray view (always present)
+    image: Optional[np.ndarray] # read-only full-res RGB view; only with borrow(full=True)
+
+
+def default_backend():
+    """Replay source if NABD_CAMERA_REPLAY is set, else the Pi camera if available, else None (stub)."""
+    from services.camera.backends import Picamera2Backend, ReplayBackend
+
+    if CAMERA_REPLAY:
+        return ReplayBackend(CAMERA_REPLAY, fps=CAMERA_FPS, lores_size=CAMERA_LORES_SIZE)
+    try:
+        import picamera2  # noqa: F401
+    except Exception:
+        return None
+    return Picamera2Backend(CAMERA_SIZE, CAMERA_FPS, CAMERA_LORES_SIZE)
+
+
 class Camera:
-    def __init__(self, bus):
+    """
+    خدمة الكاميرا: تملك الحسّاس وتبقيه يعمل.
+
+    خيط التقاط يملأ ring buffer من إطارات numpy محجوزة مسبقاً (slots إطار)، بدقتين:
+      - lores: صورة رمادية صغيرة لكل إطار (للكشف عن QR بشكل دائم وبتكلفة قليلة)،
+      - main: الإطار الكامل RGB، يُنسخ من الكاميرا فقط عند الطلب (borrow(full=True)/capture)
+        ويبقى مفعّلاً main_hold_s بعد آخر طلب.
+      - borrow(): أحدث إطار كـ view للقراءة فقط بدون نسخ؛ الـ slot محجوز حتى نهاية with
+        فلا يكتب عليه خيط الالتقاط، ويمكن لعدة مستهلكين الاستعارة في نفس الوقت.
+      - capture(): نسخة من أحدث إطار كامل (بدون warmup؛ على الأكثر إطار واحد انتظار
+        إن كانت الدقة الكاملة متوقفة) للمستدعي الذي يحتفظ بها.
+    بدون backend (لا كاميرا ولا replay) يبقى السلوك التجريبي القديم لـ capture().
+    """
+    def __init__(self, bus, backend=None, *, slots=CAMERA_RING_SLOTS, main_hold_s=CAMERA_MAIN_HOLD_S):
         self.bus = bus
         self.first_capture = True
+        self.backend = backend if backend is not None else default_backend()
+        self.slots = max(2, slots)
+        self.logger = logging.getLogger("Camera")
+
+        self.main_hold_s = main_hold_s
+        self._ring: Optional[np.ndarray] = None
+        self._lores: Optional[np.ndarray] = None
+        self._has_main = [False] * self.slots
+        self._main_until = 0.0           # الدقة الكاملة مطلوبة حتى هذا الوقت
+        self._seq = [0] * self.slots     # رقم الإطار في كل slot
+        self._t = [0.0] * self.slots
+        self._pins = [0] * self.slots    # عدد المستعيرين لكل slot
+        self._latest = -1
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.frames = self.main_frames = self.dropped = 0
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self.backend is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        (h, w), (lh, lw) = self.backend.open()
+        if self._ring is None or self._ring.shape[1:3] != (h, w):
+            self._ring = np.empty((self.slots, h, w, 3), dtype=np.uint8)
+        if self._lores is None or self._lores.shape[1:3] != (lh, lw):
+            self._lores = np.empty((self.slots, lh, lw), dtype=np.uint8)
+        with self._cond:
+            self._latest = -1  # لا نعطي إطاراً قديماً من تشغيل سابق
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="camera", daemon=True)
+        self._thread.start()
+        self.logger.info(f"camera started {w}x{h} (lores {lw}x{lh}) slots={self.slots}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        if self.backend is not None:
+            self.backend.close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
 
+    # ---------- consumers ----------
+    @contextmanager
+    def borrow(self, newer_than: int = 0, timeout_s: float = 2.0, *, full: bool = False) -> Iterator[FrameRef]:
+        """
+        with camera.borrow() as f: ...  — zero-copy access to the newest frame with seq > newer_than.
+        full=True also needs the full-res image (turns the main stream on if it was idle).
+        Raises TimeoutError if no such frame arrives in time.
+        """
+        def ready():
+            i = self._latest
+            return i >= 0 and self._seq[i] > newer_than and (not full or self._has_main[i])
+
+        with self._cond:
+            if full:
+                self._main_until = max(self._main_until, time.monotonic() + self.main_hold_s)
+            if not self._cond.wait_for(ready, timeout_s):
+                raise TimeoutError("no camera frame")
+            slot = self._latest
+            self._pins[slot] += 1
+            image = self._ring[slot].view() if full else None
+            ref = FrameRef(self._seq[slot], self._t[slot], self._lores[slot].view(), image)
+        ref.lores.flags.writeable = False
+        if image is not None:
+            image.flags.writeable = False
+        try:
+            yield ref
+        finally:
+            with self._cond:
+                self._pins[slot] -= 1
+
+    @tracing.traced("camera.capture")
     def capture(self, has_text=True):
+        if self.backend is None:
+            return self._stub_capture(has_text)
+        self.start()
+        try:
+            with self.borrow(full=True) as f:
+                frame = f.image.copy()
+        except TimeoutError:
+            self.logger.warning("capture: no frame from camera")
+            return None
+        self._emit("CAMERA_SHOT_OK")
+        return frame
+
+    @tracing.traced("camera.capture_burst")
+    def capture_burst(self, n=5, interval_s=0.03):
+        """
+        يلتقط n إطارات متتالية مختلفة (للاختيار الأوضح بينها لاحقاً عبر qr_detector.classify_burst).
+        """
+        if self.backend is None:
+            return []
+        self.start()
+        frames: List[np.ndarray] = []
+        seq = 0
+        for i in range(n):
+            if i and interval_s > 0:
+                time.sleep(interval_s)
+            try:
+                with self.borrow(newer_than=seq, full=True) as f:
+                    seq = f.seq
+                    frames.append(f.image.copy())
+            except TimeoutError:
+                break
+        if frames:
+            self._emit("CAMERA_SHOT_OK")
+        return frames
+
+    def stats(self) -> dict:
+        with self._cond:
+            latest = self._seq[self._latest] if self._latest >= 0 else 0
+            return {"frames": self.frames, "main_frames": self.main_frames, "dropped": self.dropped,
+                    "latest_seq": latest, "pinned": sum(1 for p in self._pins if p)}
+
+    def _emit(self, event, data=None):
+        if self.bus is not None:
+            self.bus.emit(event, data)
+
+    # ---------- capture thread ----------
+    def _free_slot(self) -> int:
+        # أقدم slot غير محجوز وغير الأحدث
+        best = -1
+        for i in range(self.slots):
+            if i != self._latest and not self._pins[i] and (best < 0 or self._seq[i] < self._seq[best]):
+                best = i
+        return best
+
+    def _capture_loop(self):
+        seq = max(self._seq)
+        while not self._stop.is_set():
+            with self._cond:
+                slot = self._free_slot()
+                if slot >= 0:
+                    self._seq[slot] = 0  # being written: never handed out
+                want_main = time.monotonic() < self._main_until
+            if slot < 0:
+                self.dropped += 1  # كل الـ slots مستعارة
+                time.sleep(0.005)
+                continue
+            try:
+                ok = self.backend.read_into(self._ring[slot] if want_main else None, self._lores[slot])
+            except Exception as e:
+                self.logger.error(f"camera read failed: {e}")
+                ok = False
+            if not ok:
+                if self._stop.wait(0.1):
+                    break
+                continue
+            seq += 1
+            with self._cond:
+                self._seq[slot] = seq
+                self._t[slot] = time.monotonic()
+                self._has_main[slot] = want_main
+                self._latest = slot
+                self.frames += 1
+                self.main_frames += want_main
+                self._cond.notify_all()
+
+    # ---------- stub (no backend) ----------
+    def _stub_capture(self, has_text=True):
         self.bus.emit("CAMERA_SHOT_OK")
 
         if self.first_capture:
@@ -22,3 +232,18 @@ class Camera:
         else:
             self.bus.emit("OCR_EMPTY")
             return None
+
+
+_shared: Optional[Camera] = None
+_shared_lock = threading.Lock()
+
+
+def shared_camera(bus=None) -> Camera:
+    """The process-wide camera service (one owner of the sensor). The first call with a bus attaches it."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Camera(bus)
+        elif bus is not None and _shared.bus is None:
+            _shared.bus = bus
+        return _shared
@@ -1,38 +1,80 @@
-# io/buttons.py
-import time
-
-class Buttons:
-    """
-    يحاكي أزرار الجهاز (Capture, Next, Prev).
-    يرسل أحداث عبر EventBus.
-    """
-    def __init__(self, bus):
-        self.bus = bus
-        self.last_press_time = 0
-        self.double_press_threshold = 0.4  # نصف ثانية
-
-    def press_capture(self, press_type="short"):
-        """
-        محاكاة كبسة زر Capture.
-        """
-        if press_type == "short":
-            self.bus.emit("BTN_CAPTURE_SHORT")
-        elif press_type == "long":
-            self.bus.emit("BTN_CAPTURE_LONG")
-        elif press_type == "double":
-            now = time.time()
-            if now - self.last_press_time <= self.double_press_threshold:
-                self.bus.emit("BTN_CAPTURE_DOUBLE")
-            self.last_press_time = now
-
-    def press_next(self, press_type="short"):
-        if press_type == "short":
-            self.bus.emit("BTN_NEXT_SHORT")
-        elif press_type == "long":
-            self.bus.emit("BTN_NEXT_LONG")
-
-    def press_prev(self, press_type="short"):
-        if press_type == "short":
-            self.bus.emit("BTN_PREV_SHORT")
-        elif press_type == "long":
-            self.bus.emit("BTN_PREV_LONG")
+# io/buttons.py
+import time
+
+from core import tracing
+
+class Buttons:
+    """
+    يحاكي أزرار الجهاز (Capture, Next, Prev).
+    يرسل أحداث عبر EventBus.
+    """
+    def __init__(self, bus):
+        self.bus = bus
+        self.last_press_time = 0
+        self.double_press_threshold = 0.4  # نصف ثانية
+
+    def press_capture(self, press_type="short"):
+        """
+        محاكاة كبسة زر Capture.
+        كل كبسة تبدأ رقم تتبّع (cid) جديداً يرافق الالتقاط حتى أول كلمة مسموعة.
+        """
+        with tracing.correlation():
+            if press_type == "short":
+                self.bus.emit("BTN_CAPTURE_SHORT")
+            elif press_type == "long":
+                self.bus.emit("BTN_CAPTURE_LONG")
+            elif press_type == "double":
+                now = time.time()
+                if now - self.last_press_time <= self.double_press_threshold:
+                    self.bus.emit("BTN_CAPTURE_DOUBLE")
+                self.last_press_time = now
+
+    def press_next(self, press_type="short"):
+        if press_type == "short":
+            self.bus.emit("BTN_NEXT_SHORT")
+        elif press_type == "long":
+            self.bus.emit("BTN_NEXT_LONG")
+
+    def press_prev(self, press_type="short"):
+        if press_type == "short":
+            self.bus.emit("BTN_PREV_SHORT")
+        elif press_type == "long":
+            self.bus.emit("BTN_PREV_LONG")
+
+    # ---------- محاكاة من لوحة المفاتيح (للتطوير بدون GPIO) ----------
+    KEYS = {
+        "c": ("capture", "short"), "C": ("capture", "long"),
+        "n": ("next", "short"), "N": ("next", "long"),
+        "p": ("prev", "short"), "P": ("prev", "long"),
+    }
+
+    def press_key(self, key: str) -> bool:
+        spec = self.KEYS.get(key.strip())
+        if spec is None:
+            return False
+        button, press_type = spec
+        getattr(self, f"press_{button}")(press_type)
+        return True
+
+    async def console_loop(self, stop):
+        """
+        مهمة asyncio تقرأ stdin عبر الـselector (بدون انتظار مشغول) وتحوّل الأحرف لكبسات.
+        """
+        import asyncio
+        import sys
+
+        if not sys.stdin or not sys.stdin.isatty():
+            await stop.wait()
+            return
+        loop = asyncio.get_running_loop()
+
+        def on_line():
+            line = sys.stdin.readline()
+            if line:
+                self.press_key(line)
+
+        loop.add_reader(sys.stdin.fileno(), on_line)
+        try:
+            await stop.wait()
+        finally:
+            loop.remove_reader(sys.stdin.fileno())
@@ -0,0 +1,146 @@
+from __future__ import annotations
+"""
+One capture plus its derived images, each computed on first access and cached.
+
+The QR ladder and the OCR stage read the same views of a frame, so a capture is
+preprocessed once whichever stage gets to it first:
+
+    gray          RGB -> gray (the buffer itself for gray input)
+    level(s)      gray scaled by s (pyrDown for 0.5, INTER_AREA / INTER_LINEAR otherwise)
+    adaptive      Gaussian adaptive threshold (QR fallback), and adaptive_inv
+    ink           Otsu, inverted: ink = 255 on 0 (OCR layout, OCR cache key)
+    skew          rotation in degrees (OpenCV sign) that levels the text, from the
+                  min-area rectangle of the ink on the half-size level
+                  (0.0 when below MIN_SKEW or beyond MAX_SKEW)
+    deskewed_gray / deskewed_ink
+                  rotated by skew (the originals when there is no skew)
+
+All views are read-only NumPy arrays produced by single OpenCV calls. A Frame
+may be shared across threads; computing a view holds the frame's lock.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Union
+
+import cv2
+import numpy as np
+
+MAX_SKEW = 15.0   # degrees; larger angles are more likely layout than skew
+MIN_SKEW = 0.3    # below this the rotation is not worth resampling the page
+
+def to_gray(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2:
+        return img
+    return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Ink = 255 on a 0 background (Otsu, inverted)."""
+    _t, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return ink
+
+def _frozen(v: Any) -> Any:
+    if isinstance(v, np.ndarray):
+        v.flags.writeable = False
+    return v
+
+class Frame:
+    __slots__ = ("image", "seq", "_views", "_lock")
+
+    def __init__(self, image: np.ndarray, *, seq: int = 0):
+        self.image = image  # RGB (h, w, 3) or gray (h, w); not copied
+        self.seq = seq
+        self._views: Dict[Any, Any] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def wrap(cls, image: Union["Frame", np.ndarray]) -> "Frame":
+        return image if isinstance(image, Frame) else cls(image)
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def cached(self) -> list:
+        """Names of the views computed so far (for tests and benchmarks)."""
+        with self._lock:
+            return [k if isinstance(k, str) else f"{k[0]}_{k[1]}" for k in self._views]
+
+    def _view(self, key: Any, make: Callable[[], Any]) -> Any:
+        v = self._views.get(key)
+        if v is None:
+            with self._lock:
+                v = self._views.get(key)
+                if v is None:
+                    v = self._views[key] = _frozen(make())
+        return v
+
+    # ---------- views ----------
+    @property
+    def gray(self) -> np.ndarray:
+        if self.image.ndim == 2:
+            return self.image
+        return self._view("gray", lambda: cv2.cvtColor(self.image, cv2.COLOR_RGB2GRAY))
+
+    def level(self, scale: float) -> np.ndarray:
+        if scale == 1.0:
+            return self.gray
+        def make() -> np.ndarray:
+            g = self.gray
+            if scale == 0.5:
+                return cv2.pyrDown(g)
+            h, w = g.shape[:2]
+            return cv2.resize(g, (max(1, int(w * scale)), max(1, int(h * scale))),
+                              interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR)
+        return self._view(("level", scale), make)
+
+    @property
+    def adaptive(self) -> np.ndarray:
+        return self._view("adaptive", lambda: cv2.adaptiveThreshold(
+            self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5))
+
+    @property
+    def adaptive_inv(self) -> np.ndarray:
+        return self._view("adaptive_inv", lambda: cv2.bitwise_not(self.adaptive))
+
+    @property
+    def ink(self) -> np.ndarray:
+        return self._view("ink", lambda: binarize(self.gray))
+
+    @property
+    def skew(self) -> float:
+        return self._view("skew", self._estimate_skew)
+
+    @property
+    def deskewed_gray(self) -> np.ndarray:
+        angle = self.skew
+        if not angle:
+            return self.gray
+        return self._view("deskewed_gray", lambda: self._rotate(self.gray, angle))
+
+    @property
+    def deskewed_ink(self) -> np.ndarray:
+        if not self.skew:
+            return self.ink
+        return self._view("deskewed_ink", lambda: binarize(self.deskewed_gray))
+
+    # ---------- helpers ----------
+    def _estimate_skew(self) -> float:
+        small = binarize(self.level(0.5))
+        pts = cv2.findNonZero(small)
+        if pts is None or len(pts) < 64:
+            return 0.0
+        (_cx, _cy), (w, h), angle = cv2.minAreaRect(pts)
+        # OpenCV >= 4.5 reports (0, 90]; older versions [-90, 0): fold both to (-45, 45]
+        if angle > 45.0:
+            angle -= 90.0
+        elif angle <= -45.0:
+            angle += 90.0
+        if abs(angle) < MIN_SKEW or abs(angle) > MAX_SKEW:
+            return 0.0
+        return float(angle)
+
+    @staticmethod
+    def _rotate(img: np.ndarray, angle: float) -> np.ndarray:
+        h, w = img.shape[:2]
+        m = cv2.getRotationMatrix2D((w / 2.0, h / 2.0), angle, 1.0)
+        return cv2.warpAffine(img, m, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
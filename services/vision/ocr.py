@@ -0,0 +1,152 @@
+from __future__ import annotations
+"""
+Offline OCR service, streaming line by line.
+
+- Layout: the page (a services.vision.frame.Frame, so the views the QR stage
+  already built on it, gray at least, are reused) is deskewed, binarized once and
+  split into text-line bands with a horizontal projection profile, top-to-bottom
+  (reading order for both Arabic and English pages; right-to-left order inside a
+  line is left to the engine).
+- Cache: an optional OCRCache (perceptual hash of the binarized page, checked
+  against the page's line layout) short-circuits recognition for re-captured
+  pages; cached lines stream the same way. Layout runs either way, so a hit
+  skips only the per-line engine calls.
+- Recognition: each band is passed to a line engine (Tesseract, --psm 7,
+  "ara+eng" by default). pytesseract is imported on first use.
+- Events: OCR_LINE {"page_id", "index", "line"} as soon as each line is
+  recognized, then the unchanged OCR_DONE {"lines": [...]} (plus "page_id"),
+  or OCR_EMPTY when nothing readable was found. With a cache, every event also
+  carries "page_key": the hex hash the page is stored under, the same for a
+  re-capture of that page (page_id is new for every recognize() call).
+
+Each line is {"id": "l_001", "text": "...", "lang": "ar"|"en"}, the same shape
+the camera stub emits.
+"""
+
+import itertools, logging, re
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from core import events as E, tracing
+from services.vision.frame import Frame, binarize  # noqa: F401  (binarize stays importable from here)
+
+logger = logging.getLogger(__name__)
+
+LineEngine = Callable[[np.ndarray], str]
+Band = Tuple[int, int, int, int]  # y0, y1, x0, x1
+
+_ARABIC = re.compile("[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]")
+_LATIN = re.compile(r"[A-Za-z]")
+
+def detect_lang(text: str) -> str:
+    ar = len(_ARABIC.findall(text))
+    return "ar" if ar and ar >= len(_LATIN.findall(text)) else "en"
+
+def segment_lines(ink: np.ndarray, *, min_height: int = 8, max_gap: int = 3,
+                  ink_ratio: float = 0.004, pad: int = 4) -> List[Band]:
+    """Text-line bands from the row ink profile, ordered top to bottom."""
+    h, w = ink.shape[:2]
+    rows = np.count_nonzero(ink, axis=1)
+    on = rows > max(1, int(w * ink_ratio))
+    # run boundaries of the boolean profile
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], on.view(np.int8), [0]))))
+    runs = list(zip(edges[::2], edges[1::2]))
+
+    merged: List[List[int]] = []
+    for y0, y1 in runs:
+        if merged and y0 - merged[-1][1] <= max_gap:
+            merged[-1][1] = y1
+        else:
+            merged.append([int(y0), int(y1)])
+
+    bands: List[Band] = []
+    for y0, y1 in merged:
+        if y1 - y0 < min_height:
+            continue
+        cols = np.flatnonzero(np.count_nonzero(ink[y0:y1], axis=0))
+        if cols.size == 0:
+            continue
+        bands.append((
+            max(0, y0 - pad), min(h, y1 + pad),
+            max(0, int(cols[0]) - pad), min(w, int(cols[-1]) + 1 + pad),
+        ))
+    return bands
+
+class TesseractLineEngine:
+    """Recognize one text line with Tesseract (single-line page segmentation)."""
+
+    def __init__(self, lang: str = "ara+eng", config: str = "--oem 1 --psm 7"):
+        self.lang = lang
+        self.config = config
+        self._tess: Any = None
+
+    def __call__(self, line_img: np.ndarray) -> str:
+        if self._tess is None:
+            import pytesseract  # optional dependency, only needed for offline OCR
+            self._tess = pytesseract
+        return self._tess.image_to_string(line_img, lang=self.lang, config=self.config)
+
+class OCRService:
+    def __init__(self, bus: Any = None, engine: Optional[LineEngine] = None, cache: Any = None):
+        self.bus = bus
+        self.engine: LineEngine = engine or TesseractLineEngine()
+        self.cache = cache  # e.g. services.vision.ocr_cache.OCRCache
+        self._pages = itertools.count(1)
+
+    def iter_lines(self, image: Union[np.ndarray, Frame]) -> Iterator[dict]:
+        """Yield recognized lines in reading order as soon as each one is ready."""
+        frame = Frame.wrap(image)
+        return self._iter_lines(frame.deskewed_gray, segment_lines(frame.deskewed_ink))
+
+    def _iter_lines(self, gray: np.ndarray, bands: List[Tuple[int, int, int, int]]) -> Iterator[dict]:
+        n = 0
+        for y0, y1, x0, x1 in bands:
+            try:
+                with tracing.span("ocr.line"):
+                    text = " ".join((self.engine(gray[y0:y1, x0:x1]) or "").split())
+            except Exception as e:
+                logger.warning("ocr_line_failed band=%s err=%s", (y0, y1), e)
+                continue
+            if not text:
+                continue
+            n += 1
+            yield {"id": f"l_{n:03d}", "text": text, "lang": detect_lang(text)}
+
+    @tracing.traced("ocr.recognize")
+    def recognize(self, image: Union[np.ndarray, Frame]) -> List[dict]:
+        """Run OCR on a page, emitting OCR_LINE per line and OCR_DONE/OCR_EMPTY at the end."""
+        page_id = next(self._pages)
+        frame = Frame.wrap(image)
+
+        with tracing.span("ocr.layout"):
+            bands = segment_lines(frame.deskewed_ink)
+        key = cached = page_key = layout = None
+        if self.cache is not None:
+            with tracing.span("ocr.cache_key"):
+                key = self.cache.key(frame.ink)
+                layout = self.cache.layout(bands)
+            match, cached = self.cache.find(key, layout)  # a hash match must also have this line layout
+            page_key = f"{match if cached else key:x}"
+        if cached:
+            source = iter(cached)
+        else:
+            source = self._iter_lines(frame.deskewed_gray, bands)
+
+        lines: List[dict] = []
+        for line in source:
+            tracing.mark("ocr.first_line")
+            self._emit(E.OCR_LINE, {"page_id": page_id, "page_key": page_key, "index": len(lines), "line": line})
+            lines.append(line)
+        if key is not None and lines and not cached:
+            self.cache.put(key, lines, layout)
+        if lines:
+            self._emit(E.OCR_DONE, {"lines": lines, "page_id": page_id, "page_key": page_key})
+        else:
+            self._emit(E.OCR_EMPTY, {"page_id": page_id, "page_key": page_key})
+        logger.info("ocr_done page=%s lines=%d cached=%s", page_id, len(lines), bool(cached))
+        return lines
+
+    def _emit(self, event_type: str, data: dict) -> None:
+        if self.bus is not None:
+            self.bus.emit(event_type, data)
@@ -0,0 +1,194 @@
+from __future__ import annotations
+"""
+OCR result cache keyed by a perceptual hash of the preprocessed (binarized) page.
+
+- Key: 256-bit DCT pHash of the ink mask downscaled to 64x64, so the same page
+  re-captured under slightly different framing/lighting maps to a nearby hash
+  (a 64-bit hash cannot tell apart pages that share a layout but not the text).
+- Lookup: exact hash first, then the closest stored hash within `max_distance`
+  bits (Hamming). A hash match is then verified against the page's line layout
+  (layout_signature of its text bands, stored with the entry): a different band
+  count or band spacing is a miss, so two pages that share a hash neighbourhood
+  but not their lines are never confused. scripts/bench_vision.py --cache-check
+  measures both filters on a corpus.
+- Storage: small in-memory LRU of decoded `lines` (and their layout), backed by
+  one JSON file per page under core.config.OCR_CACHE_DIR; the directory is trimmed
+  to `max_bytes` by least-recent use.
+"""
+
+import json, logging, os, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from core.config import OCR_CACHE_DIR, OCR_CACHE_MAX_DIST, OCR_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 64   # side of the downscaled ink mask
+HASH_LOW = 16    # low-frequency DCT block kept -> HASH_LOW**2 bits
+LAYOUT_TOL = 0.04  # max shift of any normalized band centre between two captures of a page
+
+def phash(image: np.ndarray) -> int:
+    """Perceptual hash: sign of the low HASH_LOW x HASH_LOW DCT terms against their median."""
+    small = cv2.resize(image, (HASH_SIZE, HASH_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:HASH_LOW, :HASH_LOW].ravel()
+    bits = low > np.median(low[1:])  # DC term excluded from the median
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def layout_signature(bands: Sequence[Tuple[int, int, int, int]]) -> List[float]:
+    """
+    Band centres (segment_lines order) mapped onto [0, 1] between the first and the
+    last one, so a re-capture that is shifted or zoomed keeps the same signature.
+    """
+    centres = [(y0 + y1) / 2.0 for y0, y1, _x0, _x1 in bands]
+    if len(centres) < 2:
+        return [0.0] * len(centres)
+    c0, span = centres[0], (centres[-1] - centres[0]) or 1.0
+    return [round((c - c0) / span, 4) for c in centres]
+
+def same_layout(a: Sequence[float], b: Sequence[float], tol: float = LAYOUT_TOL) -> bool:
+    return len(a) == len(b) and all(abs(x - y) <= tol for x, y in zip(a, b))
+
+class OCRCache:
+    def __init__(self, root: Optional[Path] = None, *, max_bytes: int = OCR_CACHE_MAX_MB * 1024 * 1024,
+                 mem_entries: int = 32, max_distance: int = OCR_CACHE_MAX_DIST):
+        self.root = Path(root or OCR_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.mem_entries = mem_entries
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[int, dict]" = OrderedDict()  # hash -> {"lines", "layout"}
+        self._disk: "OrderedDict[int, int]" = OrderedDict()  # hash -> file size, LRU order
+        self._disk_bytes = 0
+        self.hits = self.misses = self.evictions = self.rejects = 0
+        self._load_index()
+
+    # ---------- public ----------
+    def key(self, ink: np.ndarray) -> int:
+        return phash(ink)
+
+    def layout(self, bands: Sequence[Tuple[int, int, int, int]]) -> List[float]:
+        return layout_signature(bands)
+
+    def get(self, h: int, layout: Sequence[float]) -> Optional[List[dict]]:
+        return self.find(h, layout)[1]
+
+    def find(self, h: int, layout: Sequence[float]) -> Tuple[Optional[int], Optional[List[dict]]]:
+        """
+        (stored hash that matched, its lines); (None, None) on a miss. A match whose
+        stored layout differs from `layout` (layout_signature of the page's bands)
+        is rejected.
+        """
+        with self._lock:
+            match = self._nearest(h)
+            if match is None:
+                self.misses += 1
+                return None, None
+            entry = self._mem.get(match)
+            if entry is None:
+                entry = self._read(match)
+                if entry is None:
+                    self.misses += 1
+                    return None, None
+                self._remember(match, entry)
+            if not same_layout(layout, entry["layout"]):
+                logger.info("ocr_cache_reject hash=%x dist=%d", match, hamming(h, match))
+                self.rejects += 1
+                self.misses += 1
+                return None, None
+            lines = entry["lines"]
+            self._mem.move_to_end(match)
+            if match in self._disk:
+                self._disk.move_to_end(match)
+            self.hits += 1
+        try:
+            os.utime(self._path(match))  # keep recency across restarts
+        except OSError:
+            pass
+        return match, lines
+
+    def put(self, h: int, lines: List[dict], layout: Sequence[float]) -> None:
+        entry = {"lines": lines, "layout": list(layout)}
+        blob = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._remember(h, entry)
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp = self._path(h).with_suffix(".tmp")
+                tmp.write_bytes(blob)
+                os.replace(tmp, self._path(h))
+            except OSError as e:
+                logger.warning("ocr_cache_write_failed %s", e)
+                return
+            self._disk_bytes += len(blob) - self._disk.pop(h, 0)
+            self._disk[h] = len(blob)
+            self._trim()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._disk), "bytes": self._disk_bytes, "mem_entries": len(self._mem),
+                    "hits": self.hits, "misses": self.misses, "rejects": self.rejects,
+                    "evictions": self.evictions}
+
+    # ---------- internals (caller holds the lock) ----------
+    def _path(self, h: int) -> Path:
+        return self.root / f"{h:0{HASH_LOW * HASH_LOW // 4}x}.json"
+
+    def _load_index(self) -> None:
+        if not self.root.is_dir():
+            return
+        entries: List[Tuple[float, int, int]] = []
+        for p in self.root.glob("*.json"):
+            try:
+                st = p.stat()
+                entries.append((st.st_mtime, int(p.stem, 16), st.st_size))
+            except (OSError, ValueError):
+                continue
+        for _mtime, h, size in sorted(entries):
+            self._disk[h] = size
+            self._disk_bytes += size
+        self._trim()
+
+    def _nearest(self, h: int) -> Optional[int]:
+        if h in self._disk or h in self._mem:
+            return h
+        best, best_d = None, self.max_distance + 1
+        for k in self._disk:
+            d = hamming(h, k)
+            if d < best_d:
+                best, best_d = k, d
+        return best
+
+    def _read(self, h: int) -> Optional[dict]:
+        try:
+            entry = json.loads(self._path(h).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._disk_bytes -= self._disk.pop(h, 0)
+            return None
+        if not entry.get("lines"):
+            return None
+        return entry
+
+    def _remember(self, h: int, entry: dict) -> None:
+        self._mem[h] = entry
+        self._mem.move_to_end(h)
+        while len(self._mem) > self.mem_entries:
+            self._mem.popitem(last=False)
+
+    def _trim(self) -> None:
+        while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+            h, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._mem.pop(h, None)
+            self.evictions += 1
+            try:
+                self._path(h).unlink()
+            except OSError:
+                pass
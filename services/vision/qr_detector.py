@@ -1,137 +1,317 @@
-from __future__ import annotations
-"""
-Single-frame QR checker (no capture, no streaming).
-
-- Presence check: OpenCV QRCodeDetector.detect (no QUIRC decode).
-- Decode: pyzbar (ZBar) with multi-try fallback (resizes + adaptive threshold).
-- If payload starts with WIFI:, parse via connectivity/qr_provisioning.
-- If no QR: return kind="ocr" (placeholder).
-"""
-
-from dataclasses import dataclass
-from typing import Any, Literal, Optional
-
-import cv2
-import numpy as np
-from pyzbar.pyzbar import decode as zbar_decode
-
-try:
-    cv2.setLogLevel(cv2.LOG_LEVEL_ERROR)
-except Exception:
-    pass
-
-RouteKind = Literal["wifi_qr", "other_qr", "ocr"]
-
-@dataclass(frozen=True)
-class QRDecision:
-    kind: RouteKind
-    payload: Optional[str] = None   # Masked for WIFI: payloads
-    creds: Optional[Any] = None     # WiFiCredentials object (may contain password; do not log)
-    error: Optional[str] = None     # Non-fatal notes
-
-def _to_gray(img_rgb: np.ndarray) -> np.ndarray:
-    if img_rgb.ndim == 2:
-        return img_rgb
-    return cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
-
-def _mask_wifi(payload: str) -> str:
-    up = payload.upper()
-    if "P:" in up:
-        try:
-            pref, rest = payload.split("P:", 1)
-            pval, *tail = rest.split(";", 1)
-            masked = "*" * min(len(pval), 8)
-            return pref + "P:" + masked + (";" + tail[0] if tail else "")
-        except Exception:
-            pass
-    return payload[:200]
-
-def _resolve_wifi_parser():
-    # Prefer class method if present
-    try:
-        from connectivity.qr_provisioning import QRProvisioning  # type: ignore
-        if hasattr(QRProvisioning, "parse_wifi_qr"):
-            return QRProvisioning.parse_wifi_qr  # type: ignore[attr-defined]
-    except Exception:
-        pass
-    # Fall back to module-level functions
-    try:
-        from connectivity import qr_provisioning as qp  # type: ignore
-        for name in ("parse_wifi_qr", "parse_wifi_payload", "parse"):
-            fn = getattr(qp, name, None)
-            if callable(fn):
-                return fn
-    except Exception:
-        pass
-    raise ImportError("No WIFI: QR parser found in connectivity/qr_provisioning.py")
-
-def contains_qr(image_rgb: np.ndarray) -> bool:
-    gray = _to_gray(image_rgb)
-    det = cv2.QRCodeDetector()
-    try:
-        found, _pts = det.detect(gray)
-    except Exception:
-        try:
-            _pts = det.detect(gray)
-            found = _pts is not None and len(np.atleast_1d(_pts)) > 0
-        except Exception:
-            found = False
-    return bool(found)
-
-def _try_zbar(image_gray: np.ndarray) -> Optional[str]:
-    for obj in zbar_decode(image_gray):
-        try:
-            data = (obj.data.decode("utf-8", "ignore") or "").strip()
-        except Exception:
-            data = ""
-        if data:
-            return data
-    return None
-
-def decode(image_rgb: np.ndarray) -> Optional[str]:
-    """
-    Decode first QR payload via pyzbar (ZBar).
-    Fallbacks: multi-scale and adaptive threshold if the first pass fails.
-    """
-    gray = _to_gray(image_rgb)
-
-    # 1) Raw
-    data = _try_zbar(gray)
-    if data:
-        return data
-
-    # 2) Multi-scale (down/up) – ZBar tends to like certain sizes
-    for scale in (0.75, 0.5, 1.25, 1.5):
-        h, w = gray.shape[:2]
-        resized = cv2.resize(
-            gray,
-            (max(1, int(w * scale)), max(1, int(h * scale))),
-            interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR,
-        )
-        data = _try_zbar(resized)
-        if data:
-            return data
-
-    # 3) Adaptive threshold (and inverted)
-    thr = cv2.adaptiveThreshold(
-        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 5
-    )
-    data = _try_zbar(thr) or _try_zbar(255 - thr)
-    return data
-
-def classify_frame(image_rgb: np.ndarray) -> QRDecision:
-    if not contains_qr(image_rgb):
-        return QRDecision(kind="ocr")  # No QR → OCR later
-    payload = decode(image_rgb)
-    if not payload:
-        return QRDecision(kind="other_qr", error="qr_detected_but_decode_failed")
-    if payload.upper().startswith("WIFI:"):
-        try:
-            parse_wifi = _resolve_wifi_parser()
-            creds = parse_wifi(payload)
-            if creds:
-                return QRDecision(kind="wifi_qr", payload=_mask_wifi(payload), creds=creds)
-            return QRDecision(kind="other_qr", payload=_mask_wifi(payload), error="wifi_parse_returned_none")
-        except Exception as e:
-            return QRDecision(kind="other_qr", payload=_mask_wifi(payload), error=f"wifi_parse_error:{e}")
-    return QRDecision(kind="other_qr", payload=payload[:200])
+from __future__ import annotations
+"""
+Single-frame QR checker (no capture, no streaming).
+
+- Presence check: OpenCV QRCodeDetector.detect (no QUIRC decode).
+- Decode: pyzbar (ZBar) on the detected QR region (+margin), with multi-try
+  fallback (pyramid levels + adaptive threshold) read from a services.vision.frame.Frame,
+  so the derived images are built once and also serve OCR on the same capture.
+- If payload starts with WIFI:, parse via connectivity/qr_provisioning.
+- If no QR: return kind="ocr" (placeholder).
+- Two-resolution use: locate() on a low-res gray stream, then classify_hinted() on the
+  full-res frame only when something was found (ROI scaled from the low-res corners).
+
+QRClassifier is the reusable entry point (cached detector, gray computed once);
+the module-level functions delegate to a shared default instance. Every entry point
+accepts a numpy image or a Frame.
+"""
+
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Literal, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from pyzbar.pyzbar import decode as zbar_decode
+
+from core import tracing
+from services.vision.frame import Frame
+
+Image = Union[np.ndarray, Frame]
+
+try:
+    cv2.setLogLevel(cv2.LOG_LEVEL_ERROR)
+except Exception:
+    pass
+
+RouteKind = Literal["wifi_qr", "other_qr", "ocr"]
+
+@dataclass(frozen=True)
+class QRDecision:
+    kind: RouteKind
+    payload: Optional[str] = None   # Masked for WIFI: payloads
+    creds: Optional[Any] = None     # WiFiCredentials object (may contain password; do not log)
+    error: Optional[str] = None     # Non-fatal notes
+
+def _mask_wifi(payload: str) -> str:
+    up = payload.upper()
+    if "P:" in up:
+        try:
+            pref, rest = payload.split("P:", 1)
+            pval, *tail = rest.split(";", 1)
+            masked = "*" * min(len(pval), 8)
+            return pref + "P:" + masked + (";" + tail[0] if tail else "")
+        except Exception:
+            pass
+    return payload[:200]
+
+@lru_cache(maxsize=1)
+def _resolve_wifi_parser():
+    # Prefer class method if present (module name kept with its historical spelling too)
+    for mod in ("connectivity.qr_provisioning", "connectivity.qr_provisionong"):
+        try:
+            qp = __import__(mod, fromlist=["QRProvisioning"])
+        except Exception:
+            continue
+        cls = getattr(qp, "QRProvisioning", None)
+        if cls is not None and hasattr(cls, "parse_wifi_qr"):
+            return cls.parse_wifi_qr
+        # Fall back to module-level functions
+        for name in ("parse_wifi_qr", "parse_wifi_payload", "parse"):
+            fn = getattr(qp, name, None)
+            if callable(fn):
+                return fn
+    raise ImportError("No WIFI: QR parser found in connectivity/qr_provisioning.py")
+
+def _try_zbar(image_gray: np.ndarray) -> Optional[str]:
+    for obj in zbar_decode(image_gray):
+        try:
+            data = (obj.data.decode("utf-8", "ignore") or "").strip()
+        except Exception:
+            data = ""
+        if data:
+            return data
+    return None
+
+class QRClassifier:
+    """
+    Reusable single-pass classifier.
+
+    - cv2.QRCodeDetector is created once per thread (the detector is not thread-safe).
+    - The frame is converted to gray once (Frame.gray) and shared by detect, decode and OCR.
+    - ZBar first scans only the detected quadrilateral's bounding box plus `roi_margin`
+      (fraction of the box size) through the whole ladder. The full frame is the last
+      resort and gets the raw stage only (in case the box was wrong), and not even that
+      when the box already covers `roi_cover` of the frame. A failing frame costs 8
+      ZBar calls, not 14. Without a box the full frame gets the whole ladder.
+    """
+
+    SCALES: Tuple[float, ...] = (0.75, 0.5, 1.25, 1.5)
+
+    def __init__(self, *, roi_margin: float = 0.15, min_roi_px: int = 48, roi_cover: float = 0.6):
+        self.roi_margin = roi_margin
+        self.min_roi_px = min_roi_px
+        self.roi_cover = roi_cover
+        self._local = threading.local()
+
+    def _detector(self) -> "cv2.QRCodeDetector":
+        det = getattr(self._local, "det", None)
+        if det is None:
+            det = self._local.det = cv2.QRCodeDetector()
+        return det
+
+    # ---------- stages ----------
+    def locate(self, gray: np.ndarray) -> Tuple[bool, Optional[np.ndarray]]:
+        """Presence check. Returns (found, corner points as (4, 2) float array or None)."""
+        det = self._detector()
+        try:
+            found, pts = det.detect(gray)
+        except Exception:
+            try:
+                pts = det.detect(gray)
+                found = pts is not None and len(np.atleast_1d(pts)) > 0
+            except Exception:
+                return False, None
+        if not found:
+            return False, None
+        if pts is None or np.size(pts) < 8:
+            return True, None
+        return True, np.asarray(pts, dtype=np.float32).reshape(-1, 2)[:4]
+
+    def crop(self, gray: np.ndarray, pts: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Bounding box of the QR quadrilateral plus margin, clipped to the frame."""
+        if pts is None:
+            return None
+        h, w = gray.shape[:2]
+        x0, y0 = pts.min(axis=0)
+        x1, y1 = pts.max(axis=0)
+        pad = max(self.min_roi_px * 0.5, self.roi_margin * max(x1 - x0, y1 - y0))
+        x0, y0 = max(0, int(x0 - pad)), max(0, int(y0 - pad))
+        x1, y1 = min(w, int(np.ceil(x1 + pad))), min(h, int(np.ceil(y1 + pad)))
+        if x1 - x0 < self.min_roi_px or y1 - y0 < self.min_roi_px:
+            return None
+        return np.ascontiguousarray(gray[y0:y1, x0:x1])
+
+    def _ladder(self, frame: Frame, prefix: str) -> Iterator[Tuple[str, np.ndarray]]:
+        # 1) Raw
+        yield f"{prefix}raw", frame.gray
+        # 2) Multi-scale (down/up) – ZBar tends to like certain sizes
+        for scale in self.SCALES:
+            yield f"{prefix}scale_{scale}", frame.level(scale)
+        # 3) Adaptive threshold (and inverted)
+        yield f"{prefix}threshold", frame.adaptive
+        yield f"{prefix}threshold_inv", frame.adaptive_inv
+
+    def decode_gray(self, gray: Image, pts: Optional[np.ndarray] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Decode first QR payload via pyzbar (ZBar). Returns (payload, stage) where stage
+        names the fallback step that succeeded (e.g. "roi_raw", "scale_0.5").
+        """
+        frame = Frame.wrap(gray)
+        roi = self.crop(frame.gray, pts)
+        ladder = self._ladder(frame, "")
+        if roi is not None:
+            for stage, img in self._ladder(Frame(roi), "roi_"):
+                data = _try_zbar(img)
+                if data:
+                    return data, stage
+            if roi.size >= self.roi_cover * frame.gray.size:
+                return None, None  # the full frame is (nearly) the ROI: nothing new to try
+            ladder = [("raw", frame.gray)]
+        for stage, img in ladder:
+            data = _try_zbar(img)
+            if data:
+                return data, stage
+        return None, None
+
+    # ---------- public ----------
+    def contains_qr(self, image_rgb: Image) -> bool:
+        return self.locate(Frame.wrap(image_rgb).gray)[0]
+
+    def decode(self, image_rgb: Image) -> Optional[str]:
+        frame = Frame.wrap(image_rgb)
+        return self.decode_gray(frame, self.locate(frame.gray)[1])[0]
+
+    def classify(self, image_rgb: Image) -> QRDecision:
+        frame = Frame.wrap(image_rgb)
+        found, pts = self.locate(frame.gray)
+        if not found:
+            return QRDecision(kind="ocr")  # No QR → OCR later
+        payload, _stage = self.decode_gray(frame, pts)
+        return _route_payload(payload)
+
+    def classify_hinted(self, image_rgb: Image, hint_pts: Optional[np.ndarray],
+                        hint_shape: Tuple[int, ...]) -> QRDecision:
+        """
+        Decode a full-resolution frame when a QR was already located on a low-res
+        stream: `hint_pts` (from locate() on an image of `hint_shape`) are scaled to
+        this frame and used as the ROI, so detect does not run again at full size.
+        """
+        frame = Frame.wrap(image_rgb)
+        pts = None
+        if hint_pts is not None:
+            sy = frame.shape[0] / float(hint_shape[0])
+            sx = frame.shape[1] / float(hint_shape[1])
+            pts = hint_pts * np.array([sx, sy], dtype=np.float32)
+        payload, _stage = self.decode_gray(frame, pts)
+        return _route_payload(payload)
+
+def _route_payload(payload: Optional[str]) -> QRDecision:
+    if not payload:
+        return QRDecision(kind="other_qr", error="qr_detected_but_decode_failed")
+    if payload.upper().startswith("WIFI:"):
+        try:
+            parse_wifi = _resolve_wifi_parser()
+            creds = parse_wifi(payload)
+            if creds:
+                return QRDecision(kind="wifi_qr", payload=_mask_wifi(payload), creds=creds)
+            return QRDecision(kind="other_qr", payload=_mask_wifi(payload), error="wifi_parse_returned_none")
+        except Exception as e:
+            return QRDecision(kind="other_qr", payload=_mask_wifi(payload), error=f"wifi_parse_error:{e}")
+    return QRDecision(kind="other_qr", payload=payload[:200])
+
+_default = QRClassifier()
+
+def contains_qr(image_rgb: Image) -> bool:
+    return _default.contains_qr(image_rgb)
+
+def decode(image_rgb: Image) -> Optional[str]:
+    """
+    Decode first QR payload via pyzbar (ZBar).
+    Fallbacks: multi-scale and adaptive threshold if the first pass fails.
+    """
+    return _default.decode(image_rgb)
+
+@tracing.traced("qr.classify_frame")
+def classify_frame(image_rgb: Image) -> QRDecision:
+    return _default.classify(image_rgb)
+
+def locate(image: Image) -> Tuple[bool, Optional[np.ndarray]]:
+    """Presence check only (no decode); meant for the camera's low-res gray stream."""
+    return _default.locate(Frame.wrap(image).gray)
+
+def classify_hinted(image_rgb: Image, hint_pts: Optional[np.ndarray], hint_shape: Tuple[int, ...]) -> QRDecision:
+    return _default.classify_hinted(image_rgb, hint_pts, hint_shape)
+
+# ---------- burst (multi-frame) classification ----------
+
+@dataclass(frozen=True)
+class BurstResult:
+    index: int          # index into the frames passed to classify_burst
+    decision: QRDecision
+    sharpness: float
+
+def sharpness(image: Image, step: int = 2) -> float:
+    """Variance of the 4-neighbour Laplacian on a strided gray view (pure NumPy, no copies per pixel)."""
+    g = Frame.wrap(image).gray[::step, ::step].astype(np.float32)
+    if g.shape[0] < 3 or g.shape[1] < 3:
+        return 0.0
+    lap = 4.0 * g[1:-1, 1:-1] - g[:-2, 1:-1] - g[2:, 1:-1] - g[1:-1, :-2] - g[1:-1, 2:]
+    return float(lap.var())
+
+def _decided(d: QRDecision) -> bool:
+    return d.kind == "wifi_qr" or (d.kind == "other_qr" and d.error is None)
+
+@tracing.traced("qr.classify_burst")
+def classify_burst(frames: "list[Image]", *, top_k: int = 3, pool: Any = None) -> Optional[BurstResult]:
+    """
+    Rank frames by sharpness and classify the `top_k` sharpest, in parallel when a
+    concurrent.futures pool is given. Returns the first successful decode; otherwise
+    the sharpest frame's decision (so OCR gets the least blurred capture). Pass Frames
+    to keep the views computed here (gray, pyramid, thresholds) for the OCR stage.
+
+    With a pool, the sharpest frame is still classified here, on the caller's thread,
+    while the workers take the others: a worker only gets a copy of the gray buffer and
+    its views do not come back, whereas the sharpest frame is the one OCR will read.
+    """
+    if not frames:
+        return None
+    fr = [Frame.wrap(f) for f in frames]
+    scores = [sharpness(f) for f in fr]
+    order = sorted(range(len(frames)), key=scores.__getitem__, reverse=True)[:max(1, top_k)]
+
+    results: Dict[int, QRDecision] = {}
+    if pool is None or len(order) == 1:
+        for i in order:
+            results[i] = d = classify_frame(fr[i])
+            if _decided(d):
+                return BurstResult(i, d, scores[i])
+    else:
+        from concurrent.futures import as_completed
+        # workers get the gray buffer only; views built there do not come back
+        futs = {pool.submit(classify_frame, np.ascontiguousarray(fr[i].gray)): i for i in order[1:]}
+        try:
+            sharpest = order[0]
+            results[sharpest] = d = classify_frame(fr[sharpest])  # in-process: its views stay on the Frame
+            if _decided(d):
+                return BurstResult(sharpest, d, scores[sharpest])
+            for fut in as_completed(futs):
+                i = futs[fut]
+                try:
+                    results[i] = d = fut.result()
+                except Exception as e:
+                    results[i] = QRDecision(kind="other_qr", error=f"burst_worker_error:{e}")
+                    continue
+                if _decided(d):
+                    return BurstResult(i, d, scores[i])
+        finally:
+            for f in futs:
+                f.cancel()
+
+    # nothing decoded: prefer a "QR seen" answer over "ocr", then the sharpest frame
+    for i in order:
+        if results.get(i) is not None and results[i].kind != "ocr":
+            return BurstResult(i, results[i], scores[i])
+    best = order[0]
+    return BurstResult(best, results.get(best) or QRDecision(kind="ocr"), scores[best])
@@ -0,0 +1,124 @@
+"""AudioOutput on the NullSink / WavSink: what is played, gain, and how fast stop() cuts it."""
+import threading, time, wave
+
+import numpy as np
+import pytest
+
+from services.audio import audio_output
+from services.audio.audio_output import AudioOutput, NullSink, WavSink
+from services.audio.output_service import OutputService
+from services.audio.tones import shared_bank
+from services.audio.tts_manager import TTSManager
+from services.audio.tts_cache import Audio
+
+RATE = 16000
+BUFFER_MS = 10
+BLOCK = RATE * BUFFER_MS // 1000
+
+def _pcm(seconds: float, value: int = 1000) -> bytes:
+    return np.full(int(RATE * seconds), value, dtype=np.int16).tobytes()
+
+def _ramp(n: int) -> np.ndarray:
+    return (np.arange(n) % 2000 - 1000).astype(np.int16)
+
+@pytest.fixture
+def output():
+    outs = []
+
+    def make(sink, **kw):
+        out = AudioOutput(sink, buffer_ms=BUFFER_MS, sample_rate=RATE, **kw)
+        outs.append(out)
+        return out
+
+    yield make
+    for out in outs:
+        out.close()
+
+def _read_wav(path):
+    with wave.open(str(path), "rb") as w:
+        return w.getframerate(), np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+
+def test_play_writes_every_sample_in_order(tmp_path, output):
+    sink = WavSink(tmp_path / "out.wav")
+    out = output(sink, volume=1.0)
+    clip = _ramp(RATE // 2 + 7)  # not a whole number of blocks
+    assert out.play(Audio(clip.tobytes(), RATE)) is True
+    out.close()
+    rate, played = _read_wav(tmp_path / "out.wav")
+    assert rate == RATE
+    assert np.array_equal(played[:len(clip)], clip)
+    assert not played[len(clip):].any()  # at most the padding of the last block
+
+def test_play_stream_concatenates_chunks(tmp_path, output):
+    sink = WavSink(tmp_path / "out.wav")
+    out = output(sink, volume=1.0)
+    clip = _ramp(3 * BLOCK + 50)
+    chunks = [clip[:100].tobytes(), clip[100:1000].tobytes(), clip[1000:].tobytes()]
+    assert out.play_stream(iter(chunks), RATE) is True
+    out.close()
+    assert np.array_equal(_read_wav(tmp_path / "out.wav")[1][:len(clip)], clip)
+
+def test_volume_scales_without_resynthesis(tmp_path, output):
+    sink = WavSink(tmp_path / "out.wav")
+    out = output(sink, volume=0.5)
+    out.play(_pcm(0.1, 1000), RATE)
+    out.close()
+    played = _read_wav(tmp_path / "out.wav")[1][:int(RATE * 0.1)]
+    assert np.all(np.abs(played.astype(int) - 500) <= 1)
+
+def test_sample_rate_change_reopens_the_sink(output):
+    sink = NullSink()
+    out = output(sink)
+    out.play(_pcm(0.05), RATE)
+    assert out.play(np.zeros(2205, dtype=np.int16).tobytes(), 22050) is True
+    assert sink.sample_rate == 22050
+
+def test_stop_is_heard_within_one_block(output):
+    sink = NullSink(realtime=True)
+    out = output(sink)
+    result = {}
+    player = threading.Thread(target=lambda: result.update(ok=out.play(_pcm(2.0), RATE)))
+    player.start()
+    time.sleep(0.2)
+    t = time.perf_counter()
+    out.stop()
+    at_stop = sink.frames
+    player.join(1.0)
+    returned = time.perf_counter() - t
+    time.sleep(5 * BUFFER_MS / 1000.0)
+    assert result["ok"] is False
+    assert returned < 0.1
+    assert sink.frames - at_stop <= BLOCK  # only the block already being written
+    assert sink.frames < RATE  # far from the 2 s clip
+
+def test_stale_caller_plays_nothing(output):
+    sink = NullSink()
+    out = output(sink)
+    assert out.play(_pcm(0.1), RATE, still_current=lambda: False) is False
+    time.sleep(3 * BUFFER_MS / 1000.0)
+    assert sink.frames == 0
+
+def test_queued_plays_run_back_to_back(output):
+    sink = NullSink()
+    out = output(sink)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(out.play(_pcm(0.05), RATE))) for _ in range(3)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(2.0)
+    assert results == [True, True, True]
+    assert sink.frames >= 3 * int(RATE * 0.05)
+
+def test_volume_reaches_mixed_tones_with_the_console_tts(tmp_path, output, monkeypatch):
+    out = output(WavSink(tmp_path / "out.wav"), volume=1.0)
+    monkeypatch.setattr(audio_output, "_shared", out)
+    service = OutputService(TTSManager())
+    service.set_volume(0.5)
+    assert out.volume == 0.5
+    service.play_tone("volume_step")
+    out.play(_pcm(0.2, 0), RATE)  # returns once the tone has been mixed in and written
+    out.close()
+    tone = shared_bank().get("volume_step", RATE)
+    played = _read_wav(tmp_path / "out.wav")[1]
+    assert abs(int(np.abs(played).max()) - int(np.abs(tone).max()) // 2) <= 2
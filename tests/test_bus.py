@@ -0,0 +1,124 @@
+"""EventBus in threaded mode: per-subscriber queues, priorities and backpressure policies."""
+import threading, time
+
+import pytest
+
+from core import events as E
+from core.bus import COALESCE, DROP_NEWEST, DROP_OLDEST, EventBus
+
+class Gate:
+    """A subscriber whose first callback blocks until released, so the rest queue up."""
+
+    def __init__(self):
+        self.seen = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def on(self, data):
+        self.entered.set()
+        self.release.wait(2.0)
+        self.seen.append(data)
+
+@pytest.fixture
+def bus():
+    made = []
+
+    def make(**kw):
+        b = EventBus(threaded=True, **kw)
+        made.append(b)
+        return b
+
+    yield make
+    for b in made:
+        b.close()
+
+def _blocked(bus, event, gate, **kw):
+    bus.subscribe(event, gate.on, **kw)
+    bus.emit(event, "first")
+    assert gate.entered.wait(1.0)
+
+def test_inline_bus_runs_callbacks_on_the_emitting_thread():
+    b = EventBus()
+    seen = []
+    b.subscribe("X", lambda d: seen.append((d, threading.current_thread())))
+    b.emit("X", 1)
+    assert seen == [(1, threading.current_thread())]
+
+def test_slow_subscriber_does_not_block_the_emitter_or_others(bus):
+    b = bus()
+    gate, fast = Gate(), []
+    _blocked(b, "X", gate)
+    b.subscribe("X", fast.append)
+    t = time.perf_counter()
+    b.emit("X", "second")
+    assert time.perf_counter() - t < 0.1
+    deadline = time.monotonic() + 1.0
+    while "second" not in fast and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert "second" in fast and gate.seen == []
+    gate.release.set()
+    assert b.wait_idle(2.0)
+    assert gate.seen == ["first", "second"]
+
+def test_queued_events_run_by_priority(bus):
+    b = bus()
+    gate = Gate()
+    _blocked(b, E.OCR_DONE, gate)
+    b.subscribe(E.BTN_NEXT_SHORT, gate.on)
+    b.emit(E.OCR_DONE, "page")
+    b.emit(E.BTN_NEXT_SHORT, "button")
+    gate.release.set()
+    assert b.wait_idle(2.0)
+    assert gate.seen == ["first", "button", "page"]  # a button press jumps the OCR backlog
+
+def test_drop_newest_keeps_the_queue(bus):
+    b = bus(queue_size=2, policy=DROP_NEWEST)
+    gate = Gate()
+    _blocked(b, "X", gate)
+    for i in range(5):
+        b.emit("X", i)
+    gate.release.set()
+    assert b.wait_idle(2.0)
+    assert gate.seen == ["first", 0, 1]
+    assert next(iter(b.stats()["subscribers"].values()))["dropped"] == 3
+
+def test_drop_oldest_keeps_the_newest(bus):
+    b = bus(queue_size=2, policy=DROP_OLDEST)
+    gate = Gate()
+    _blocked(b, "X", gate)
+    for i in range(5):
+        b.emit("X", i)
+    gate.release.set()
+    assert b.wait_idle(2.0)
+    assert gate.seen == ["first", 3, 4]
+
+def test_coalesce_replaces_the_queued_payload(bus):
+    b = bus(queue_size=1)
+    gate = Gate()
+    _blocked(b, "X", gate, policy=COALESCE)
+    for i in range(5):
+        b.emit("X", i)
+    gate.release.set()
+    assert b.wait_idle(2.0)
+    assert gate.seen == ["first", 4]
+    assert next(iter(b.stats()["subscribers"].values()))["coalesced"] == 4
+
+def test_failing_callback_is_counted_and_the_worker_lives_on(bus):
+    b = bus()
+    seen = []
+
+    def flaky(d):
+        if d == "bad":
+            raise RuntimeError("boom")
+        seen.append(d)
+
+    b.subscribe("X", flaky)
+    b.emit("X", "bad")
+    b.emit("X", "good")
+    assert b.wait_idle(2.0)
+    assert seen == ["good"]
+    assert next(iter(b.stats()["subscribers"].values()))["errors"] == 1
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EventBus(threaded=True, policy="drop_everything")
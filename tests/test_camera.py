@@ -0,0 +1,85 @@
+"""Camera ring buffer over a ReplayBackend: zero-copy borrows, owned captures, pinned slots."""
+import time
+
+import numpy as np
+import pytest
+
+from services.camera.backends import ReplayBackend
+from services.camera.camera import Camera
+
+W, H = 64, 48
+FPS = 200.0
+
+def _frames(n):
+    """Frame i is filled with the value 5 * (i + 1), so a pixel tells which frame it came from."""
+    return [np.full((H, W, 3), 5 * (i + 1), dtype=np.uint8) for i in range(n)]
+
+@pytest.fixture
+def camera():
+    made = []
+
+    def make(n=8, slots=3):
+        cam = Camera(None, ReplayBackend(_frames(n), fps=FPS, lores_size=(W // 2, H // 2)), slots=slots)
+        made.append(cam)
+        cam.start()
+        return cam
+
+    yield make
+    for cam in made:
+        cam.stop()
+
+def _uniform(img):
+    v = int(img.flat[0])
+    assert (img == v).all(), "frame torn by the capture thread"
+    return v
+
+def test_capture_returns_an_owned_full_frame(camera):
+    cam = camera()
+    frame = cam.capture()
+    assert frame.shape == (H, W, 3) and frame.flags.writeable
+    assert _uniform(frame) in range(5, 45, 5)
+
+def test_burst_frames_are_consecutive_distinct_captures(camera):
+    cam = camera(n=50)
+    frames = cam.capture_burst(n=4, interval_s=0)
+    values = [_uniform(f) for f in frames]
+    assert len(values) == 4 and len(set(values)) == 4
+
+def test_borrow_is_a_read_only_view_that_is_not_overwritten(camera):
+    cam = camera()
+    with cam.borrow(full=True) as f:
+        v = _uniform(f.image)
+        assert not f.image.flags.writeable and not f.lores.flags.writeable
+        assert f.lores.shape == (H // 2, W // 2)
+        with pytest.raises(ValueError):
+            f.image[0, 0, 0] = 0
+        time.sleep(20 / FPS)  # the ring wrapped several times meanwhile
+        assert cam.stats()["latest_seq"] > f.seq
+        assert _uniform(f.image) == v
+
+def test_low_res_stream_does_not_copy_the_full_frame(camera):
+    cam = camera()
+    with cam.borrow() as f:
+        assert f.image is None
+    assert cam.stats()["main_frames"] == 0
+    with cam.borrow(full=True) as f:
+        assert f.image is not None
+    assert cam.stats()["main_frames"] > 0
+
+def test_capture_thread_drops_frames_while_every_slot_is_borrowed(camera):
+    cam = camera(slots=2)
+    with cam.borrow(full=True) as a, cam.borrow(newer_than=a.seq, full=True) as b:
+        va, vb = _uniform(a.image), _uniform(b.image)
+        time.sleep(10 / FPS)
+        assert cam.stats()["dropped"] > 0
+        assert _uniform(a.image) == va and _uniform(b.image) == vb
+    seq = cam.stats()["latest_seq"]
+    with cam.borrow(newer_than=seq):
+        pass  # frames flow again once released
+
+def test_borrow_times_out_without_new_frames(camera):
+    cam = camera()
+    cam.stop()
+    with pytest.raises(TimeoutError):
+        with cam.borrow(newer_than=10 ** 9, timeout_s=0.05):
+            pass
@@ -0,0 +1,72 @@
+"""Frame: derived views are computed once, cached, read-only and shared across threads."""
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from services.vision.frame import Frame
+
+def _page(angle=0.0):
+    """White page with dark text-like bars, optionally rotated."""
+    img = np.full((400, 600, 3), 255, dtype=np.uint8)
+    for y in range(60, 340, 40):
+        cv2.rectangle(img, (60, y), (540, y + 14), (20, 20, 20), -1)
+    if angle:
+        m = cv2.getRotationMatrix2D((300, 200), angle, 1.0)
+        img = cv2.warpAffine(img, m, (600, 400), borderValue=(255, 255, 255))
+    return img
+
+def test_views_are_computed_once_and_cached():
+    f = Frame(_page())
+    g = f.gray
+    assert f.gray is g and f.cached() == ["gray"]
+    assert f.level(0.5) is f.level(0.5) and f.level(0.5).shape == (200, 300)
+    assert f.ink is f.ink
+    assert set(f.cached()) == {"gray", "level_0.5", "ink"}
+
+def test_views_are_read_only():
+    f = Frame(_page())
+    with pytest.raises(ValueError):
+        f.gray[0, 0] = 0
+    with pytest.raises(ValueError):
+        f.adaptive[0, 0] = 0
+
+def test_gray_input_is_its_own_gray_view():
+    gray = np.zeros((10, 10), dtype=np.uint8)
+    f = Frame(gray)
+    assert f.gray is gray and f.cached() == []
+
+def test_wrap_reuses_a_frame():
+    f = Frame(_page())
+    assert Frame.wrap(f) is f
+    assert isinstance(Frame.wrap(_page()), Frame)
+
+def test_level_page_has_no_skew_and_needs_no_rotation():
+    f = Frame(_page())
+    assert f.skew == 0.0
+    assert f.deskewed_gray is f.gray
+
+def test_skewed_page_is_measured_and_rotated_level():
+    f = Frame(_page(angle=5.0))
+    assert abs(abs(f.skew) - 5.0) < 1.0
+    assert f.deskewed_gray is not f.gray
+    assert abs(Frame(f.deskewed_gray).skew) < 1.0
+
+def test_concurrent_readers_share_one_computation(monkeypatch):
+    calls = []
+    real = cv2.cvtColor
+
+    def counting(*a, **k):
+        calls.append(1)
+        return real(*a, **k)
+
+    monkeypatch.setattr(cv2, "cvtColor", counting)
+    f = Frame(_page())
+    views = []
+    threads = [threading.Thread(target=lambda: views.append(f.gray)) for _ in range(8)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert len(calls) == 1 and all(v is views[0] for v in views)
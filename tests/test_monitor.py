@@ -0,0 +1,101 @@
+"""ConnectivityMonitor against a local TCP listener: cached answers and NET_STATUS on transitions only."""
+import socket, threading, time
+
+import pytest
+
+from connectivity import monitor as M
+from core import events as E
+from core.bus import EventBus
+
+@pytest.fixture
+def listener():
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(16)
+    yield srv
+    srv.close()
+
+@pytest.fixture
+def net(listener):
+    """A monitor probing the listener; close_listener() takes the 'network' down."""
+    bus = EventBus()
+    pushed = []
+    bus.subscribe(E.NET_STATUS, pushed.append)
+    port = listener.getsockname()[1]
+    mon = M.ConnectivityMonitor(bus, [f"tcp:127.0.0.1:{port}"], interval_s=0.05, timeout_s=0.2, ttl_s=60.0)
+    yield mon, pushed, listener.close
+    mon.stop()
+
+def test_probe_answers_for_an_open_and_a_closed_port(listener):
+    port = listener.getsockname()[1]
+    assert M.probe(M.parse_targets([f"tcp:127.0.0.1:{port}"]), 0.5) is True
+    listener.close()
+    assert M.probe(M.parse_targets([f"tcp:127.0.0.1:{port}"]), 0.5) is False
+
+def test_net_status_is_pushed_only_when_the_state_changes(net):
+    mon, pushed, close_listener = net
+    for _ in range(3):
+        assert mon.check() is True
+    assert pushed == [{"online": True}]
+    close_listener()
+    for _ in range(3):
+        assert mon.check() is False
+    assert pushed == [{"online": True}, {"online": False}]
+    assert mon.stats()["probes"] == 6 and mon.stats()["transitions"] == 2
+
+def test_is_online_reads_the_cache(net, monkeypatch):
+    mon, _pushed, _close = net
+    assert mon.is_online() is True  # first call probes inline
+    monkeypatch.setattr(M, "probe", lambda *a, **k: pytest.fail("cached answer expected"))
+    t = time.perf_counter()
+    assert mon.is_online() is True
+    assert time.perf_counter() - t < 0.01
+
+def test_background_loop_pushes_the_drop(net):
+    mon, pushed, close_listener = net
+    mon.start()
+    deadline = time.monotonic() + 2.0
+    while not pushed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    close_listener()
+    mon.poke()
+    while len(pushed) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pushed == [{"online": True}, {"online": False}]
+    assert mon.is_online() is False
+
+def test_unreachable_targets_time_out():
+    t = time.perf_counter()
+    # TEST-NET-1: never routed, so the connect can only time out or fail
+    assert M.probe(M.parse_targets(["tcp:192.0.2.1:53"]), 0.2) is False
+    assert time.perf_counter() - t < 1.0
+
+def test_bad_targets_are_skipped():
+    assert M.parse_targets(["icmp:1.1.1.1", "tcp:", "dns:9.9.9.9"]) == [("dns", "9.9.9.9", 53)]
+
+def test_concurrent_checks_probe_one_at_a_time_and_push_in_order(net, monkeypatch):
+    mon, pushed, _close = net
+    lock = threading.Lock()
+    running, answers = [0, 0], []  # [now, max]
+
+    def slow_probe(targets, timeout_s):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+            ok = len(answers) % 2 == 0  # online, offline, online, ...
+            answers.append(ok)
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return ok
+
+    monkeypatch.setattr(M, "probe", slow_probe)
+    threads = [threading.Thread(target=mon.check) for _ in range(6)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(2.0)
+    assert running[1] == 1
+    assert pushed == [{"online": ok} for ok in answers]
+    assert mon.is_online() is answers[-1]
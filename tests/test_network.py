@@ -0,0 +1,147 @@
+"""
+Wi-Fi QR provisioning against a fake nmcli: already on the network -> no nmcli
+connect; saved profile -> `con up`; unknown network -> `dev wifi connect`.
+"""
+import json, os, stat, sys, time, types
+
+import pytest
+
+from connectivity import network
+from connectivity.wifi_scan import WifiScanner
+
+CONNECT_S = 0.4   # fake `dev wifi connect` (scan + auth + DHCP)
+UP_S = 0.05       # fake `con up` of a saved profile
+
+FAKE_NMCLI = r'''#!{python}
+import json, sys, time
+state_path = {state!r}
+with open(state_path) as f:
+    st = json.load(f)
+args = sys.argv[1:]
+st["log"].append(" ".join(a for a in args if a != st.get("password")))
+
+def save():
+    with open(state_path, "w") as f:
+        json.dump(st, f)
+
+def esc(s):
+    return s.replace("\\", "\\\\").replace(":", "\\:")
+
+rc = 0
+if "list" in args:
+    for ssid in st["visible"]:
+        print(":".join(["yes" if ssid == st["active"] else "no", esc(ssid), "70", "WPA2"]))
+elif args[-2:] == ["con", "show"]:
+    for p in st["profiles"]:
+        print(":".join([esc(p["name"]), p["uuid"], "802-11-wireless"]))
+elif args[:2] == ["-g", "802-11-wireless.ssid"]:
+    print(next(p["ssid"] for p in st["profiles"] if p["uuid"] == args[-1]))
+elif args[:3] == ["con", "up", "uuid"]:
+    time.sleep({up_s})
+    p = next((p for p in st["profiles"] if p["uuid"] == args[3]), None)
+    if p is None or p.get("stale"):
+        rc = 4
+    else:
+        st["active"] = p["ssid"]
+elif args[:3] == ["dev", "wifi", "connect"]:
+    time.sleep({connect_s})
+    ssid = args[3]
+    st["profiles"].append({{"name": ssid, "uuid": "uuid-%d" % len(st["profiles"]), "ssid": ssid}})
+    st["active"] = ssid
+save()
+sys.exit(rc)
+'''
+
+class FakeMonitor:
+    """Online exactly when the fake nmcli has an active network."""
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+
+    def is_online(self):
+        with open(self.state_path) as f:
+            return json.load(f)["active"] is not None
+
+    def wait_online(self, timeout_s):
+        return self.is_online()
+
+@pytest.fixture
+def nmcli(tmp_path, monkeypatch):
+    state_path = tmp_path / "state.json"
+    state = {"visible": ["Home", "Cafe"], "active": None, "profiles": [], "log": [], "password": "s3cret"}
+
+    def read():
+        return json.loads(state_path.read_text())
+
+    def write(**kw):
+        state_path.write_text(json.dumps(dict(read() if state_path.exists() else state, **kw)))
+
+    exe = tmp_path / "bin" / "nmcli"
+    exe.parent.mkdir()
+    exe.write_text(FAKE_NMCLI.format(python=sys.executable, state=str(state_path), up_s=UP_S, connect_s=CONNECT_S))
+    exe.chmod(exe.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{exe.parent}{os.pathsep}{os.environ['PATH']}")
+
+    scanner = WifiScanner(interval_s=3600)
+    monkeypatch.setattr(network, "shared_scanner", lambda: scanner)
+    monkeypatch.setattr(network, "shared_monitor", lambda: FakeMonitor(state_path))
+    monkeypatch.setattr(network, "_beep", lambda *a, **k: None)
+    monkeypatch.setattr(network, "known_profiles", network.KnownProfiles())
+    write()
+
+    def provision(ssid="Home"):
+        """QR -> online: returns (seconds, nmcli calls made by handle_frame)."""
+        scanner.refresh()
+        before = len(read()["log"])
+        creds = types.SimpleNamespace(ssid=ssid, password="s3cret", hidden=False)
+        t = time.perf_counter()
+        network.handle_frame(None, decision=types.SimpleNamespace(kind="wifi_qr", creds=creds))
+        return time.perf_counter() - t, read()["log"][before:]
+
+    return types.SimpleNamespace(write=write, read=read, provision=provision)
+
+def _connects(calls):
+    return [c for c in calls if c.startswith("dev wifi connect")]
+
+def _ups(calls):
+    return [c for c in calls if c.startswith("con up")]
+
+def test_unknown_network_does_a_full_connect(nmcli):
+    elapsed, calls = nmcli.provision("Home")
+    assert len(_connects(calls)) == 1 and not _ups(calls)
+    assert nmcli.read()["active"] == "Home"
+    assert elapsed >= CONNECT_S
+    assert all("s3cret" not in c for c in nmcli.read()["log"])
+
+def test_saved_profile_is_brought_up_instead_of_recreated(nmcli):
+    nmcli.write(profiles=[{"name": "Home (saved)", "uuid": "uuid-home", "ssid": "Home"}])
+    elapsed, calls = nmcli.provision("Home")
+    assert _ups(calls) == ["con up uuid uuid-home"]
+    assert not _connects(calls)
+    assert nmcli.read()["active"] == "Home"
+    assert elapsed < CONNECT_S  # QR -> online without the full connect
+
+def test_already_on_the_network_skips_nmcli_connect(nmcli):
+    nmcli.write(active="Home")
+    _elapsed, calls = nmcli.provision("Home")
+    assert calls == []  # the scan cache answered: not even an nmcli query
+
+def test_stale_profile_falls_back_to_a_full_connect(nmcli):
+    nmcli.write(profiles=[{"name": "Home", "uuid": "uuid-old", "ssid": "Home", "stale": True}])
+    _elapsed, calls = nmcli.provision("Home")
+    assert _ups(calls) == ["con up uuid uuid-old"]
+    assert len(_connects(calls)) == 1
+    assert nmcli.read()["active"] == "Home"
+
+def test_profile_index_is_refreshed_after_a_connect(nmcli):
+    nmcli.provision("Home")
+    nmcli.write(active=None)  # dropped off the network
+    _elapsed, calls = nmcli.provision("Home")
+    assert len(_ups(calls)) == 1 and not _connects(calls)
+
+def test_reconnect_latency_known_vs_unknown(nmcli):
+    cold, _ = nmcli.provision("Home")
+    nmcli.write(active=None)
+    warm, _ = nmcli.provision("Home")
+    assert warm < cold
+    print(f"QR -> online: full connect {cold * 1000:.0f} ms, saved profile {warm * 1000:.0f} ms")
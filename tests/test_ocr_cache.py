@@ -0,0 +1,25 @@
+"""OCRCache: hash lookups verified against the page's line layout, in memory and from disk."""
+from services.vision.ocr_cache import OCRCache, layout_signature
+
+LINES = [{"id": "l_001", "text": "مرحبا", "lang": "ar"}]
+BANDS = [(50, 70, 40, 540), (90, 110, 40, 540), (130, 150, 40, 520)]  # y0, y1, x0, x1
+H = 0xABCDEF << 200
+
+def test_hit_needs_the_same_layout(tmp_path):
+    cache = OCRCache(tmp_path)
+    layout = cache.layout(BANDS)
+    cache.put(H, LINES, layout)
+    assert cache.find(H ^ 1, layout) == (H, LINES)  # a nearby hash of the same page
+    assert cache.find(H ^ 1, cache.layout(BANDS[:2])) == (None, None)
+    assert cache.stats()["rejects"] == 1
+
+def test_layout_is_checked_after_a_restart(tmp_path):
+    OCRCache(tmp_path).put(H, LINES, layout_signature(BANDS))
+    cache = OCRCache(tmp_path)  # nothing in memory: the entry comes from disk
+    assert cache.get(H, layout_signature(BANDS[1:] + [(300, 320, 40, 540)])) is None
+    assert cache.get(H, layout_signature(BANDS)) == LINES
+
+def test_far_hash_is_a_miss(tmp_path):
+    cache = OCRCache(tmp_path, max_distance=8)
+    cache.put(H, LINES, cache.layout(BANDS))
+    assert cache.get(H ^ ((1 << 20) - 1), cache.layout(BANDS)) is None
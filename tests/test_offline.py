@@ -0,0 +1,216 @@
+"""Auto-read (mode.autoread.AutoReader) and the offline orchestrator's page transitions."""
+import threading, time
+
+import pytest
+
+from core import events as E
+from core.bus import EventBus
+from mode.autoread import AutoReader
+from mode.mode_manger import ModeManager
+from mode.offline import OfflineOrchestrator
+from mode.online import OnlineOrchestrator
+
+# ---------- AutoReader ----------
+
+class Steps:
+    def __init__(self):
+        self.n = 0
+        self.event = threading.Event()
+
+    def __call__(self):
+        self.n += 1
+        self.event.set()
+
+def test_line_done_advances_at_once_without_delay():
+    steps = Steps()
+    ar = AutoReader(steps, enabled=True, delay_ms=0)
+    ar.line_done()
+    assert steps.n == 0  # not started
+    ar.start()
+    ar.line_done()
+    assert steps.n == 1
+
+def test_line_done_advances_after_the_delay():
+    steps = Steps()
+    ar = AutoReader(steps, enabled=True, delay_ms=30)
+    ar.start()
+    t = time.perf_counter()
+    ar.line_done()
+    assert steps.n == 0
+    assert steps.event.wait(1.0)
+    assert time.perf_counter() - t >= 0.025
+
+def test_interrupt_drops_the_pending_step_but_keeps_reading():
+    steps = Steps()
+    ar = AutoReader(steps, enabled=True, delay_ms=30)
+    ar.start()
+    ar.line_done()
+    ar.interrupt()
+    time.sleep(0.1)
+    assert steps.n == 0 and ar.active
+    ar.line_done()
+    assert steps.event.wait(1.0)
+
+def test_cancel_stops_auto_reading():
+    steps = Steps()
+    ar = AutoReader(steps, enabled=True, delay_ms=30)
+    ar.start()
+    ar.line_done()
+    ar.cancel()
+    time.sleep(0.1)
+    assert steps.n == 0 and not ar.active
+    ar.line_done()
+    time.sleep(0.1)
+    assert steps.n == 0
+
+def test_disabled_reader_never_steps():
+    steps = Steps()
+    ar = AutoReader(steps, enabled=False, delay_ms=0)
+    ar.start()
+    ar.line_done()
+    assert steps.n == 0 and not ar.active
+
+# ---------- OfflineOrchestrator ----------
+
+class Store:
+    def __init__(self):
+        self.state = {}
+
+    def load_state(self, default):
+        return dict(default, **self.state)
+
+    def save_state(self, state):
+        self.state.update(state)
+
+class FakeTTS:
+    """speak() only records; the test decides when the line has finished playing."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.spoken = []
+
+    def speak(self, text, lang=None):
+        self.spoken.append(text)
+
+    def stop(self):
+        pass
+
+    def finish(self):
+        self.bus.emit(E.TTS_DONE, {"text": self.spoken[-1], "lang": "ar"})
+
+@pytest.fixture
+def offline():
+    bus = EventBus()  # synchronous: every handler has run when emit() returns
+    tts = FakeTTS(bus)
+    orch = OfflineOrchestrator(bus, tts, Store())
+    orch.autoread.delay_s = 0
+    orch.autoread.enabled = True
+    orch.start()
+    yield bus, tts, orch
+    orch.stop()
+
+def _lines(page, n):
+    return [{"id": f"l_{i + 1:03d}", "text": f"p{page}l{i}", "lang": "ar"} for i in range(n)]
+
+def _stream(bus, page_id, lines, start=0, end=None):
+    for i in range(start, len(lines) if end is None else end):
+        bus.emit(E.OCR_LINE, {"page_id": page_id, "index": i, "line": lines[i]})
+
+def test_reads_a_page_line_by_line_then_stops(offline):
+    bus, tts, orch = offline
+    lines = _lines(1, 3)
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": lines})
+    for _ in range(5):
+        tts.finish()
+    assert tts.spoken == ["p1l0", "p1l1", "p1l2"]
+    assert orch.line_index == 2 and not orch.autoread.active
+
+def test_streamed_lines_are_read_as_they_arrive(offline):
+    bus, tts, orch = offline
+    lines = _lines(1, 4)
+    _stream(bus, 1, lines, 0, 2)
+    tts.finish()
+    tts.finish()  # caught up with the recognizer: waits for the next line
+    assert tts.spoken == ["p1l0", "p1l1"] and orch._awaiting
+    _stream(bus, 1, lines, 2, 3)
+    assert tts.spoken[-1] == "p1l2"
+    _stream(bus, 1, lines, 3)
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": lines})
+    tts.finish()
+    tts.finish()
+    assert tts.spoken == ["p1l0", "p1l1", "p1l2", "p1l3"]
+    assert not orch.autoread.active
+
+def test_new_streamed_page_starts_from_its_first_line(offline):
+    bus, tts, orch = offline
+    first = _lines(1, 6)
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": first})
+    for _ in range(4):
+        tts.finish()
+    assert orch.line_index == 4
+    bus.emit(E.BTN_CAPTURE_SHORT)
+    second = _lines(2, 3)
+    _stream(bus, 2, second, 0, 1)
+    assert orch.line_index == 0 and tts.spoken[-1] == "p2l0"
+    _stream(bus, 2, second, 1)
+    tts.finish()
+    assert tts.spoken[-1] == "p2l1"
+
+def test_new_page_without_streaming_starts_from_its_first_line(offline):
+    bus, tts, orch = offline
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": _lines(1, 5)})
+    for _ in range(3):
+        tts.finish()
+    bus.emit(E.OCR_DONE, {"page_id": 2, "lines": _lines(2, 5)})
+    assert orch.line_index == 0 and tts.spoken[-1] == "p2l0"
+    assert orch.autoread.active
+
+def test_pause_holds_the_line_and_resume_reads_on(offline):
+    bus, tts, orch = offline
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": _lines(1, 4)})
+    tts.finish()
+    bus.emit(E.BTN_PREV_LONG)  # pause
+    n = len(tts.spoken)
+    tts.finish()
+    assert len(tts.spoken) == n and orch.line_index == 1
+    bus.emit(E.BTN_NEXT_LONG)  # resume
+    tts.finish()
+    assert tts.spoken[-1] == "p1l2"
+
+def test_skip_moves_the_reader_and_auto_read_continues_from_there(offline):
+    bus, tts, orch = offline
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": _lines(1, 6)})
+    bus.emit(E.BTN_NEXT_SHORT)
+    bus.emit(E.BTN_NEXT_SHORT)
+    assert tts.spoken == ["p1l0", "p1l1", "p1l2"]
+    tts.finish()
+    assert tts.spoken[-1] == "p1l3" and orch.autoread.active
+
+def test_tts_done_for_another_text_does_not_advance(offline):
+    bus, tts, orch = offline
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": _lines(1, 3)})
+    bus.emit(E.TTS_DONE, {"text": "جاهز", "lang": "ar"})
+    assert tts.spoken == ["p1l0"] and orch.line_index == 0
+
+def test_mode_flaps_do_not_duplicate_handlers(offline):
+    bus, tts, orch = offline
+    manager = ModeManager(bus, orch, OnlineOrchestrator(bus))
+    manager.start()
+    for online in (True, False, True, False):
+        bus.emit(E.NET_STATUS, {"online": online})
+    assert manager.current() == "offline"
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": _lines(1, 6)})
+    bus.emit(E.BTN_NEXT_SHORT)
+    assert orch.line_index == 1
+    assert tts.spoken == ["p1l0", "p1l1"]
+
+def test_offline_handlers_are_idle_while_online(offline):
+    bus, tts, orch = offline
+    manager = ModeManager(bus, orch, OnlineOrchestrator(bus))
+    manager.start()
+    bus.emit(E.OCR_DONE, {"page_id": 1, "lines": _lines(1, 4)})
+    bus.emit(E.NET_STATUS, {"online": True})
+    bus.emit(E.BTN_NEXT_SHORT)
+    bus.emit(E.OCR_DONE, {"page_id": 2, "lines": _lines(2, 4)})
+    tts.finish()
+    assert tts.spoken == ["p1l0"] and orch.line_index == 0
@@ -0,0 +1,52 @@
+"""Preloader: the ready prompt comes first, imports and deferred services run in the background."""
+import threading
+
+from runners.preload import Preloader
+
+class Service:
+    def __init__(self, name, log):
+        self.name, self.log = name, log
+
+    def start(self):
+        self.log.append(("start", self.name))
+
+    def stop(self):
+        self.log.append(("stop", self.name))
+
+def test_ready_prompt_runs_before_the_imports_and_start_does_not_wait():
+    log, gate = [], threading.Event()
+
+    def slow_factory():
+        gate.wait(2.0)
+        return Service("camera", log)
+
+    pre = Preloader(on_ready=lambda: log.append("ready"), modules=("json",), services=[("camera", slow_factory)])
+    pre.start()
+    assert log == ["ready"] and not pre.wait(0.05)  # start() returned while the service is still pending
+    gate.set()
+    assert pre.wait(2.0)
+    assert log == ["ready", ("start", "camera")]
+    assert "json" in pre.timings_ms
+    pre.stop()
+
+def test_deferred_services_stop_in_reverse_order():
+    log = []
+    pre = Preloader(modules=(), services=[(n, lambda n=n: Service(n, log)) for n in ("a", "b")])
+    pre.start()
+    assert pre.wait(2.0)
+    pre.stop()
+    assert log == [("start", "a"), ("start", "b"), ("stop", "b"), ("stop", "a")]
+
+def test_failing_import_or_service_does_not_stop_the_rest():
+    log = []
+
+    def broken():
+        raise RuntimeError("no camera")
+
+    pre = Preloader(modules=("no_such_module_xyz", "json"),
+                    services=[("broken", broken), ("ok", lambda: Service("ok", log))])
+    pre.start()
+    assert pre.wait(2.0)
+    assert set(pre.timings_ms) == {"no_such_module_xyz", "json"}
+    assert log == [("start", "ok")]
+    pre.stop()
@@ -0,0 +1,68 @@
+"""QRClassifier's decode ladder: ROI first, stage names, and how much of the full frame is retried."""
+import numpy as np
+import pytest
+
+pytest.importorskip("pyzbar.pyzbar", exc_type=ImportError)  # needs libzbar
+
+from services.vision import qr_detector as Q
+
+ROI_STAGES = ["roi_raw", "roi_scale_0.75", "roi_scale_0.5", "roi_scale_1.25", "roi_scale_1.5",
+              "roi_threshold", "roi_threshold_inv"]
+FULL_STAGES = [s[len("roi_"):] for s in ROI_STAGES]
+
+@pytest.fixture
+def zbar(monkeypatch):
+    """Records the image shape of every ZBar call; answers `payload` at call number `hit` (1-based)."""
+    calls = []
+    answer = {"hit": None, "payload": "hello"}
+
+    def fake(img):
+        calls.append(img.shape)
+        return answer["payload"] if len(calls) == answer["hit"] else None
+
+    monkeypatch.setattr(Q, "_try_zbar", fake)
+    return calls, answer
+
+def _box(x0, y0, x1, y1):
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+
+GRAY = np.full((480, 640), 200, dtype=np.uint8)
+
+def _stages(clf, pts, calls, answer):
+    names = []
+    for n in range(1, 20):
+        calls.clear()
+        answer["hit"] = n
+        _payload, stage = clf.decode_gray(GRAY, pts)
+        if stage is None:
+            return names
+        names.append(stage)
+    return names
+
+def test_crop_adds_the_margin_and_clips_to_the_frame():
+    clf = Q.QRClassifier(roi_margin=0.15, min_roi_px=48)
+    assert clf.crop(GRAY, _box(100, 100, 300, 300)).shape == (260, 260)
+    assert clf.crop(GRAY, _box(600, 440, 640, 480)).shape == (64, 64)  # clipped at the corner
+    assert clf.crop(GRAY, None) is None
+
+def test_roi_is_scanned_first_and_the_stage_is_reported(zbar):
+    calls, answer = zbar
+    answer["hit"] = 3
+    payload, stage = Q.QRClassifier().decode_gray(GRAY, _box(100, 100, 300, 300))
+    assert (payload, stage) == ("hello", "roi_scale_0.5")
+    assert all(shape[0] < 480 for shape in calls)  # never touched the full frame
+
+def test_without_a_box_the_full_frame_gets_the_whole_ladder(zbar):
+    calls, answer = zbar
+    assert _stages(Q.QRClassifier(), None, calls, answer) == FULL_STAGES
+
+def test_failed_roi_falls_back_to_the_raw_full_frame_only(zbar):
+    calls, answer = zbar
+    clf = Q.QRClassifier()
+    assert _stages(clf, _box(100, 100, 300, 300), calls, answer) == ROI_STAGES + ["raw"]
+    assert len(calls) == 8  # a failing frame: 7 ROI calls + 1 full-frame call
+
+def test_box_covering_most_of_the_frame_skips_the_full_frame(zbar):
+    calls, answer = zbar
+    clf = Q.QRClassifier()
+    assert _stages(clf, _box(20, 20, 620, 460), calls, answer) == ROI_STAGES
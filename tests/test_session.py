@@ -0,0 +1,81 @@
+"""SessionStore: write-behind coalescing, the append-only journal, compaction and crash recovery."""
+import json, time
+
+import pytest
+
+from core.storge import SessionStore
+
+@pytest.fixture
+def paths(tmp_path):
+    path = tmp_path / "session.json"
+    return path, path.with_name("session.json.journal")
+
+def _journal(path):
+    return [json.loads(line) for line in path.read_bytes().splitlines() if line.strip()]
+
+def test_save_returns_before_the_disk_write(paths):
+    path, journal = paths
+    store = SessionStore(path, debounce_sec=0.2, max_delay_sec=5.0)
+    store.save_state({"lineIndex": 1})
+    assert store.load_state() == {"lineIndex": 1}
+    assert not journal.exists() or _journal(journal) == []
+    store.close()
+    assert json.loads(path.read_text()) == {"lineIndex": 1}
+
+def test_rapid_updates_coalesce_into_one_record(paths):
+    path, journal = paths
+    store = SessionStore(path, debounce_sec=0.05, max_delay_sec=5.0)
+    for i in range(50):
+        store.save_state({"lineIndex": i, "mode": "offline"})
+    time.sleep(0.3)
+    assert _journal(journal) == [{"lineIndex": 49, "mode": "offline"}]
+    store.close()
+
+def test_continuous_updates_still_flush_by_max_delay(paths):
+    path, journal = paths
+    store = SessionStore(path, debounce_sec=0.1, max_delay_sec=0.15)
+    deadline = time.monotonic() + 0.5
+    i = 0
+    while time.monotonic() < deadline:  # never idle for debounce_sec
+        store.save_state({"lineIndex": i})
+        i += 1
+        time.sleep(0.02)
+    assert journal.exists() and _journal(journal)
+    store.close()
+
+def test_journal_is_replayed_on_startup(paths):
+    path, _journal_path = paths
+    store = SessionStore(path, write_behind=False)
+    store.save_state({"mode": "offline", "lineIndex": 3})
+    store.save_state({"lineIndex": 4})
+    # no close(): the process died before compacting
+    assert SessionStore(path, write_behind=False).load_state() == {"mode": "offline", "lineIndex": 4}
+
+def test_torn_last_record_is_dropped(paths):
+    path, journal = paths
+    store = SessionStore(path, write_behind=False)
+    store.save_state({"lineIndex": 7})
+    with open(journal, "ab") as f:
+        f.write(b'{"lineIndex": 8')  # power cut mid-append
+    restored = SessionStore(path, write_behind=False)
+    assert restored.load_state() == {"lineIndex": 7}
+    assert _journal(journal) == []  # compacted into a clean snapshot
+    assert json.loads(path.read_text()) == {"lineIndex": 7}
+
+def test_compaction_truncates_the_journal(paths):
+    path, journal = paths
+    store = SessionStore(path, write_behind=False, compact_every=4)
+    for i in range(10):
+        store.save_state({"lineIndex": i})
+    assert len(_journal(journal)) == 2
+    assert json.loads(path.read_text()) == {"lineIndex": 7}
+    assert SessionStore(path, write_behind=False).load_state() == {"lineIndex": 9}
+
+def test_unknown_keys_and_wrong_types_are_rejected(paths):
+    store = SessionStore(paths[0], write_behind=False)
+    with pytest.raises(KeyError):
+        store.save_state({"cursor": 1})
+    with pytest.raises(TypeError):
+        store.save_state({"lineIndex": "3"})
+    with pytest.raises(TypeError):
+        store.save_state({"lineIndex": True})
@@ -0,0 +1,98 @@
+"""VoicePool with fake voices: background warm-up, LRU eviction under the RAM budget, pinning."""
+import threading, time
+
+import pytest
+
+from services.audio.voice_pool import VoicePool
+
+class FakeVoice:
+    """start() loads the 'model'; it blocks until `gate` is set."""
+
+    def __init__(self, model, gate, log):
+        self.model, self.gate, self.log = model, gate, log
+        self.closed = False
+
+    def start(self):
+        self.log.append(("load", self.model))
+        self.gate.wait(2.0)
+
+    def synthesize(self, text, rate):
+        return f"{self.model}:{text}"
+
+    def close(self):
+        self.closed = True
+        self.log.append(("close", self.model))
+
+@pytest.fixture
+def pool(tmp_path):
+    made, log, gate = [], [], threading.Event()
+    gate.set()
+
+    def make(langs=("ar", "en"), budget_mb=100.0, mb_per_voice=40.0):
+        voices = {}
+        for lang in langs:
+            model = tmp_path / f"{lang}.onnx"
+            with open(model, "wb") as f:
+                f.truncate(int(mb_per_voice * 1024 * 1024))  # sparse: only the size matters
+            voices[lang] = str(model)
+        p = VoicePool(voices, budget_mb=budget_mb, default_lang=langs[0], mem_factor=1.0,
+                      factory=lambda m: FakeVoice(m, gate, log))
+        made.append(p)
+        return p
+
+    yield make, log, gate
+    gate.set()
+    for p in made:
+        p.close()
+
+def _loads(log):
+    return [m.rsplit("/", 1)[-1] for what, m in log if what == "load"]
+
+def test_start_returns_before_the_default_voice_has_loaded(pool):
+    make, log, gate = pool
+    gate.clear()
+    p = make()
+    t = time.perf_counter()
+    p.start()
+    assert time.perf_counter() - t < 0.1
+    spoken = []
+    speaker = threading.Thread(target=lambda: spoken.append(p.synthesize("hi", lang="ar")))
+    speaker.start()
+    time.sleep(0.05)
+    assert spoken == []  # waits for the warm-up load in flight
+    gate.set()
+    speaker.join(2.0)
+    assert spoken == [p.voices["ar"] + ":hi"]
+    assert _loads(log) == ["ar.onnx"] and p.stats()["loads"] == 1
+
+def test_close_waits_for_the_warm_up(pool):
+    make, log, gate = pool
+    gate.clear()
+    p = make()
+    p.start()
+    threading.Timer(0.05, gate.set).start()
+    p.close()
+    assert ("close", p.voices["ar"]) in log
+    assert p.stats()["resident"] == {}
+
+def test_unknown_language_falls_back_to_the_default_voice(pool):
+    make, log, _gate = pool
+    p = make()
+    assert p.synthesize("x", lang="fr-FR").startswith(p.voices["ar"])
+    assert p.synthesize("x", lang="EN").startswith(p.voices["en"])
+
+def test_least_recently_used_voice_is_evicted_over_budget(pool):
+    make, log, _gate = pool
+    p = make(langs=("ar", "en", "fr"), budget_mb=100.0, mb_per_voice=40.0)
+    for lang in ("ar", "en", "ar", "fr"):
+        p.synthesize("x", lang=lang)
+    assert set(p.stats()["resident"]) == {"ar", "fr"}
+    assert p.stats()["evictions"] == 1 and ("close", p.voices["en"]) in log
+
+def test_voice_in_use_is_not_evicted(pool):
+    make, log, _gate = pool
+    p = make(langs=("ar", "en"), budget_mb=50.0, mb_per_voice=40.0)
+    with p.use("ar"):
+        p.synthesize("x", lang="en")  # over budget, but "ar" is pinned
+        assert set(p.stats()["resident"]) == {"ar", "en"}
+    assert p.stats()["evictions"] == 0